@@ -0,0 +1,232 @@
+import json
+import os
+import signal
+import socket
+import socketserver
+import stat
+import struct
+import sys
+import tempfile
+import threading
+
+# Set to share one daemon socket between shells, defaults to a file in XDG_RUNTIME_DIR,
+# or in a private per-user directory of the temp directory
+SOCKET_ENV = "PRIVACY_TOOL_SOCKET"
+RUNTIME_DIR_ENV = "XDG_RUNTIME_DIR"
+SOCKET_NAME = "privacy_tool_task1"
+CONNECT_TIMEOUT_SECONDS = 0.5
+DAEMON_ACTIONS = ["scan"]
+
+
+class DaemonUnavailable(Exception):
+    """No daemon is listening on the socket"""
+
+    pass
+
+
+def default_socket_dir():
+    return os.environ.get(RUNTIME_DIR_ENV) or os.path.join(
+        tempfile.gettempdir(), f"privacy_tool_{os.getuid()}"
+    )
+
+
+def default_socket_path():
+    return os.environ.get(SOCKET_ENV) or os.path.join(
+        default_socket_dir(), f"{SOCKET_NAME}.sock"
+    )
+
+
+def ensure_private_dir(path):
+    """
+    Create the socket directory if needed, and check that no other user can use it,
+    so nobody else can create the socket first and receive the texts sent to it.
+    """
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    info = os.lstat(path)
+    if (
+        not stat.S_ISDIR(info.st_mode)
+        or info.st_uid != os.getuid()
+        or info.st_mode & 0o077
+    ):
+        raise RuntimeError(
+            f"{path} must be a directory owned and only accessible by the current user"
+        )
+
+
+def _peer_uid(client, socket_path):
+    """User ID of the process listening on the other end of a connected socket"""
+    if hasattr(socket, "SO_PEERCRED"):
+        credentials = client.getsockopt(
+            socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize("3i")
+        )
+        return struct.unpack("3i", credentials)[1]
+    return os.stat(socket_path).st_uid
+
+
+def resolve_path(path):
+    """Absolute path of a file argument, the daemon does not share the client's cwd"""
+    return os.path.abspath(path) if path else None
+
+
+def send_request(request, socket_path=None):
+    """
+    Send one request to the daemon and return its result.
+
+    Raises DaemonUnavailable when no daemon is listening, or when the daemon belongs to
+    another user and nothing is sent, so the caller can fall back to an in-process
+    scanner, and RuntimeError with the daemon's message when the request itself failed.
+    """
+    socket_path = socket_path or default_socket_path()
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        client.settimeout(CONNECT_TIMEOUT_SECONDS)
+        try:
+            client.connect(socket_path)
+        except (FileNotFoundError, ConnectionRefusedError, socket.timeout) as e:
+            raise DaemonUnavailable(str(e))
+        if _peer_uid(client, socket_path) != os.getuid():
+            print(
+                f"Warning: ignoring {socket_path}, its daemon belongs to another user",
+                file=sys.stderr,
+            )
+            raise DaemonUnavailable(f"{socket_path} belongs to another user")
+        # Analysis of a long text may take a while once connected
+        client.settimeout(None)
+
+        client.sendall(json.dumps(request).encode("utf-8") + b"\n")
+        with client.makefile("rb") as response_file:
+            line = response_file.readline()
+    finally:
+        client.close()
+
+    if not line:
+        raise DaemonUnavailable("The daemon closed the connection")
+    response = json.loads(line)
+    if "error" in response:
+        raise RuntimeError(response["error"])
+    return response["result"]
+
+
+class ScannerDaemon:
+    """
+    Keeps warmed scanners resident, one per config.
+
+    A scanner is rebuilt when its config changes on disk, so edits do not need a
+    daemon restart. A missing config falls back to the default recognizers, like an
+    in-process scanner does.
+    """
+
+    def __init__(self, scanner_factory=None):
+        self.scanners = {}
+        # Builds a scanner from a config, PrivacyScanner by default
+        self.scanner_factory = scanner_factory
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _mtime(path):
+        try:
+            return os.stat(path).st_mtime_ns if path else None
+        except FileNotFoundError:
+            return None
+
+    def _new_scanner(self, config):
+        if self.scanner_factory is not None:
+            return self.scanner_factory(config)
+
+        from scanner import PrivacyScanner
+
+        return PrivacyScanner(config)
+
+    def get_scanner(self, config=None):
+        key = (config, self._mtime(config))
+        with self._lock:
+            scanner = self.scanners.get(key)
+            if scanner is None:
+                scanner = self._new_scanner(config)
+                # Drop the scanners of outdated versions of the same config
+                for old_key in [k for k in self.scanners if k[0] == config]:
+                    del self.scanners[old_key]
+                self.scanners[key] = scanner
+        return scanner
+
+    def handle(self, request):
+        action = request.get("action")
+        if action == "ping":
+            return "pong"
+        if action not in DAEMON_ACTIONS:
+            raise ValueError(
+                f"Invalid action: {action}. Must be one of {DAEMON_ACTIONS}"
+            )
+        text = request.get("text")
+        if not isinstance(text, str):
+            raise ValueError("Missing text")
+
+        return self.get_scanner(request.get("config")).scan_text(text)
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """One JSON request per line, answered by one JSON line"""
+
+    def handle(self):
+        for line in self.rfile:
+            try:
+                response = {
+                    "result": self.server.scanner_daemon.handle(json.loads(line))
+                }
+            except Exception as e:
+                response = {"error": str(e)}
+            self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+            self.wfile.flush()
+
+
+class _DaemonServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+
+def create_server(socket_path, scanner_daemon):
+    """Bind the daemon's socket, which only its owner may connect to"""
+    previous_umask = os.umask(0o177)
+    try:
+        server = _DaemonServer(socket_path, _RequestHandler)
+    finally:
+        os.umask(previous_umask)
+    server.scanner_daemon = scanner_daemon
+    return server
+
+
+def serve(socket_path=None, config=None):
+    """
+    Serve scan requests on a Unix socket until interrupted.
+
+    The scanner of the given config is built before listening, so the first request
+    is answered warm.
+    """
+    if socket_path is None and not os.environ.get(SOCKET_ENV):
+        ensure_private_dir(default_socket_dir())
+    socket_path = socket_path or default_socket_path()
+    if os.path.exists(socket_path):
+        try:
+            send_request({"action": "ping"}, socket_path)
+        except DaemonUnavailable:
+            # Left behind by a daemon that did not shut down cleanly
+            os.unlink(socket_path)
+        else:
+            raise RuntimeError(f"A daemon is already listening on {socket_path}")
+
+    scanner_daemon = ScannerDaemon()
+    scanner_daemon.get_scanner(resolve_path(config))
+
+    server = create_server(socket_path, scanner_daemon)
+
+    def stop(signum, frame):
+        threading.Thread(target=server.shutdown).start()
+
+    signal.signal(signal.SIGTERM, stop)
+    print(f"Privacy Tool daemon listening on {socket_path}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        os.unlink(socket_path)
@@ -1,19 +1,58 @@
 import argparse
 import json
 
-from scanner import PrivacyScanner
+from daemon import DaemonUnavailable, resolve_path, send_request, serve
+
+
+def scan(args):
+    """Forward -scan to the daemon, or scan in-process if none is running"""
+    if not args.no_daemon:
+        request = {
+            "action": "scan",
+            "text": args.scan,
+            "config": resolve_path(args.config),
+        }
+        try:
+            return send_request(request, args.socket)
+        except DaemonUnavailable:
+            pass
+
+    # Imported here, so that daemon clients never load Presidio
+    from scanner import PrivacyScanner
+
+    return PrivacyScanner(args.config).scan_text(args.scan)
 
 
 def main():
     parser = argparse.ArgumentParser(description="Privacy Detection Tool")
-    parser.add_argument("-scan", type=str, required=True, help="Text to scan")
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("-scan", type=str, help="Text to scan")
+    group.add_argument(
+        "-daemon",
+        action="store_true",
+        help="Keep warmed scanners resident, serving -scan over a Unix socket",
+    )
     parser.add_argument("-config", type=str, help="Path to config file")
+    parser.add_argument(
+        "-socket",
+        type=str,
+        help="Unix socket of the daemon, defaults to PRIVACY_TOOL_SOCKET, else a socket "
+        "in XDG_RUNTIME_DIR or in a private per-user directory of the temp directory",
+    )
+    parser.add_argument(
+        "-no-daemon",
+        action="store_true",
+        help="Scan in this process even if a daemon is running",
+    )
 
     args = parser.parse_args()
 
     try:
-        scanner = PrivacyScanner(args.config)
-        results = scanner.scan_text(args.scan)
+        if args.daemon:
+            serve(args.socket, args.config)
+            return 0
+
+        results = scan(args)
 
         print(json.dumps(results, indent=2))
     except Exception as e:
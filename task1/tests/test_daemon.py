@@ -0,0 +1,22 @@
+import threading
+from task1.daemon import ScannerDaemon, create_server, send_request
+
+
+class EchoScanner:
+    def __init__(self, config):
+        self.config = config
+
+    def scan_text(self, text):
+        return [{"text": text, "config": self.config}]
+
+
+def test_daemon_scans_with_missing_configs(tmp_path):
+    config = str(tmp_path / "missing.json")
+    socket_path = str(tmp_path / "daemon.sock")
+    server = create_server(socket_path, ScannerDaemon(EchoScanner))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        assert send_request({"action": "scan", "text": "hi", "config": config}, socket_path) == [{"text": "hi", "config": config}]
+    finally:
+        server.shutdown()
+        server.server_close()
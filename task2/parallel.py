@@ -0,0 +1,150 @@
+import multiprocessing
+import os
+import sys
+from collections import deque
+from contextlib import redirect_stdout
+
+from config_schema import ConfigLoader
+from key_provider import load_key_provider
+from scanner import PrivacyScanner
+from stream import DEFAULT_CHUNK_SIZE, StreamProcessor, read_chunks
+
+# One scanner per worker process, created once by the pool initializer
+_worker_scanner = None
+# Why the initializer could not create the scanner, raised by every task instead
+_worker_error = None
+
+
+def _init_worker(config, keys_path=None):
+    global _worker_scanner, _worker_error
+    # A failing initializer makes the pool restart the worker forever, so the
+    # error is kept and reported by the tasks
+    try:
+        # Keep config loading messages out of the parent's output stream
+        with redirect_stdout(sys.stderr):
+            _worker_scanner = PrivacyScanner(config, keys_path)
+    except Exception as e:
+        _worker_error = e
+
+
+def _get_worker_scanner():
+    if _worker_error is not None:
+        raise _worker_error
+    return _worker_scanner
+
+
+def _scan_shard(texts):
+    return _get_worker_scanner().scan_texts(texts)
+
+
+def _anonymize_shard(args):
+    texts, method = args
+    return _get_worker_scanner().anonymize_texts(texts, method)
+
+
+def _process_stream_chunk(args):
+    chunk, stream_format, first_line, action, method, fields = args
+    processor = StreamProcessor(
+        _get_worker_scanner(), action=action, method=method, fields=fields
+    )
+    return processor.process_chunk(chunk, stream_format, first_line)
+
+
+class ParallelScanner:
+    """
+    Shards texts across a pool of worker processes, each holding its own scanner.
+
+    Presidio analysis is CPU bound and holds the GIL, so spreading shards over
+    processes lets a corpus scan use every core. Results are always returned in
+    input order. Use it as a context manager so the pool is shut down.
+
+    The config and the keys file are validated before the pool starts, so that
+    invalid ones raise here rather than in every worker.
+    """
+
+    def __init__(
+        self, config=None, workers=None, chunk_size=DEFAULT_CHUNK_SIZE, keys_path=None
+    ):
+        with redirect_stdout(sys.stderr):
+            ConfigLoader(config)
+        load_key_provider(keys_path)
+
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.pool = multiprocessing.Pool(
+            self.workers, initializer=_init_worker, initargs=(config, keys_path)
+        )
+        self.stats = {"lines": 0}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.pool.close()
+        self.pool.join()
+
+    def _shards(self, texts):
+        return [
+            texts[start : start + self.chunk_size]
+            for start in range(0, len(texts), self.chunk_size)
+        ]
+
+    def scan_texts(self, texts):
+        """Scan a list of texts in parallel, returning one result per text in order"""
+        results = []
+        for shard_results in self.pool.imap(_scan_shard, self._shards(texts)):
+            results.extend(shard_results)
+        return results
+
+    def anonymize_texts(self, texts, method):
+        """Anonymize a list of texts in parallel, returning one string per text in order"""
+        results = []
+        shards = [(shard, method) for shard in self._shards(texts)]
+        for shard_results in self.pool.imap(_anonymize_shard, shards):
+            results.extend(shard_results)
+        return results
+
+    def process_stream(
+        self,
+        input_file,
+        output_file,
+        stream_format,
+        action="anonymize",
+        method="replace",
+        fields=None,
+    ):
+        """
+        Stream input_file through the pool, writing results in input order.
+
+        At most two chunks per worker are in flight, so memory stays bounded while
+        reading, analysis and writing overlap.
+        """
+        pending = deque()
+        max_pending = 2 * self.workers
+        first_line = 1
+
+        for chunk in read_chunks(input_file, self.chunk_size):
+            pending.append(
+                self.pool.apply_async(
+                    _process_stream_chunk,
+                    ((chunk, stream_format, first_line, action, method, fields),),
+                )
+            )
+            first_line += len(chunk)
+            if len(pending) >= max_pending:
+                self._write_result(pending.popleft(), output_file)
+
+        while pending:
+            self._write_result(pending.popleft(), output_file)
+
+        return self.stats
+
+    def _write_result(self, async_result, output_file):
+        output_lines = async_result.get()
+        output_file.writelines(line + "\n" for line in output_lines)
+        output_file.flush()
+
+        self.stats["lines"] += len(output_lines)
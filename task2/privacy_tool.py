@@ -1,7 +1,91 @@
 import argparse
 import json
+import sys
+import time
+from contextlib import redirect_stdout
 
+from daemon import DaemonUnavailable, resolve_path, send_request, serve
+from key_provider import load_key_provider
+from parallel import ParallelScanner
 from scanner import PrivacyScanner, ANONYMIZATIONMETHOD
+from stream import (
+    DEFAULT_CHUNK_SIZE,
+    STREAM_ACTIONS,
+    STREAM_FORMATS,
+    StreamProcessor,
+    open_stream,
+    resolve_format,
+)
+
+
+def stream_file(args):
+    """Stream -input through the scanner(s) and report throughput on stderr"""
+    if args.chunk_size < 1:
+        raise ValueError("-chunk-size must be at least 1")
+    if args.workers < 1:
+        raise ValueError("-workers must be at least 1")
+
+    fields = args.fields.split(",") if args.fields else None
+    stream_format = resolve_format(args.input, args.format)
+    start_time = time.perf_counter()
+
+    if args.workers > 1:
+        with ParallelScanner(
+            args.config, args.workers, args.chunk_size, args.keys
+        ) as parallel_scanner, open_stream(args.input, "r") as input_file, open_stream(
+            args.output, "w"
+        ) as output_file:
+            stats = parallel_scanner.process_stream(
+                input_file,
+                output_file,
+                stream_format,
+                action=args.action,
+                method=args.method,
+                fields=fields,
+            )
+        lines = stats["lines"]
+    else:
+        # Keep config loading messages out of the streamed output
+        with redirect_stdout(sys.stderr):
+            scanner = PrivacyScanner(args.config, args.keys)
+
+        processor = StreamProcessor(
+            scanner, action=args.action, method=args.method, fields=fields
+        )
+        with open_stream(args.input, "r") as input_file, open_stream(
+            args.output, "w"
+        ) as output_file:
+            lines = processor.process(
+                input_file, output_file, stream_format, args.chunk_size
+            )
+
+    elapsed = time.perf_counter() - start_time
+    print(
+        f"Processed {lines} lines in {elapsed:.2f}s "
+        f"({lines / elapsed:.1f} lines/s, {args.workers} worker(s))",
+        file=sys.stderr,
+    )
+
+
+def run_request(args, action, text):
+    """Forward -scan/-anonymize to the daemon, or run it in-process if none is running"""
+    if not args.no_daemon:
+        request = {
+            "action": action,
+            "text": text,
+            "method": args.method,
+            "config": resolve_path(args.config),
+            "keys": resolve_path(args.keys),
+        }
+        try:
+            return send_request(request, args.socket)
+        except DaemonUnavailable:
+            pass
+
+    scanner = PrivacyScanner(args.config, args.keys)
+    if action == "scan":
+        return scanner.scan_text(text)
+    return scanner.anonymize_text(text, args.method)
 
 
 def main():
@@ -9,25 +93,110 @@ def main():
     group = parser.add_mutually_exclusive_group(required=True)
     group.add_argument("-scan", type=str, help="Text to scan")
     group.add_argument("-anonymize", type=str, help="Text to anonymize")
+    group.add_argument(
+        "-deanonymize", type=str, help="Text whose encrypted spans to decrypt"
+    )
+    group.add_argument(
+        "-input",
+        type=str,
+        help="File to stream line by line, use - for stdin",
+    )
+    group.add_argument(
+        "-daemon",
+        action="store_true",
+        help="Keep warmed scanners resident, serving -scan/-anonymize over a Unix socket",
+    )
     parser.add_argument("-config", type=str, help="Path to config file")
     parser.add_argument(
         "-method",
         type=str,
         choices=ANONYMIZATIONMETHOD,
         default="replace",
-        help="Anonymization method (for -anonymize only)",
+        help="Anonymization method (for -anonymize and -input only)",
+    )
+    parser.add_argument(
+        "-output",
+        type=str,
+        default="-",
+        help="File to write streamed results to, defaults to stdout (for -input only)",
+    )
+    parser.add_argument(
+        "-action",
+        type=str,
+        choices=STREAM_ACTIONS,
+        default="anonymize",
+        help="What to do with each streamed line (for -input only)",
+    )
+    parser.add_argument(
+        "-keys",
+        type=str,
+        help="JSON file of encryption keys for the encrypt and decrypt methods, "
+        "defaults to PRIVACY_KEYS_FILE or the PRIVACY_KEY_<ID> variables",
+    )
+    parser.add_argument(
+        "-format",
+        type=str,
+        choices=STREAM_FORMATS,
+        default="auto",
+        help="Input format, auto picks jsonl for .jsonl/.ndjson files (for -input only)",
+    )
+    parser.add_argument(
+        "-fields",
+        type=str,
+        help="Comma separated JSONL fields to process, defaults to every string field",
+    )
+    parser.add_argument(
+        "-chunk-size",
+        type=int,
+        default=DEFAULT_CHUNK_SIZE,
+        help="Number of lines analyzed together (for -input only)",
+    )
+
+    parser.add_argument(
+        "-workers",
+        type=int,
+        default=1,
+        help="Number of worker processes analyzing chunks in parallel (for -input only)",
+    )
+    parser.add_argument(
+        "-socket",
+        type=str,
+        help="Unix socket of the daemon, defaults to PRIVACY_TOOL_SOCKET, else a socket "
+        "in XDG_RUNTIME_DIR or in a private per-user directory of the temp directory",
+    )
+    parser.add_argument(
+        "-no-daemon",
+        action="store_true",
+        help="Scan in this process even if a daemon is running",
     )
 
     args = parser.parse_args()
 
     try:
-        scanner = PrivacyScanner(args.config)
+        if args.daemon:
+            serve(args.socket, args.config, args.keys)
+            return 0
+
+        if args.input:
+            stream_file(args)
+            return 0
+
+        if args.deanonymize is not None:
+            # Decryption needs the keys only, not the analyzer
+            key_provider = load_key_provider(args.keys)
+            if key_provider is None:
+                raise ValueError(
+                    "No encryption keys configured, use -keys, PRIVACY_KEYS_FILE "
+                    "or PRIVACY_KEY_<ID> variables"
+                )
+            print(key_provider.decrypt_text(args.deanonymize))
+            return 0
 
         if args.scan:
-            results = scanner.scan_text(args.scan)
+            results = run_request(args, "scan", args.scan)
             print(json.dumps(results, indent=2))
         else:
-            anonymized_text = scanner.anonymize_text(args.anonymize, args.method)
+            anonymized_text = run_request(args, "anonymize", args.anonymize)
             print(anonymized_text)
 
         return 0
@@ -1,7 +1,4 @@
-from presidio_analyzer import AnalyzerEngine
-from presidio_anonymizer import AnonymizerEngine
-from presidio_anonymizer.entities import OperatorConfig
-from config_schema import PIIRegistry
+from key_provider import load_key_provider
 
 # TODO: Convert to data class
 ANONYMIZATIONMETHOD = [
@@ -18,11 +15,25 @@ ANONYMIZATIONMETHOD = [
 class PrivacyScanner:
     """Main scanner class for privacy detection"""
 
-    def __init__(self, config):
+    def __init__(self, config, keys_path=None):
+        # Imported here, so that daemon clients never load Presidio
+        from presidio_analyzer import AnalyzerEngine, BatchAnalyzerEngine
+        from config_schema import PIIRegistry
+
         self.analyzer = AnalyzerEngine(registry=PIIRegistry(config).get_registry())
-        self.anonymizer_engine = AnonymizerEngine()
-        # TODO: Implement eccryption key handler
-        # self.encryption_key = "saiuddubdub"
+        self.batch_analyzer = BatchAnalyzerEngine(self.analyzer)
+        # Created on first use, so -action scan never imports the anonymizer
+        self._anonymizer_engine = None
+        # Keys of the encrypt and decrypt methods, None when no key is configured
+        self.key_provider = load_key_provider(keys_path)
+
+    @property
+    def anonymizer_engine(self):
+        if self._anonymizer_engine is None:
+            from presidio_anonymizer import AnonymizerEngine
+
+            self._anonymizer_engine = AnonymizerEngine()
+        return self._anonymizer_engine
 
     def __analyze_text(self, text: str) -> list:
         """Analyze text for privacy information"""
@@ -31,11 +42,12 @@ class PrivacyScanner:
 
         return results
 
-    def scan_text(self, text: str) -> list:
-        """Scan text for privacy information"""
+    def __analyze_texts(self, texts: list) -> list:
+        """Analyze texts in one pass of the NLP pipeline (spaCy nlp.pipe)"""
 
-        results = self.__analyze_text(text)
+        return self.batch_analyzer.analyze_iterator(texts, language="en")
 
+    def __to_scan_results(self, text: str, results: list) -> list:
         return [
             {
                 "entity_type": result.entity_type,
@@ -47,8 +59,25 @@ class PrivacyScanner:
             for result in results
         ]
 
+    def scan_text(self, text: str) -> list:
+        """Scan text for privacy information"""
+
+        results = self.__analyze_text(text)
+
+        return self.__to_scan_results(text, results)
+
+    def scan_texts(self, texts: list) -> list:
+        """Scan a list of texts, returning one scan_text style result per text"""
+
+        return [
+            self.__to_scan_results(text, results)
+            for text, results in zip(texts, self.__analyze_texts(texts))
+        ]
+
     def _get_operator_config(self, method):
         """Get operator config for anonymization method"""
+        from presidio_anonymizer.entities import OperatorConfig
+
         if method in ("replace", "redact", "keep"):
             return OperatorConfig(method)
         elif method == "mask":
@@ -57,12 +86,30 @@ class PrivacyScanner:
             )
         elif method == "hash":
             return OperatorConfig(method, {"hash_type": "sha256"})
-        # TODO: Once the key handler is enabled, uncomment below line
-        # elif method in ("encrypt", "decrypt"):
-        #     return OperatorConfig(method, {"key": self.encryption_key})
+        elif method == "encrypt":
+            # Encrypted values are wrapped in tokens naming the key that encrypted them
+            return OperatorConfig(
+                "custom", {"lambda": self._require_key_provider().encrypt}
+            )
         else:
             raise ValueError(f"Unsupported anonymization method: {method}")
 
+    def _require_key_provider(self):
+        if self.key_provider is None:
+            raise ValueError(
+                "No encryption keys configured, use -keys, PRIVACY_KEYS_FILE "
+                "or PRIVACY_KEY_<ID> variables"
+            )
+        return self.key_provider
+
+    def deanonymize_text(self, text: str) -> str:
+        """Decrypt the encrypted spans of a text"""
+        return self._require_key_provider().decrypt_text(text)
+
+    def deanonymize_texts(self, texts: list) -> list:
+        """Decrypt the encrypted spans of a list of texts, each distinct span once"""
+        return self._require_key_provider().decrypt_texts(texts)
+
     def anonymize_text(self, text: str, method: str) -> str:
         """Anonymize text"""
         try:
@@ -70,28 +117,49 @@ class PrivacyScanner:
                 raise ValueError(
                     f"Invalid method: {method}. Must be one of {ANONYMIZATIONMETHOD}"
                 )
+            if method == "decrypt":
+                return self.deanonymize_text(text)
 
             analyzer_results = self.__analyze_text(text)
 
-            if not analyzer_results:
-                return text
+            return self.__anonymize_results(text, analyzer_results, method)
 
-            operator_config = self._get_operator_config(method)
-            # print(operator_config)
+        except Exception as e:
+            raise RuntimeError(f"Failed to anonymize text: {str(e)}")
 
-            anonymizer_operator_config = {
-                entity_type: operator_config
-                for entity_type in set(
-                    result.entity_type for result in analyzer_results
+    def anonymize_texts(self, texts: list, method: str) -> list:
+        """Anonymize a list of texts, returning one anonymized string per text"""
+        try:
+            if method not in ANONYMIZATIONMETHOD:
+                raise ValueError(
+                    f"Invalid method: {method}. Must be one of {ANONYMIZATIONMETHOD}"
                 )
-            }
-            # print(anonymizer_operator_config)
+            if method == "decrypt":
+                return self.deanonymize_texts(texts)
 
-            return self.anonymizer_engine.anonymize(
-                text=text,
-                analyzer_results=analyzer_results,
-                operators=anonymizer_operator_config,
-            ).text
+            return [
+                self.__anonymize_results(text, analyzer_results, method)
+                for text, analyzer_results in zip(texts, self.__analyze_texts(texts))
+            ]
 
         except Exception as e:
-            raise RuntimeError(f"Failed to anonymize text: {str(e)}")
+            raise RuntimeError(f"Failed to anonymize texts: {str(e)}")
+
+    def __anonymize_results(self, text: str, analyzer_results: list, method: str):
+        if not analyzer_results:
+            return text
+
+        operator_config = self._get_operator_config(method)
+        # print(operator_config)
+
+        anonymizer_operator_config = {
+            entity_type: operator_config
+            for entity_type in set(result.entity_type for result in analyzer_results)
+        }
+        # print(anonymizer_operator_config)
+
+        return self.anonymizer_engine.anonymize(
+            text=text,
+            analyzer_results=analyzer_results,
+            operators=anonymizer_operator_config,
+        ).text
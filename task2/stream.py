@@ -0,0 +1,149 @@
+import json
+import sys
+from contextlib import contextmanager
+from itertools import islice
+
+DEFAULT_CHUNK_SIZE = 256
+STREAM_FORMATS = ["auto", "text", "jsonl"]
+STREAM_ACTIONS = ["scan", "anonymize", "deanonymize"]
+JSONL_SUFFIXES = (".jsonl", ".ndjson")
+
+
+@contextmanager
+def open_stream(path, mode):
+    """Open a file for streaming, "-" stands for stdin/stdout"""
+    if path == "-":
+        yield sys.stdin if "r" in mode else sys.stdout
+        return
+
+    with open(path, mode, encoding="utf-8") as f:
+        yield f
+
+
+def resolve_format(path, stream_format):
+    """Resolve "auto" to jsonl for .jsonl/.ndjson files and to text otherwise"""
+    if stream_format != "auto":
+        return stream_format
+
+    return "jsonl" if str(path).lower().endswith(JSONL_SUFFIXES) else "text"
+
+
+def read_chunks(lines, chunk_size):
+    """Lazily group lines into lists of at most chunk_size lines"""
+    lines = iter(lines)
+    while True:
+        chunk = list(islice(lines, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class StreamProcessor:
+    """
+    Scans, anonymizes or deanonymizes a line oriented stream through a single long-lived scanner.
+
+    Lines are read lazily and handed to the scanner chunk by chunk, so memory stays
+    bounded by the chunk size regardless of the input size. Plain text lines are
+    processed as a whole; for JSONL records the selected string fields (all string
+    fields by default) are processed and the rest of the record is kept as is.
+    """
+
+    def __init__(self, scanner, action="anonymize", method="replace", fields=None):
+        if action not in STREAM_ACTIONS:
+            raise ValueError(
+                f"Invalid action: {action}. Must be one of {STREAM_ACTIONS}"
+            )
+
+        self.scanner = scanner
+        self.action = action
+        self.method = method
+        self.fields = fields
+        self.lines_processed = 0
+
+    def process(self, input_file, output_file, stream_format, chunk_size):
+        """Process every line of input_file, writing results incrementally"""
+        for chunk in read_chunks(input_file, chunk_size):
+            output_lines = self.process_chunk(
+                chunk, stream_format, self.lines_processed + 1
+            )
+            self.lines_processed += len(chunk)
+
+            output_file.writelines(line + "\n" for line in output_lines)
+            output_file.flush()
+
+        return self.lines_processed
+
+    def process_chunk(self, chunk, stream_format, first_line):
+        """Process one chunk of raw lines, first_line is the line number of chunk[0]"""
+        if stream_format == "jsonl":
+            return self.process_jsonl_chunk(chunk, first_line)
+        return self.process_text_chunk(chunk, first_line)
+
+    def process_texts(self, texts):
+        if self.action == "scan":
+            return self.scanner.scan_texts(texts)
+        if self.action == "deanonymize":
+            return self.scanner.deanonymize_texts(texts)
+        return self.scanner.anonymize_texts(texts, self.method)
+
+    def process_text_chunk(self, chunk, first_line=1):
+        texts = [line.rstrip("\r\n") for line in chunk]
+        results = self.process_texts(texts)
+
+        if self.action != "scan":
+            return results
+
+        return [
+            json.dumps({"line": first_line + index, "entities": result})
+            for index, result in enumerate(results)
+        ]
+
+    def process_jsonl_chunk(self, chunk, first_line=1):
+        records = []
+        texts = []
+        targets = []
+        for index, line in enumerate(chunk):
+            if not line.strip():
+                records.append(None)
+                continue
+
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Line {first_line + index}: invalid JSON: {str(e)}")
+
+            records.append(record)
+            if not isinstance(record, dict):
+                continue
+
+            for field, value in record.items():
+                if isinstance(value, str) and (not self.fields or field in self.fields):
+                    targets.append((index, field))
+                    texts.append(value)
+
+        results = self.process_texts(texts) if texts else []
+
+        entities = [{} for _ in records]
+        for (record_index, field), result in zip(targets, results):
+            if self.action == "scan":
+                entities[record_index][field] = result
+            else:
+                records[record_index][field] = result
+
+        output_lines = []
+        for record_index, record in enumerate(records):
+            if record is None:
+                output_lines.append("")
+            elif self.action == "scan":
+                output_lines.append(
+                    json.dumps(
+                        {
+                            "line": first_line + record_index,
+                            "entities": entities[record_index],
+                        }
+                    )
+                )
+            else:
+                output_lines.append(json.dumps(record, ensure_ascii=False))
+
+        return output_lines
@@ -0,0 +1,78 @@
+import os
+import threading
+import pytest
+from task2 import daemon
+from task2.daemon import DaemonUnavailable, ScannerDaemon, create_server, send_request
+
+
+class EchoScanner:
+    def __init__(self, config, keys_path):
+        self.config = config
+
+    def scan_text(self, text):
+        return [{"text": text, "config": self.config}]
+
+    def anonymize_text(self, text, method):
+        return f"{method}:{text}"
+
+
+@pytest.fixture
+def running_daemon(tmp_path):
+    socket_path = str(tmp_path / "daemon.sock")
+    server = create_server(socket_path, ScannerDaemon(EchoScanner))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield socket_path
+    server.shutdown()
+    server.server_close()
+
+def test_daemon_answers_requests_over_the_socket(running_daemon):
+    socket_path = running_daemon
+
+    assert send_request({"action": "ping"}, socket_path) == "pong"
+    assert send_request({"action": "scan", "text": "hi"}, socket_path) == [{"text": "hi", "config": None}]
+    assert send_request({"action": "anonymize", "text": "hi", "method": "mask"}, socket_path) == "mask:hi"
+    with pytest.raises(RuntimeError, match="Invalid action"):
+        send_request({"action": "shred", "text": "hi"}, socket_path)
+    with pytest.raises(DaemonUnavailable):
+        send_request({"action": "ping"}, socket_path + ".missing")
+
+def test_client_refuses_a_daemon_of_another_user(running_daemon, monkeypatch, capsys):
+    socket_path = running_daemon
+    uid = os.getuid()
+    monkeypatch.setattr(daemon.os, "getuid", lambda: uid + 1)
+
+    with pytest.raises(DaemonUnavailable, match="another user"):
+        send_request({"action": "scan", "text": "secret"}, socket_path)
+    assert "another user" in capsys.readouterr().err
+
+def test_scanners_follow_config_changes_and_missing_configs(tmp_path):
+    built = []
+    scanner_daemon = ScannerDaemon(lambda config, keys_path: built.append(config) or EchoScanner(config, keys_path))
+    config = tmp_path / "config.json"
+
+    missing = scanner_daemon.get_scanner(str(config))
+    config.write_text("{}")
+    created = scanner_daemon.get_scanner(str(config))
+    assert scanner_daemon.get_scanner(str(config)) is created
+    os.utime(config, ns=(0, os.stat(config).st_mtime_ns + 10**9))
+    reloaded = scanner_daemon.get_scanner(str(config))
+
+    assert len({id(missing), id(created), id(reloaded)}) == 3
+    assert built == [str(config)] * 3
+    assert list(scanner_daemon.scanners.values()) == [reloaded]
+
+def test_default_socket_lives_in_a_private_directory(tmp_path, monkeypatch):
+    monkeypatch.delenv(daemon.SOCKET_ENV, raising=False)
+    monkeypatch.setenv(daemon.RUNTIME_DIR_ENV, str(tmp_path))
+    assert daemon.default_socket_path() == str(tmp_path / "privacy_tool_task2.sock")
+
+    monkeypatch.delenv(daemon.RUNTIME_DIR_ENV)
+    assert os.path.basename(daemon.default_socket_dir()) == f"privacy_tool_{os.getuid()}"
+
+    private = tmp_path / "private"
+    daemon.ensure_private_dir(str(private))
+    assert os.stat(private).st_mode & 0o777 == 0o700
+    private.chmod(0o755)
+    with pytest.raises(RuntimeError, match="only accessible"):
+        daemon.ensure_private_dir(str(private))
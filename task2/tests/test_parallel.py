@@ -0,0 +1,48 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+TASK2 = Path(__file__).resolve().parent.parent
+
+
+def run_cli(*args):
+    return subprocess.run([sys.executable, "privacy_tool.py", *map(str, args)], cwd=TASK2, capture_output=True, text=True, timeout=120)
+
+
+def test_parallel_workers_keep_input_order(tmp_path):
+    records = [{"id": index, "note": f"mail user{index}@example.com" if index % 3 else "nothing here"} for index in range(40)]
+    source = tmp_path / "input.jsonl"
+    source.write_text("".join(json.dumps(record) + "\n" for record in records))
+
+    outputs = []
+    for workers in (1, 3):
+        output = tmp_path / f"output_{workers}.jsonl"
+        result = run_cli("-input", source, "-output", output, "-workers", workers, "-chunk-size", 1, "-fields", "note", "-no-daemon")
+        assert result.returncode == 0, result.stdout + result.stderr
+        outputs.append(output.read_text())
+
+    assert outputs[0] == outputs[1]
+    anonymized = [json.loads(line) for line in outputs[1].splitlines()]
+    assert [record["id"] for record in anonymized] == list(range(40))
+    assert anonymized[1]["note"] == "mail <EMAIL_ADDRESS>" and anonymized[3]["note"] == "nothing here"
+
+def test_parallel_workers_report_invalid_lines(tmp_path):
+    source = tmp_path / "input.jsonl"
+    source.write_text('{"note": "a@example.com"}\n{"note": "b"}\nnot json\n{"note": "c"}\n')
+
+    result = run_cli("-input", source, "-output", tmp_path / "output.jsonl", "-workers", 2, "-chunk-size", 1, "-no-daemon")
+
+    assert result.returncode == 1
+    assert "Error: Line 3: invalid JSON" in result.stdout
+
+def test_parallel_workers_fail_fast_on_an_invalid_config(tmp_path):
+    source = tmp_path / "input.jsonl"
+    source.write_text('{"note": "a@example.com"}\n')
+    config = tmp_path / "config.json"
+    config.write_text(json.dumps({"recognizers": {"UnknownRecognizer": True}}))
+
+    result = run_cli("-input", source, "-output", tmp_path / "output.jsonl", "-workers", 2, "-config", config, "-no-daemon")
+
+    assert result.returncode == 1
+    assert "Error: Unknown recognizer: UnknownRecognizer" in result.stdout
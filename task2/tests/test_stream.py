@@ -0,0 +1,60 @@
+import io
+import json
+import pytest
+from task2.stream import StreamProcessor, read_chunks, resolve_format
+
+
+class UpperScanner:
+    """Anonymizes by upper-casing and finds one entity per '@'"""
+
+    def __init__(self):
+        self.calls = []
+
+    def anonymize_texts(self, texts, method):
+        self.calls.append(list(texts))
+        return [text.upper() for text in texts]
+
+    def scan_texts(self, texts):
+        self.calls.append(list(texts))
+        return [[{"entity_type": "EMAIL_ADDRESS"}] * text.count("@") for text in texts]
+
+
+def test_jsonl_only_processes_the_selected_string_fields():
+    scanner = UpperScanner()
+    processor = StreamProcessor(scanner, fields=["note", "n"])
+    chunk = ['{"note": "a@b.c", "n": 3, "other": "keep"}\n', "\n", "[1, 2]\n", '{"other": "x"}\n']
+
+    lines = processor.process_chunk(chunk, "jsonl", 1)
+
+    assert [json.loads(line) if line else line for line in lines] == [{"note": "A@B.C", "n": 3, "other": "keep"}, "", [1, 2], {"other": "x"}]
+    assert scanner.calls == [["a@b.c"]]
+
+def test_jsonl_scan_reports_entities_per_field_and_line():
+    processor = StreamProcessor(UpperScanner(), action="scan")
+
+    lines = processor.process_chunk(['{"a": "x@y.z", "b": "none"}\n', "\n", '{"a": 1}\n'], "jsonl", 7)
+
+    assert [json.loads(line) for line in lines if line] == [
+        {"line": 7, "entities": {"a": [{"entity_type": "EMAIL_ADDRESS"}], "b": []}},
+        {"line": 9, "entities": {}},
+    ]
+
+def test_invalid_json_lines_name_their_line_number():
+    processor = StreamProcessor(UpperScanner())
+    output = io.StringIO()
+
+    with pytest.raises(ValueError, match="Line 3: invalid JSON"):
+        processor.process(io.StringIO('{"a": "x"}\n{"a": "y"}\nnot json\n'), output, "jsonl", 2)
+    assert output.getvalue() == '{"a": "X"}\n{"a": "Y"}\n'
+
+def test_text_streams_keep_order_and_line_numbers_across_chunks():
+    scanner = UpperScanner()
+    output = io.StringIO()
+
+    lines = StreamProcessor(scanner, action="scan").process(io.StringIO("a@b\nnone\r\nc@d@e\n"), output, "text", 2)
+
+    assert lines == 3
+    assert [json.loads(line)["line"] for line in output.getvalue().splitlines()] == [1, 2, 3]
+    assert scanner.calls == [["a@b", "none"], ["c@d@e"]]
+    assert list(read_chunks(iter("abcde"), 2)) == [["a", "b"], ["c", "d"], ["e"]]
+    assert (resolve_format("x.NDJSON", "auto"), resolve_format("x.txt", "auto"), resolve_format("x.jsonl", "text")) == ("jsonl", "text", "text")
@@ -1,15 +1,148 @@
+# ruff: noqa: E402
+# The import timer has to start before the heavy imports below, so they follow it
+import time
+
+IMPORT_STARTED: float = time.perf_counter()
+
+import hmac
+import os
+from abc import ABCMeta, abstractmethod
 from http import HTTPStatus
-from typing import Dict, Any, Tuple
-from flask import Flask, request
+from typing import Dict, Any, List, Optional, Tuple
+from flask import Flask, Response, request
 from flask_restful import Resource, Api
 from dataclasses import dataclass
 
-from scanner import PrivacyScanner, DEFAULT_OPERATOR_CONFIG, PrivacyScannerError
+from config_schema import ANALYSIS_SETTINGS, AnalysisOptions
+from incremental import TextEdit
+from key_provider import load_key_provider
+from mapping_store import open_mapping_store
+from metrics import STARTUP_SECONDS, collect_timings, metrics_registry, timed
+from nlp_engine import DEFAULT_BATCH_SIZE
+from result_cache import ResultCache
+from scanner import DEFAULT_OPERATOR_CONFIG, PrivacyScannerError
+from scanner_pool import ScannerPool
+from structured import StructuredAnonymizer, anonymize_csv_text
 
 DEBUG_MODE: bool = True
+SCANNER_POOL_MAX_ENTRIES: int = 8
+MAX_BATCH_ITEMS: int = 1000
+MAX_BATCH_SIZE: int = 256
+MAX_STRUCTURED_RECORDS: int = 10_000
+RESULT_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+RESULT_CACHE_TTL_SECONDS: float = 300.0
+# SQLite file of the pseudonymize method's tokens, None keeps them in memory. The
+# file's digests are keyed with the PRIVACY_MAPPING_SECRET environment variable
+MAPPING_STORE_PATH: Optional[str] = None
+# Values the in-memory store of the server remembers, the least recently used ones
+# get new tokens, None for no limit. Set MAPPING_STORE_PATH to keep every token
+MAPPING_STORE_MAX_ENTRIES: Optional[int] = 100_000
+# JSON keys file of the encrypt method and /deanonymize, None falls back to the
+# PRIVACY_KEYS_FILE and PRIVACY_KEY_<ID> environment variables
+ENCRYPTION_KEYS_PATH: Optional[str] = None
+# Bearer token /deanonymize requires, the endpoint answers 401 to everyone while unset
+DEANONYMIZE_TOKEN: Optional[str] = os.environ.get("PRIVACY_DEANONYMIZE_TOKEN")
+AUTHORIZATION_HEADER: str = "Authorization"
+TIMINGS_HEADER: str = "X-Debug-Timings"
+METRICS_CONTENT_TYPE: str = "text/plain; version=0.0.4; charset=utf-8"
+WARM_UP_ON_STARTUP: bool = True
+# Configs whose scanners are built before serving traffic, None is the default config
+WARM_UP_CONFIGS: List[Optional[str]] = [None]
 
 app = Flask(__name__)
 api = Api(app)
+result_cache = ResultCache(
+    max_bytes=RESULT_CACHE_MAX_BYTES, ttl_seconds=RESULT_CACHE_TTL_SECONDS
+)
+mapping_store = open_mapping_store(
+    MAPPING_STORE_PATH, max_entries=MAPPING_STORE_MAX_ENTRIES
+)
+key_provider = load_key_provider(ENCRYPTION_KEYS_PATH)
+if key_provider is not None:
+    # Outputs encrypted with the previous key must not be served after a rotation
+    key_provider.on_rotate(result_cache.clear)
+scanner_pool = ScannerPool(
+    max_entries=SCANNER_POOL_MAX_ENTRIES,
+    result_cache=result_cache,
+    mapping_store=mapping_store,
+    key_provider=key_provider,
+)
+
+REQUESTS_TOTAL = metrics_registry.counter(
+    "privacy_api_requests_total",
+    "Requests served, by endpoint and status code",
+    ("endpoint", "status"),
+)
+REQUEST_SECONDS = metrics_registry.histogram(
+    "privacy_api_request_seconds",
+    "Time spent handling requests, by endpoint",
+    ("endpoint",),
+)
+SCANNER_POOL_STATS = metrics_registry.gauge(
+    "privacy_scanner_pool", "Scanner pool statistics", ("stat",)
+)
+RESULT_CACHE_STATS = metrics_registry.gauge(
+    "privacy_result_cache", "Result cache statistics", ("stat",)
+)
+
+
+startup: Dict[str, Optional[float]] = {
+    "import_seconds": None,
+    "warm_up_seconds": None,
+}
+
+
+def record_startup(phase: str, seconds: float) -> None:
+    startup[f"{phase}_seconds"] = seconds
+    STARTUP_SECONDS.set(seconds, phase=phase)
+
+
+def warm_up(configs: List[Optional[str]] = WARM_UP_CONFIGS) -> float:
+    """
+    Build and exercise the scanners of the given configs so that the spaCy model, the
+    recognizers and the anonymizer are loaded before the first request.
+
+    Returns:
+        float: The warm-up duration in seconds, also reported by /stats and /metrics.
+    """
+    started = time.perf_counter()
+    scanner_pool.warm_up(configs)
+    seconds = time.perf_counter() - started
+    record_startup("warm_up", seconds)
+    print(f"Warm-up finished in {seconds:.2f}s")
+    return seconds
+
+
+def render_metrics() -> str:
+    """Render every metric, refreshing the scanner pool and result cache gauges first"""
+    for gauge, stats in (
+        (SCANNER_POOL_STATS, scanner_pool.stats()),
+        (RESULT_CACHE_STATS, result_cache.stats()),
+    ):
+        for stat, value in stats.items():
+            if value is not None:
+                gauge.set(value, stat=stat)
+    return metrics_registry.render()
+
+
+def timings_requested(header_value: Optional[str]) -> bool:
+    """Whether the debug header asks for a timings block in the response"""
+    return header_value is not None and header_value.strip().lower() not in (
+        "",
+        "0",
+        "false",
+        "no",
+    )
+
+
+def bearer_token_matches(header_value: Optional[str], token: Optional[str]) -> bool:
+    """Whether an Authorization header carries the bearer token, never when no token is set"""
+    if not token or not header_value:
+        return False
+    scheme, _, credentials = header_value.strip().partition(" ")
+    return scheme.lower() == "bearer" and hmac.compare_digest(
+        credentials.strip().encode("utf-8"), token.encode("utf-8")
+    )
 
 
 @dataclass
@@ -54,6 +187,160 @@ class PrivacyToolBase(Resource):
 
         return True, None
 
+    def _validate_batch_input(
+        self, json_data: Dict[str, Any], required_field: str
+    ) -> Tuple[bool, APIResponse]:
+        """Validate batch input data, individual items are validated by the scanner"""
+        if not json_data:
+            return False, APIResponse(
+                message="No JSON data provided", status_code=HTTPStatus.BAD_REQUEST
+            )
+
+        if required_field not in json_data:
+            return False, APIResponse(
+                message=f"Missing required field: {required_field}",
+                status_code=HTTPStatus.BAD_REQUEST,
+            )
+
+        texts = json_data[required_field]
+        if not texts or not isinstance(texts, list):
+            return False, APIResponse(
+                message=f"Invalid or empty {required_field} field, expected a list of texts",
+                status_code=HTTPStatus.BAD_REQUEST,
+            )
+
+        if len(texts) > MAX_BATCH_ITEMS:
+            return False, APIResponse(
+                message=f"Too many items in {required_field}: {len(texts)}. Maximum is {MAX_BATCH_ITEMS}",
+                status_code=HTTPStatus.BAD_REQUEST,
+            )
+
+        return self._validate_batch_size(json_data)
+
+    def _validate_batch_size(
+        self, json_data: Dict[str, Any]
+    ) -> Tuple[bool, APIResponse]:
+        batch_size = json_data.get("batch_size", DEFAULT_BATCH_SIZE)
+        if (
+            not isinstance(batch_size, int)
+            or isinstance(batch_size, bool)
+            or not 0 < batch_size <= MAX_BATCH_SIZE
+        ):
+            return False, APIResponse(
+                message=f"Invalid batch_size: {batch_size}. Must be an integer between 1 and {MAX_BATCH_SIZE}",
+                status_code=HTTPStatus.BAD_REQUEST,
+            )
+
+        return True, None
+
+    def _get_analysis_options(
+        self, json_data: Dict[str, Any]
+    ) -> Tuple[Optional[AnalysisOptions], APIResponse]:
+        """Parse the score_threshold, entities and max_entities fields of a request"""
+        try:
+            options = AnalysisOptions.from_dict(
+                {
+                    name: json_data[name]
+                    for name in ANALYSIS_SETTINGS
+                    if json_data.get(name) is not None
+                }
+            )
+        except ValueError as e:
+            return None, APIResponse(message=str(e), status_code=HTTPStatus.BAD_REQUEST)
+        return options, None
+
+    def _use_cache(self, json_data: Dict[str, Any]) -> bool:
+        """Requests can opt out of the result cache with "cache": false"""
+        return json_data.get("cache", True) is not False
+
+    def _batch_response(self, items: List[Dict[str, Any]]) -> Dict[str, Any]:
+        return APIResponse(
+            message="Success",
+            data={
+                "results": items,
+                "failed": sum(1 for item in items if "error" in item),
+            },
+        ).to_dict()
+
+
+class EndpointMeta(ABCMeta, type(Resource)):
+    """Lets endpoints declare abstract methods whatever metaclass Resource has"""
+
+
+class PrivacyToolEndpoint(PrivacyToolBase, metaclass=EndpointMeta):
+    """
+    Base class for POST endpoints, the JSON body is handled by `process`. Endpoints with
+    `requires_auth` only process requests carrying their bearer token.
+    """
+
+    requires_auth: bool = False
+
+    def post(self) -> Dict[str, Any]:
+        try:
+            json_data = request.get_json(force=True)
+        except Exception as e:
+            return APIResponse(
+                message=f"Internal server error: {str(e)}",
+                status_code=HTTPStatus.INTERNAL_SERVER_ERROR,
+            ).to_dict(), HTTPStatus.INTERNAL_SERVER_ERROR
+
+        return self.handle(
+            json_data,
+            request.path,
+            include_timings=timings_requested(request.headers.get(TIMINGS_HEADER)),
+            authorization=request.headers.get(AUTHORIZATION_HEADER),
+        )
+
+    def required_token(self) -> Optional[str]:
+        """Bearer token the endpoint requires, None for endpoints open to everyone"""
+        return None
+
+    def handle(
+        self,
+        json_data: Dict[str, Any],
+        endpoint: str,
+        include_timings: bool = False,
+        authorization: Optional[str] = None,
+    ) -> Tuple[Dict[str, Any], int]:
+        """
+        Check the credentials, process the request body and record request metrics.
+
+        Args:
+            json_data (dict): The parsed request body.
+            endpoint (str): Path of the endpoint, used as the metrics label.
+            include_timings (bool): Whether to add a per-stage `timings` block to the response.
+            authorization (str): The Authorization header of the request, if any.
+
+        Returns:
+            tuple: The response body and its status code.
+        """
+        with collect_timings() as timings:
+            if self.requires_auth and not bearer_token_matches(
+                authorization, self.required_token()
+            ):
+                response = (
+                    APIResponse(
+                        message="Unauthorized", status_code=HTTPStatus.UNAUTHORIZED
+                    ).to_dict(),
+                    HTTPStatus.UNAUTHORIZED,
+                )
+            else:
+                response = self.process(json_data)
+        elapsed = time.perf_counter() - timings.started
+
+        body, status = (
+            response if isinstance(response, tuple) else (response, HTTPStatus.OK)
+        )
+        REQUESTS_TOTAL.inc(endpoint=endpoint, status=int(status))
+        REQUEST_SECONDS.observe(elapsed, endpoint=endpoint)
+        if include_timings:
+            body["timings"] = timings.to_dict()
+        return body, status
+
+    @abstractmethod
+    def process(self, json_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Handle the request body, shared by the WSGI and ASGI apps"""
+
 
 class PrivacyToolHome(PrivacyToolBase):
     """Welcome endpoint"""
@@ -64,19 +351,46 @@ class PrivacyToolHome(PrivacyToolBase):
         ).to_dict()
 
 
-class PrivacyToolScanner(PrivacyToolBase):
+class PrivacyToolStats(PrivacyToolBase):
+    """Cache statistics endpoint"""
+
+    def get(self) -> Dict[str, Any]:
+        return APIResponse(
+            message="Success",
+            data={
+                "scanner_pool": scanner_pool.stats(),
+                "result_cache": result_cache.stats(),
+                "mapping_store": mapping_store.stats(),
+                "startup": startup,
+            },
+        ).to_dict()
+
+
+class PrivacyToolMetrics(PrivacyToolBase):
+    """Prometheus metrics endpoint"""
+
+    def get(self) -> Response:
+        return Response(render_metrics(), content_type=METRICS_CONTENT_TYPE)
+
+
+class PrivacyToolScanner(PrivacyToolEndpoint):
     """Scanner endpoint"""
 
-    def post(self) -> Dict[str, Any]:
+    def process(self, json_data: Dict[str, Any]) -> Dict[str, Any]:
         try:
-            json_data = request.get_json(force=True)
             is_valid, error_response = self._validate_input(json_data, "scan")
             if not is_valid:
                 return error_response.to_dict(), error_response.status_code
 
+            options, error_response = self._get_analysis_options(json_data)
+            if error_response:
+                return error_response.to_dict(), error_response.status_code
+
             config = json_data.get("config")
-            privacy_scanner = PrivacyScanner(config)
-            result = privacy_scanner.scan_text(json_data["scan"])
+            privacy_scanner = scanner_pool.get_scanner(config)
+            result = privacy_scanner.scan_text(
+                json_data["scan"], use_cache=self._use_cache(json_data), options=options
+            )
 
             return APIResponse(message="Success", data={"entities": result}).to_dict()
 
@@ -91,7 +405,7 @@ class PrivacyToolScanner(PrivacyToolBase):
             ).to_dict(), HTTPStatus.INTERNAL_SERVER_ERROR
 
 
-class PrivacyToolAnonymize(PrivacyToolBase):
+class PrivacyToolAnonymize(PrivacyToolEndpoint):
     """Anonymization endpoint"""
 
     def _validate_method(self, method: str) -> Tuple[bool, APIResponse]:
@@ -103,9 +417,8 @@ class PrivacyToolAnonymize(PrivacyToolBase):
             )
         return True, None
 
-    def post(self) -> Dict[str, Any]:
+    def process(self, json_data: Dict[str, Any]) -> Dict[str, Any]:
         try:
-            json_data = request.get_json(force=True)
             is_valid, error_response = self._validate_input(json_data, "anonymize")
             if not is_valid:
                 return error_response.to_dict(), error_response.status_code
@@ -115,10 +428,17 @@ class PrivacyToolAnonymize(PrivacyToolBase):
             if not is_valid_method:
                 return error_response.to_dict(), error_response.status_code
 
+            options, error_response = self._get_analysis_options(json_data)
+            if error_response:
+                return error_response.to_dict(), error_response.status_code
+
             config = json_data.get("config")
-            privacy_scanner = PrivacyScanner(config)
+            privacy_scanner = scanner_pool.get_scanner(config)
             anonymized_text, entities = privacy_scanner.anonymize_text(
-                json_data["anonymize"], method
+                json_data["anonymize"],
+                method,
+                use_cache=self._use_cache(json_data),
+                options=options,
             )
 
             return APIResponse(
@@ -137,9 +457,403 @@ class PrivacyToolAnonymize(PrivacyToolBase):
             ).to_dict(), HTTPStatus.INTERNAL_SERVER_ERROR
 
 
+class PrivacyToolProcess(PrivacyToolAnonymize):
+    """Combined scan and anonymization endpoint, analyzing the text once"""
+
+    def process(self, json_data: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            is_valid, error_response = self._validate_input(json_data, "process")
+            if not is_valid:
+                return error_response.to_dict(), error_response.status_code
+
+            method = str(json_data.get("method", "replace")).lower()
+            is_valid_method, error_response = self._validate_method(method)
+            if not is_valid_method:
+                return error_response.to_dict(), error_response.status_code
+
+            options, error_response = self._get_analysis_options(json_data)
+            if error_response:
+                return error_response.to_dict(), error_response.status_code
+
+            config = json_data.get("config")
+            privacy_scanner = scanner_pool.get_scanner(config)
+            result = privacy_scanner.process_text(
+                json_data["process"],
+                method,
+                include_operator_results=json_data.get("operator_results") is True,
+                use_cache=self._use_cache(json_data),
+                options=options,
+            )
+
+            return APIResponse(message="Success", data=result).to_dict()
+
+        except PrivacyScannerError as e:
+            return APIResponse(
+                message=str(e), status_code=HTTPStatus.BAD_REQUEST
+            ).to_dict(), HTTPStatus.BAD_REQUEST
+        except Exception as e:
+            return APIResponse(
+                message=f"Internal server error: {str(e)}",
+                status_code=HTTPStatus.INTERNAL_SERVER_ERROR,
+            ).to_dict(), HTTPStatus.INTERNAL_SERVER_ERROR
+
+
+class PrivacyToolBatchScanner(PrivacyToolEndpoint):
+    """Batch scanner endpoint"""
+
+    def process(self, json_data: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            is_valid, error_response = self._validate_batch_input(json_data, "scan")
+            if not is_valid:
+                return error_response.to_dict(), error_response.status_code
+
+            options, error_response = self._get_analysis_options(json_data)
+            if error_response:
+                return error_response.to_dict(), error_response.status_code
+
+            config = json_data.get("config")
+            privacy_scanner = scanner_pool.get_scanner(config)
+            items = privacy_scanner.scan_batch(
+                json_data["scan"],
+                json_data.get("batch_size", DEFAULT_BATCH_SIZE),
+                options=options,
+            )
+
+            return self._batch_response(items)
+
+        except PrivacyScannerError as e:
+            return APIResponse(
+                message=str(e), status_code=HTTPStatus.BAD_REQUEST
+            ).to_dict(), HTTPStatus.BAD_REQUEST
+        except Exception as e:
+            return APIResponse(
+                message=f"Internal server error: {str(e)}",
+                status_code=HTTPStatus.INTERNAL_SERVER_ERROR,
+            ).to_dict(), HTTPStatus.INTERNAL_SERVER_ERROR
+
+
+class PrivacyToolIncrementalScanner(PrivacyToolEndpoint):
+    """Incremental scan endpoint, analyzing again only the part of a document that was edited"""
+
+    def _get_edit(
+        self, json_data: Dict[str, Any], has_previous: bool
+    ) -> Tuple[Optional[str], Optional[TextEdit], APIResponse]:
+        """Return the edited text or the edit, exactly one of them is expected"""
+        text, edit = json_data.get("scan"), json_data.get("edit")
+        if (text is None) == (edit is None) or (edit is not None and not has_previous):
+            return (
+                None,
+                None,
+                APIResponse(
+                    message="Expected either 'scan' with the full text or 'edit' with a previous scan",
+                    status_code=HTTPStatus.BAD_REQUEST,
+                ),
+            )
+        if text is not None:
+            if not isinstance(text, str):
+                return (
+                    None,
+                    None,
+                    APIResponse(
+                        message="Invalid scan field",
+                        status_code=HTTPStatus.BAD_REQUEST,
+                    ),
+                )
+            return text, None, None
+        try:
+            return None, TextEdit.from_dict(edit), None
+        except ValueError as e:
+            return (
+                None,
+                None,
+                APIResponse(message=str(e), status_code=HTTPStatus.BAD_REQUEST),
+            )
+
+    def process(self, json_data: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            if not json_data:
+                return APIResponse(
+                    message="No JSON data provided", status_code=HTTPStatus.BAD_REQUEST
+                ).to_dict(), HTTPStatus.BAD_REQUEST
+
+            previous = json_data.get("previous")
+            if previous is not None and not isinstance(previous, dict):
+                return APIResponse(
+                    message="Invalid previous field, expected its text and entities",
+                    status_code=HTTPStatus.BAD_REQUEST,
+                ).to_dict(), HTTPStatus.BAD_REQUEST
+            has_previous = previous is not None or json_data.get("handle") is not None
+
+            text, edit, error_response = self._get_edit(json_data, has_previous)
+            if error_response:
+                return error_response.to_dict(), error_response.status_code
+
+            options, error_response = self._get_analysis_options(json_data)
+            if error_response:
+                return error_response.to_dict(), error_response.status_code
+
+            config = json_data.get("config")
+            privacy_scanner = scanner_pool.get_scanner(config)
+            if json_data.get("handle") is not None:
+                previous_text, previous_entities = privacy_scanner.recall_scan(
+                    json_data["handle"], options
+                )
+            elif previous is not None:
+                previous_text = previous.get("text")
+                previous_entities = previous.get("entities")
+                if not isinstance(previous_text, str):
+                    return APIResponse(
+                        message="Invalid previous text",
+                        status_code=HTTPStatus.BAD_REQUEST,
+                    ).to_dict(), HTTPStatus.BAD_REQUEST
+
+            if has_previous:
+                text, entities = privacy_scanner.rescan_text(
+                    previous_text, previous_entities, text, edit, options
+                )
+            else:
+                entities = privacy_scanner.scan_text(text, options=options)
+
+            data = {"entities": entities}
+            if self._use_cache(json_data):
+                handle = privacy_scanner.remember_scan(text, entities, options)
+                if handle is not None:
+                    data["handle"] = handle
+
+            return APIResponse(message="Success", data=data).to_dict()
+
+        except PrivacyScannerError as e:
+            return APIResponse(
+                message=str(e), status_code=HTTPStatus.BAD_REQUEST
+            ).to_dict(), HTTPStatus.BAD_REQUEST
+        except Exception as e:
+            return APIResponse(
+                message=f"Internal server error: {str(e)}",
+                status_code=HTTPStatus.INTERNAL_SERVER_ERROR,
+            ).to_dict(), HTTPStatus.INTERNAL_SERVER_ERROR
+
+
+class PrivacyToolBatchAnonymize(PrivacyToolAnonymize):
+    """Batch anonymization endpoint"""
+
+    def _get_methods(self, json_data: Dict[str, Any]) -> Tuple[List[str], APIResponse]:
+        """Resolve one method per item from `methods`, falling back to `method`"""
+        default_method = str(json_data.get("method", "replace")).lower()
+        is_valid_method, error_response = self._validate_method(default_method)
+        if not is_valid_method:
+            return None, error_response
+
+        methods = json_data.get("methods")
+        if methods is None:
+            return [default_method] * len(json_data["anonymize"]), None
+
+        if not isinstance(methods, list) or len(methods) != len(json_data["anonymize"]):
+            return None, APIResponse(
+                message="Invalid methods field, expected one method per item",
+                status_code=HTTPStatus.BAD_REQUEST,
+            )
+
+        # Invalid per-item methods are reported by the scanner for that item only
+        return [
+            default_method if method is None else str(method).lower()
+            for method in methods
+        ], None
+
+    def process(self, json_data: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            is_valid, error_response = self._validate_batch_input(
+                json_data, "anonymize"
+            )
+            if not is_valid:
+                return error_response.to_dict(), error_response.status_code
+
+            methods, error_response = self._get_methods(json_data)
+            if error_response:
+                return error_response.to_dict(), error_response.status_code
+
+            options, error_response = self._get_analysis_options(json_data)
+            if error_response:
+                return error_response.to_dict(), error_response.status_code
+
+            config = json_data.get("config")
+            privacy_scanner = scanner_pool.get_scanner(config)
+            items = privacy_scanner.anonymize_batch(
+                json_data["anonymize"],
+                methods,
+                json_data.get("batch_size", DEFAULT_BATCH_SIZE),
+                options=options,
+            )
+
+            return self._batch_response(items)
+
+        except PrivacyScannerError as e:
+            return APIResponse(
+                message=str(e), status_code=HTTPStatus.BAD_REQUEST
+            ).to_dict(), HTTPStatus.BAD_REQUEST
+        except Exception as e:
+            return APIResponse(
+                message=f"Internal server error: {str(e)}",
+                status_code=HTTPStatus.INTERNAL_SERVER_ERROR,
+            ).to_dict(), HTTPStatus.INTERNAL_SERVER_ERROR
+
+
+class PrivacyToolStructuredAnonymize(PrivacyToolAnonymize):
+    """Column-aware anonymization endpoint for CSV documents and lists of records"""
+
+    def _validate_structured_input(
+        self, json_data: Dict[str, Any]
+    ) -> Tuple[bool, APIResponse]:
+        if not json_data:
+            return False, APIResponse(
+                message="No JSON data provided", status_code=HTTPStatus.BAD_REQUEST
+            )
+
+        if "csv" in json_data:
+            if not json_data["csv"] or not isinstance(json_data["csv"], str):
+                return False, APIResponse(
+                    message="Invalid or empty csv field",
+                    status_code=HTTPStatus.BAD_REQUEST,
+                )
+        elif "records" in json_data:
+            records = json_data["records"]
+            if not isinstance(records, list) or not all(
+                isinstance(record, dict) for record in records
+            ):
+                return False, APIResponse(
+                    message="Invalid records field, expected a list of objects",
+                    status_code=HTTPStatus.BAD_REQUEST,
+                )
+            if len(records) > MAX_STRUCTURED_RECORDS:
+                return False, APIResponse(
+                    message=f"Too many records: {len(records)}. Maximum is {MAX_STRUCTURED_RECORDS}",
+                    status_code=HTTPStatus.BAD_REQUEST,
+                )
+        else:
+            return False, APIResponse(
+                message="Missing required field: records or csv",
+                status_code=HTTPStatus.BAD_REQUEST,
+            )
+
+        return self._validate_batch_size(json_data)
+
+    def process(self, json_data: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            is_valid, error_response = self._validate_structured_input(json_data)
+            if not is_valid:
+                return error_response.to_dict(), error_response.status_code
+
+            method = str(json_data.get("method", "replace")).lower()
+            is_valid_method, error_response = self._validate_method(method)
+            if not is_valid_method:
+                return error_response.to_dict(), error_response.status_code
+
+            options, error_response = self._get_analysis_options(json_data)
+            if error_response:
+                return error_response.to_dict(), error_response.status_code
+
+            config = json_data.get("config")
+            privacy_scanner = scanner_pool.get_scanner(config)
+            anonymizer = StructuredAnonymizer(
+                privacy_scanner,
+                method,
+                columns=json_data.get("columns"),
+                batch_size=json_data.get("batch_size", DEFAULT_BATCH_SIZE),
+                options=options,
+            )
+
+            if "csv" in json_data:
+                output, _ = anonymize_csv_text(
+                    anonymizer, json_data["csv"], MAX_STRUCTURED_RECORDS
+                )
+                data = {"csv": output}
+            else:
+                data = {"records": anonymizer.anonymize_batch(json_data["records"])}
+            data["columns"] = {
+                column: plan.to_dict() for column, plan in anonymizer.plans.items()
+            }
+
+            return APIResponse(message="Success", data=data).to_dict()
+
+        except PrivacyScannerError as e:
+            return APIResponse(
+                message=str(e), status_code=HTTPStatus.BAD_REQUEST
+            ).to_dict(), HTTPStatus.BAD_REQUEST
+        except Exception as e:
+            return APIResponse(
+                message=f"Internal server error: {str(e)}",
+                status_code=HTTPStatus.INTERNAL_SERVER_ERROR,
+            ).to_dict(), HTTPStatus.INTERNAL_SERVER_ERROR
+
+
+class PrivacyToolDeanonymize(PrivacyToolEndpoint):
+    """
+    Batch de-anonymization endpoint, decrypting the encrypted spans of each text.
+
+    Only serves requests with the DEANONYMIZE_TOKEN bearer token. A batch with any
+    token that fails to decrypt fails as a whole, with the same error whatever the
+    reason, so that responses tell nothing about the tokens.
+    """
+
+    requires_auth = True
+
+    def required_token(self) -> Optional[str]:
+        return DEANONYMIZE_TOKEN
+
+    def process(self, json_data: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            is_valid, error_response = self._validate_batch_input(
+                json_data, "deanonymize"
+            )
+            if not is_valid:
+                return error_response.to_dict(), error_response.status_code
+
+            if key_provider is None:
+                return APIResponse(
+                    message="No encryption keys are configured",
+                    status_code=HTTPStatus.BAD_REQUEST,
+                ).to_dict(), HTTPStatus.BAD_REQUEST
+
+            items = []
+            # Tokens repeated across the batch are decrypted once
+            decrypted: Dict[str, str] = {}
+            with timed("deanonymize"):
+                for index, text in enumerate(json_data["deanonymize"]):
+                    if not text or not isinstance(text, str):
+                        items.append({"index": index, "error": "Invalid or empty text"})
+                        continue
+                    try:
+                        output = key_provider.decrypt_text(text, decrypted)
+                    except ValueError:
+                        return APIResponse(
+                            message="Invalid encrypted token",
+                            status_code=HTTPStatus.BAD_REQUEST,
+                        ).to_dict(), HTTPStatus.BAD_REQUEST
+                    items.append({"index": index, "deanonymized_output": output})
+
+            return self._batch_response(items)
+
+        except Exception as e:
+            return APIResponse(
+                message=f"Internal server error: {str(e)}",
+                status_code=HTTPStatus.INTERNAL_SERVER_ERROR,
+            ).to_dict(), HTTPStatus.INTERNAL_SERVER_ERROR
+
+
 api.add_resource(PrivacyToolHome, "/")
+api.add_resource(PrivacyToolStats, "/stats")
+api.add_resource(PrivacyToolMetrics, "/metrics")
 api.add_resource(PrivacyToolScanner, "/scan")
 api.add_resource(PrivacyToolAnonymize, "/anonymize")
+api.add_resource(PrivacyToolProcess, "/process")
+api.add_resource(PrivacyToolBatchScanner, "/scan/batch")
+api.add_resource(PrivacyToolIncrementalScanner, "/scan/incremental")
+api.add_resource(PrivacyToolBatchAnonymize, "/anonymize/batch")
+api.add_resource(PrivacyToolStructuredAnonymize, "/anonymize/structured")
+api.add_resource(PrivacyToolDeanonymize, "/deanonymize")
+
+record_startup("import", time.perf_counter() - IMPORT_STARTED)
 
 if __name__ == "__main__":
+    if WARM_UP_ON_STARTUP:
+        warm_up()
     app.run(debug=DEBUG_MODE)
@@ -0,0 +1,295 @@
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+
+from app import (
+    AUTHORIZATION_HEADER,
+    METRICS_CONTENT_TYPE,
+    TIMINGS_HEADER,
+    WARM_UP_ON_STARTUP,
+    APIResponse,
+    PrivacyToolAnonymize,
+    PrivacyToolBatchAnonymize,
+    PrivacyToolBatchScanner,
+    PrivacyToolDeanonymize,
+    PrivacyToolHome,
+    PrivacyToolIncrementalScanner,
+    PrivacyToolMetrics,
+    PrivacyToolProcess,
+    PrivacyToolScanner,
+    PrivacyToolStats,
+    PrivacyToolStructuredAnonymize,
+    render_metrics,
+    timings_requested,
+    warm_up,
+)
+
+INFERENCE_WORKERS: int = 4
+MAX_QUEUED_REQUESTS: int = 32
+REQUEST_TIMEOUT_SECONDS: float = 30.0
+MAX_BODY_BYTES: int = 10 * 1024 * 1024
+RETRY_AFTER_SECONDS: int = 1
+
+GET_ROUTES: Dict[str, Callable] = {
+    "/": PrivacyToolHome,
+    "/stats": PrivacyToolStats,
+    "/metrics": PrivacyToolMetrics,
+}
+POST_ROUTES: Dict[str, Callable] = {
+    "/scan": PrivacyToolScanner,
+    "/anonymize": PrivacyToolAnonymize,
+    "/process": PrivacyToolProcess,
+    "/scan/batch": PrivacyToolBatchScanner,
+    "/scan/incremental": PrivacyToolIncrementalScanner,
+    "/anonymize/batch": PrivacyToolBatchAnonymize,
+    "/anonymize/structured": PrivacyToolStructuredAnonymize,
+    "/deanonymize": PrivacyToolDeanonymize,
+}
+
+
+class InferenceExecutor:
+    """
+    Thread pool for analyzer work with a bound on running plus queued requests.
+
+    Requests beyond `workers + max_queued` are rejected immediately instead of piling
+    up, so a burst turns into fast 429s rather than unbounded tail latency. A slot is
+    only released when the work actually finishes, even if the client timed out.
+
+    Attributes:
+        capacity (int): Maximum number of requests running or waiting
+        in_flight (int): Number of requests currently running or waiting
+        rejected (int): Number of requests turned away because the executor was full
+        timed_out (int): Number of requests that exceeded the request timeout
+    """
+
+    def __init__(
+        self, workers: int = INFERENCE_WORKERS, max_queued: int = MAX_QUEUED_REQUESTS
+    ):
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="inference"
+        )
+        self.capacity = workers + max_queued
+        self.in_flight: int = 0
+        self.rejected: int = 0
+        self.timed_out: int = 0
+        self.closed: bool = False
+
+    def submit(self, fn: Callable, *args: Any) -> Optional[asyncio.Future]:
+        """Schedule fn on the pool, returning None when the executor is full"""
+        # Only touched from the event loop thread, so no lock is needed
+        if self.in_flight >= self.capacity:
+            self.rejected += 1
+            return None
+
+        self.in_flight += 1
+        future = asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        future.add_done_callback(self._release)
+        return future
+
+    def _release(self, _: asyncio.Future) -> None:
+        self.in_flight -= 1
+
+    def shutdown(self) -> None:
+        self.closed = True
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "capacity": self.capacity,
+            "in_flight": self.in_flight,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+        }
+
+
+class PrivacyToolASGI:
+    """
+    ASGI variant of the Privacy Tool API, serving the same resources as app.py.
+
+    Request bodies are parsed on the event loop and the analyzer work runs on a
+    bounded InferenceExecutor. A full executor answers 429 and a shutting down server
+    503, both with a Retry-After header, and requests slower than the timeout answer 504.
+    The scanners of WARM_UP_CONFIGS are built and warmed up during lifespan startup.
+    """
+
+    def __init__(
+        self,
+        workers: int = INFERENCE_WORKERS,
+        max_queued: int = MAX_QUEUED_REQUESTS,
+        request_timeout: float = REQUEST_TIMEOUT_SECONDS,
+        warm_up_on_startup: bool = WARM_UP_ON_STARTUP,
+    ):
+        self.executor = InferenceExecutor(workers, max_queued)
+        self.request_timeout = request_timeout
+        self.warm_up_on_startup = warm_up_on_startup
+
+    async def __call__(self, scope: Dict, receive: Callable, send: Callable) -> None:
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+        elif scope["type"] == "http":
+            body, status, headers = await self._handle(scope, receive)
+            await self._send_response(send, body, status, headers)
+
+    async def _lifespan(self, receive: Callable, send: Callable) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                if self.warm_up_on_startup:
+                    try:
+                        await asyncio.to_thread(warm_up)
+                    except Exception as e:
+                        await send(
+                            {"type": "lifespan.startup.failed", "message": str(e)}
+                        )
+                        return
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                self.executor.shutdown()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _handle(
+        self, scope: Dict, receive: Callable
+    ) -> Tuple[Union[Dict[str, Any], str], int, Dict[str, str]]:
+        method, path = scope["method"], scope["path"].rstrip("/") or "/"
+
+        if method == "GET" and path == "/metrics":
+            return (
+                render_metrics(),
+                HTTPStatus.OK,
+                {"content-type": METRICS_CONTENT_TYPE},
+            )
+
+        if method == "GET" and path in GET_ROUTES:
+            body = GET_ROUTES[path]().get()
+            if path == "/stats":
+                body["executor"] = self.executor.stats()
+            return body, HTTPStatus.OK, {}
+
+        if method != "POST" or path not in POST_ROUTES:
+            if path in GET_ROUTES or path in POST_ROUTES:
+                return self._error("Method not allowed", HTTPStatus.METHOD_NOT_ALLOWED)
+            return self._error("Not found", HTTPStatus.NOT_FOUND)
+
+        body = await self._read_body(receive)
+        if body is None:
+            return self._error(
+                f"Request body exceeds {MAX_BODY_BYTES} bytes",
+                HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+            )
+
+        try:
+            json_data = json.loads(body) if body else None
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            return self._error("Invalid JSON body", HTTPStatus.BAD_REQUEST)
+
+        if self.executor.closed:
+            return self._retry_later(
+                "Server is shutting down", HTTPStatus.SERVICE_UNAVAILABLE
+            )
+
+        include_timings = timings_requested(self._header(scope, TIMINGS_HEADER))
+        future = self.executor.submit(
+            POST_ROUTES[path]().handle,
+            json_data,
+            path,
+            include_timings,
+            self._header(scope, AUTHORIZATION_HEADER),
+        )
+        if future is None:
+            return self._retry_later(
+                "Too many requests in flight, retry later",
+                HTTPStatus.TOO_MANY_REQUESTS,
+            )
+
+        try:
+            # Shielded so a timeout does not release the slot of still running work
+            result = await asyncio.wait_for(
+                asyncio.shield(future), timeout=self.request_timeout
+            )
+        except asyncio.TimeoutError:
+            self.executor.timed_out += 1
+            return self._error(
+                f"Request timed out after {self.request_timeout} seconds",
+                HTTPStatus.GATEWAY_TIMEOUT,
+            )
+        except Exception as e:
+            return self._error(
+                f"Internal server error: {str(e)}", HTTPStatus.INTERNAL_SERVER_ERROR
+            )
+
+        body, status = result
+        return body, status, {}
+
+    @staticmethod
+    def _header(scope: Dict, name: str) -> Optional[str]:
+        name = name.lower().encode("latin-1")
+        for header_name, value in scope.get("headers", []):
+            if header_name.lower() == name:
+                return value.decode("latin-1")
+        return None
+
+    async def _read_body(self, receive: Callable) -> Optional[bytes]:
+        """Read the whole request body, returning None if it exceeds MAX_BODY_BYTES"""
+        chunks = []
+        size = 0
+        while True:
+            message = await receive()
+            chunk = message.get("body", b"")
+            size += len(chunk)
+            if size > MAX_BODY_BYTES:
+                return None
+            chunks.append(chunk)
+            if not message.get("more_body", False):
+                return b"".join(chunks)
+
+    @staticmethod
+    def _error(
+        message: str, status_code: int
+    ) -> Tuple[Dict[str, Any], int, Dict[str, str]]:
+        return (
+            APIResponse(message=message, status_code=status_code).to_dict(),
+            status_code,
+            {},
+        )
+
+    @classmethod
+    def _retry_later(
+        cls, message: str, status_code: int
+    ) -> Tuple[Dict[str, Any], int, Dict[str, str]]:
+        body, status, _ = cls._error(message, status_code)
+        return body, status, {"retry-after": str(RETRY_AFTER_SECONDS)}
+
+    @staticmethod
+    async def _send_response(
+        send: Callable,
+        body: Union[Dict[str, Any], str],
+        status: int,
+        headers: Dict[str, str],
+    ) -> None:
+        """Send a JSON body, or a text body with its content-type in headers"""
+        if isinstance(body, str):
+            payload = body.encode("utf-8")
+        else:
+            payload = json.dumps(body).encode("utf-8")
+            headers = {"content-type": "application/json", **headers}
+
+        response_headers = [
+            (b"content-length", str(len(payload)).encode("latin-1"))
+        ] + [
+            (name.encode("latin-1"), value.encode("latin-1"))
+            for name, value in headers.items()
+        ]
+        await send(
+            {
+                "type": "http.response.start",
+                "status": int(status),
+                "headers": response_headers,
+            }
+        )
+        await send({"type": "http.response.body", "body": payload})
+
+
+app = PrivacyToolASGI()
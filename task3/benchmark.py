@@ -0,0 +1,423 @@
+import argparse
+import json
+import math
+import platform
+import random
+import resource
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from importlib.metadata import PackageNotFoundError, version
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from key_provider import KeyProvider
+from nlp_engine import MODEL_TIERS
+from scanner import DEFAULT_OPERATOR_CONFIG, PrivacyScanner, PrivacyScannerError
+
+REPO_ROOT: Path = Path(__file__).resolve().parent.parent
+CONFIGS: Dict[str, Path] = {
+    "task1": REPO_ROOT / "task1" / "config.json",
+    "task2": REPO_ROOT / "task2" / "config.json",
+    "task3": REPO_ROOT / "task3" / "config.json",
+    "task3_custom": REPO_ROOT / "task3" / "custom_config.json",
+}
+DEFAULT_ITERATIONS: int = 50
+DEFAULT_SEED: int = 1234
+# Outside the working tree, so runs without -output leave no files behind
+DEFAULT_OUTPUT: str = str(Path(tempfile.gettempdir()) / "benchmark_results.json")
+# Config whose NameRecognizer runs on each model tier of a -tiers run
+TIER_CONFIG: Path = CONFIGS["task3"]
+# What NER does not need from the spaCy pipelines, lemmas then come back empty
+NER_ONLY_DISABLE: List[str] = ["tagger", "parser", "attribute_ruler", "lemmatizer"]
+
+FIRST_NAMES = ["John", "Maria", "Wei", "Fatima", "Olga", "Carlos", "Aisha", "Tom"]
+LAST_NAMES = ["Smith", "Garcia", "Chen", "Khan", "Ivanova", "Silva", "Okafor"]
+FILLER_WORDS = (
+    "the meeting was moved to next week so please update the shared calendar and "
+    "let the team know about the new agenda before the review starts"
+).split()
+
+
+def _pii_sentence(rng: random.Random) -> str:
+    first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    return rng.choice(
+        [
+            f"Please contact {first} {last} at {first.lower()}.{last.lower()}@example.com.",
+            f"Call Dr. {last} on 212-555-{rng.randint(1000, 9999)} before noon.",
+            f"{first} moved to zip code {rng.randint(10000, 99999)} last month.",
+        ]
+    )
+
+
+def _filler_sentence(rng: random.Random) -> str:
+    words = rng.sample(FILLER_WORDS, rng.randint(8, 16))
+    return " ".join(words).capitalize() + "."
+
+
+def make_text(rng: random.Random, length: int, pii_ratio: float) -> str:
+    """Build a text of roughly `length` characters where pii_ratio of the sentences hold PII"""
+    sentences = []
+    size = 0
+    while size < length:
+        if rng.random() < pii_ratio:
+            sentence = _pii_sentence(rng)
+        else:
+            sentence = _filler_sentence(rng)
+        sentences.append(sentence)
+        size += len(sentence) + 1
+    return " ".join(sentences)
+
+
+def make_corpora(seed: int = DEFAULT_SEED, size: int = 20) -> Dict[str, List[str]]:
+    """Generate the synthetic corpora, identical for a given seed"""
+    rng = random.Random(seed)
+    shapes = {"chat": 120, "document": 20_000}
+    densities = {"dense": 0.6, "sparse": 0.05}
+    return {
+        f"{shape}_{density}": [make_text(rng, length, ratio) for _ in range(size)]
+        for shape, length in shapes.items()
+        for density, ratio in densities.items()
+    }
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of a non-empty list"""
+    ordered = sorted(values)
+    rank = max(math.ceil(fraction * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process so far, in megabytes"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def current_rss_mb() -> Optional[float]:
+    """Current resident set size of this process in megabytes, None outside Linux"""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            pages = int(f.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+    return pages * resource.getpagesize() / (1024 * 1024)
+
+
+def measure(
+    operation: Callable[[str], Any], texts: List[str], iterations: int
+) -> Dict[str, float]:
+    """Run operation over the texts (cycling) `iterations` times after one warm-up call"""
+    operation(texts[0])
+
+    latencies = []
+    characters = 0
+    started = time.perf_counter()
+    for index in range(iterations):
+        text = texts[index % len(texts)]
+        call_started = time.perf_counter()
+        operation(text)
+        latencies.append(time.perf_counter() - call_started)
+        characters += len(text)
+    elapsed = time.perf_counter() - started
+
+    return {
+        "iterations": iterations,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "mean_ms": sum(latencies) / iterations * 1000,
+        "texts_per_second": iterations / elapsed,
+        "characters_per_second": characters / elapsed,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def _endpoint_operation(client, path: str, payload: Dict[str, Any]) -> Callable:
+    field = path.strip("/")
+
+    def operation(text: str) -> None:
+        response = client.post(path, json={**payload, field: text})
+        if response.status_code != 200:
+            raise RuntimeError(f"{path} returned {response.status_code}")
+
+    return operation
+
+
+def run_benchmarks(
+    configs: Dict[str, Path],
+    corpora: Dict[str, List[str]],
+    methods: List[str],
+    iterations: int,
+    endpoints: bool = True,
+) -> List[Dict[str, Any]]:
+    """Benchmark scan, every anonymization method and the endpoints per config and corpus"""
+    client = None
+    if endpoints:
+        from app import app
+
+        client = app.test_client()
+
+    results = []
+    for config_name, config_path in configs.items():
+        build_started = time.perf_counter()
+        with redirect_stdout(sys.stderr):
+            # A throwaway key, so that the encrypt method can be benchmarked
+            scanner = PrivacyScanner(
+                str(config_path), key_provider=KeyProvider.generate()
+            )
+        build_seconds = time.perf_counter() - build_started
+
+        targets: Dict[str, Callable[[str], Any]] = {
+            "scan_text": lambda text: scanner.scan_text(text, use_cache=False),
+        }
+        for method in methods:
+            targets[f"anonymize_text:{method}"] = (
+                lambda text, method=method: scanner.anonymize_text(
+                    text, method, use_cache=False
+                )
+            )
+        if client is not None:
+            payload = {"config": str(config_path), "cache": False}
+            targets["POST /scan"] = _endpoint_operation(client, "/scan", payload)
+            targets["POST /anonymize"] = _endpoint_operation(
+                client, "/anonymize", {**payload, "method": "replace"}
+            )
+
+        for corpus_name, texts in corpora.items():
+            for target, operation in targets.items():
+                print(f"{config_name} {corpus_name} {target}", file=sys.stderr)
+                results.append(
+                    {
+                        "name": f"{config_name}/{corpus_name}/{target}",
+                        "config": config_name,
+                        "corpus": corpus_name,
+                        "target": target,
+                        "scanner_build_seconds": build_seconds,
+                        **measure(operation, texts, iterations),
+                    }
+                )
+
+    return results
+
+
+def _entity_spans(scanner: PrivacyScanner, texts: List[str]) -> Set[Tuple]:
+    return {
+        (index, entity["type"], *entity["position"])
+        for index, text in enumerate(texts)
+        for entity in scanner.scan_text(text, use_cache=False)
+    }
+
+
+def run_tier_benchmarks(
+    tiers: List[str],
+    disable: List[str],
+    corpora: Dict[str, List[str]],
+    iterations: int,
+) -> List[Dict[str, Any]]:
+    """
+    Benchmark scan_text on each spaCy model tier, with the full pipeline and without the
+    `disable` components, to show what each tier trades in recall for speed and memory.
+
+    Recall is the share of the entities found by the full pipeline of the first tier that
+    a variant finds too. Tiers whose model is not installed are skipped.
+    """
+    with open(TIER_CONFIG, "r", encoding="utf-8") as f:
+        base_config = json.load(f)
+
+    variants = []
+    for tier in tiers:
+        variants.append((tier, []))
+        if disable:
+            variants.append((tier, disable))
+
+    results = []
+    reference: Dict[str, Set[Tuple]] = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for tier, disabled in variants:
+            name = f"{tier}_trimmed" if disabled else tier
+            config_path = Path(directory) / f"{name}.json"
+            config_path.write_text(
+                json.dumps({**base_config, "nlp": {"model": tier, "disable": disabled}})
+            )
+
+            rss_before = current_rss_mb()
+            build_started = time.perf_counter()
+            try:
+                with redirect_stdout(sys.stderr):
+                    scanner = PrivacyScanner(str(config_path))
+            except PrivacyScannerError as e:
+                print(f"Skipping tier {name}: {e}", file=sys.stderr)
+                continue
+            build_seconds = time.perf_counter() - build_started
+            rss_after = current_rss_mb()
+
+            for corpus_name, texts in corpora.items():
+                print(f"tier {name} {corpus_name} scan_text", file=sys.stderr)
+                found = _entity_spans(scanner, texts)
+                expected = reference.setdefault(corpus_name, found)
+                results.append(
+                    {
+                        "name": f"tiers/{name}/{corpus_name}/scan_text",
+                        "config": name,
+                        "corpus": corpus_name,
+                        "target": "scan_text",
+                        "model_tier": tier,
+                        "disabled_components": disabled,
+                        "scanner_build_seconds": build_seconds,
+                        "model_rss_mb": (
+                            rss_after - rss_before
+                            if rss_before is not None and rss_after is not None
+                            else None
+                        ),
+                        "recall": (
+                            len(found & expected) / len(expected) if expected else 1.0
+                        ),
+                        **measure(
+                            lambda text: scanner.scan_text(text, use_cache=False),
+                            texts,
+                            iterations,
+                        ),
+                    }
+                )
+
+    return results
+
+
+def compare_results(
+    baseline: List[Dict[str, Any]], current: List[Dict[str, Any]]
+) -> List[Dict[str, Any]]:
+    """Relative change of p50, p99 and throughput for cases present in both runs"""
+    baseline_by_name = {result["name"]: result for result in baseline}
+    changes = []
+    for result in current:
+        previous = baseline_by_name.get(result["name"])
+        if previous is None:
+            continue
+        changes.append(
+            {
+                "name": result["name"],
+                **{
+                    f"{metric}_change": result[metric] / previous[metric] - 1
+                    for metric in ("p50_ms", "p99_ms", "texts_per_second")
+                    if previous[metric]
+                },
+            }
+        )
+    return changes
+
+
+def environment() -> Dict[str, Optional[str]]:
+    def package_version(name: str) -> Optional[str]:
+        try:
+            return version(name)
+        except PackageNotFoundError:
+            return None
+
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "presidio_analyzer": package_version("presidio_analyzer"),
+        "presidio_anonymizer": package_version("presidio_anonymizer"),
+        "spacy": package_version("spacy"),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Privacy Scanner benchmark")
+    parser.add_argument(
+        "-output", default=DEFAULT_OUTPUT, help="JSON file to write results to"
+    )
+    parser.add_argument(
+        "-baseline", help="Previous results JSON file to compare this run with"
+    )
+    parser.add_argument(
+        "-iterations",
+        type=int,
+        default=DEFAULT_ITERATIONS,
+        help="Calls per benchmark case",
+    )
+    parser.add_argument(
+        "-configs",
+        nargs="+",
+        choices=list(CONFIGS),
+        default=list(CONFIGS),
+        help="Configs to benchmark",
+    )
+    parser.add_argument(
+        "-methods",
+        nargs="+",
+        choices=list(DEFAULT_OPERATOR_CONFIG),
+        default=list(DEFAULT_OPERATOR_CONFIG),
+        help="Anonymization methods to benchmark",
+    )
+    parser.add_argument(
+        "-seed", type=int, default=DEFAULT_SEED, help="Seed of the synthetic corpora"
+    )
+    parser.add_argument(
+        "-no-endpoints",
+        action="store_true",
+        help="Skip benchmarking the Flask endpoints",
+    )
+    parser.add_argument(
+        "-tiers",
+        nargs="+",
+        choices=list(MODEL_TIERS),
+        help="Benchmark scan_text on these spaCy model tiers instead of the configs",
+    )
+    parser.add_argument(
+        "-disable",
+        nargs="*",
+        default=NER_ONLY_DISABLE,
+        help="spaCy components left out of the trimmed variant of each tier, "
+        "none to skip the trimmed variants",
+    )
+    args = parser.parse_args()
+
+    if args.tiers:
+        results = run_tier_benchmarks(
+            args.tiers, args.disable, make_corpora(args.seed), args.iterations
+        )
+    else:
+        results = run_benchmarks(
+            {name: CONFIGS[name] for name in args.configs},
+            make_corpora(args.seed),
+            args.methods,
+            args.iterations,
+            endpoints=not args.no_endpoints,
+        )
+    report = {
+        "environment": environment(),
+        "seed": args.seed,
+        "iterations": args.iterations,
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    for result in results:
+        print(
+            f"{result['name']:<60} p50 {result['p50_ms']:9.2f} ms  "
+            f"p99 {result['p99_ms']:9.2f} ms  {result['texts_per_second']:9.1f} texts/s"
+            + (f"  recall {result['recall']:.1%}" if "recall" in result else "")
+        )
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        print("\nChange against baseline:")
+        for change in compare_results(baseline["results"], results):
+            print(
+                f"{change['name']:<60} "
+                + "  ".join(
+                    f"{metric.replace('_change', '')} {value:+.1%}"
+                    for metric, value in change.items()
+                    if metric != "name"
+                )
+            )
+
+
+if __name__ == "__main__":
+    main()
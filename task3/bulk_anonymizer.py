@@ -0,0 +1,292 @@
+import re
+from typing import Dict, List, Optional, Tuple
+
+from presidio_anonymizer import AnonymizerEngine
+from presidio_anonymizer.entities import (
+    ConflictResolutionStrategy,
+    EngineResult,
+    InvalidParamError,
+    OperatorConfig,
+    OperatorResult,
+    RecognizerResult,
+)
+from presidio_anonymizer.operators import Operator, OperatorType
+
+DEFAULT_OPERATOR = "replace"
+# Operators whose output only depends on the parameters and the original value
+CACHEABLE_OPERATORS = frozenset({"hash", "mask"})
+# Same gap test as AnonymizerEngine._merge_entities_with_whitespace_between
+WHITESPACE_GAP = re.compile(r"^( )+$")
+
+
+class Pseudonymize(Operator):
+    """
+    Replace each value with a surrogate token from a mapping store, the same token for
+    every occurrence of the value. Expects the store in the `store` parameter.
+    """
+
+    def operate(self, text: str = None, params: Dict = None) -> str:
+        return params["store"].get_tokens(params["entity_type"], [text])[text]
+
+    def operate_many(self, texts: List[str], params: Dict) -> List[str]:
+        """Pseudonymize several values with a single store lookup"""
+        tokens = params["store"].get_tokens(params["entity_type"], texts)
+        return [tokens[text] for text in texts]
+
+    def validate(self, params: Dict = None) -> None:
+        if not hasattr((params or {}).get("store"), "get_tokens"):
+            raise InvalidParamError("Pseudonymize needs a mapping store as 'store'")
+
+    def operator_name(self) -> str:
+        return "pseudonymize"
+
+    def operator_type(self) -> OperatorType:
+        return OperatorType.Anonymize
+
+
+class KeyedEncrypt(Operator):
+    """
+    Encrypt each value with the current key of a key provider, into a self-describing
+    <enc:KEY_ID:...> token. Expects the provider in the `key_provider` parameter.
+    """
+
+    def operate(self, text: str = None, params: Dict = None) -> str:
+        return params["key_provider"].encrypt(text)
+
+    def validate(self, params: Dict = None) -> None:
+        if not hasattr((params or {}).get("key_provider"), "encrypt"):
+            raise InvalidParamError("Encrypt needs a key provider as 'key_provider'")
+
+    def operator_name(self) -> str:
+        return "encrypt"
+
+    def operator_type(self) -> OperatorType:
+        return OperatorType.Anonymize
+
+
+class BulkAnonymizerEngine(AnonymizerEngine):
+    """
+    AnonymizerEngine producing the same output in linear time for texts with many entities.
+
+    Presidio compares every result with every other one to resolve conflicts and rebuilds
+    the whole text for each replaced entity. Here results are sorted once and only
+    overlapping ones are compared, the output is assembled with a single join, each
+    operator is created and validated once per entity type, and hash/mask outputs are
+    reused for repeated values. Operators with an `operate_many` method, such as
+    Pseudonymize which is registered by default, get all their values in one call.
+    The encrypt operator is replaced by KeyedEncrypt, which takes its keys from a key
+    provider.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.add_anonymizer(Pseudonymize)
+        self.add_anonymizer(KeyedEncrypt)
+
+    def anonymize(
+        self,
+        text: str,
+        analyzer_results: List[RecognizerResult],
+        operators: Optional[Dict[str, OperatorConfig]] = None,
+        conflict_resolution: ConflictResolutionStrategy = (
+            ConflictResolutionStrategy.MERGE_SIMILAR_OR_CONTAINED
+        ),
+        operated_cache: Optional[Dict[Tuple, str]] = None,
+    ) -> EngineResult:
+        """
+        Anonymize the text, like AnonymizerEngine.anonymize.
+
+        Args:
+            text (str): The text to anonymize
+            analyzer_results (list): Results of the analyzer, left unmodified
+            operators (dict): Operator config per entity type, with an optional DEFAULT
+            conflict_resolution (ConflictResolutionStrategy): How overlapping results are handled
+            operated_cache (dict): Optional cache of hash/mask outputs, to share between the
+                calls of a batch. A cache local to the call is used otherwise.
+
+        Returns:
+            EngineResult: The anonymized text and what was applied to each entity
+        """
+        if conflict_resolution != ConflictResolutionStrategy.MERGE_SIMILAR_OR_CONTAINED:
+            return super().anonymize(
+                text, analyzer_results, operators, conflict_resolution
+            )
+
+        # Conflict resolution moves the boundaries of the results it merges
+        results = [
+            RecognizerResult(result.entity_type, result.start, result.end, result.score)
+            for result in analyzer_results
+        ]
+        results = self._merge_whitespace_gaps(text, self._resolve_conflicts(results))
+        return self._operate_once(
+            text,
+            results,
+            operators or {},
+            operated_cache if operated_cache is not None else {},
+        )
+
+    def _resolve_conflicts(
+        self, results: List[RecognizerResult]
+    ) -> List[RecognizerResult]:
+        """
+        Presidio's conflict resolution applied to each group of overlapping results only.
+
+        Results that do not touch never merge or conflict, so resolving each group on its
+        own keeps the outcome of comparing every pair. Input order is kept.
+        """
+        kept: List[int] = []
+        group: List[int] = []
+        group_end = 0
+        for index in sorted(
+            range(len(results)), key=lambda i: (results[i].start, results[i].end)
+        ):
+            result = results[index]
+            if group and result.start > group_end:
+                kept.extend(self._resolve_group(results, group))
+                group = []
+            if not group:
+                group_end = result.end
+            group.append(index)
+            group_end = max(group_end, result.end)
+        if group:
+            kept.extend(self._resolve_group(results, group))
+
+        return [results[index] for index in sorted(kept)]
+
+    def _resolve_group(
+        self, results: List[RecognizerResult], group: List[int]
+    ) -> List[int]:
+        if len(group) == 1:
+            return group
+
+        group = sorted(group)
+        position = {id(results[index]): index for index in group}
+        resolved = self._remove_conflicts_and_get_text_manipulation_data(
+            [results[index] for index in group],
+            ConflictResolutionStrategy.MERGE_SIMILAR_OR_CONTAINED,
+        )
+        return [position[id(result)] for result in resolved]
+
+    @staticmethod
+    def _merge_whitespace_gaps(
+        text: str, results: List[RecognizerResult]
+    ) -> List[RecognizerResult]:
+        """Merge consecutive results of the same type separated by spaces only"""
+        merged: List[RecognizerResult] = []
+        for result in results:
+            if merged:
+                previous = merged[-1]
+                if previous.entity_type == result.entity_type and WHITESPACE_GAP.search(
+                    text[previous.end : result.start]
+                ):
+                    merged.pop()
+                    result.start = previous.start
+            merged.append(result)
+        return merged
+
+    def _operate_once(
+        self,
+        text: str,
+        results: List[RecognizerResult],
+        operators: Dict[str, OperatorConfig],
+        operated_cache: Dict[Tuple, str],
+    ) -> EngineResult:
+        """
+        Replace the entities from the end of the text to its start, like EngineBase._operate,
+        collecting the segments of the output instead of rebuilding it for every entity.
+        """
+        default = operators.get("DEFAULT") or OperatorConfig(DEFAULT_OPERATOR)
+        prepared: Dict[str, Tuple] = {}
+        engine_result = EngineResult()
+        segments: List[str] = []
+        tail_length = 0
+        last_start = len(text)
+
+        entities = sorted(results, reverse=True)
+        for entity in entities:
+            if entity.end > len(text):
+                raise InvalidParamError(
+                    f"Invalid analyzer result, start: {entity.start} and end: "
+                    f"{entity.end}, while text length is only {len(text)}."
+                )
+            if entity.entity_type not in prepared:
+                prepared[entity.entity_type] = self._prepare_operator(
+                    entity.entity_type, operators.get(entity.entity_type) or default
+                )
+        operated_in_bulk = self._operate_in_bulk(text, entities, prepared)
+
+        for entity in entities:
+            entity_type = entity.entity_type
+            operator, params, operator_name, cache_prefix = prepared[entity_type]
+
+            original = text[entity.start : entity.end]
+            if (entity_type, original) in operated_in_bulk:
+                changed_text = operated_in_bulk[(entity_type, original)]
+            elif cache_prefix is None:
+                changed_text = operator.operate(params=params, text=original)
+            else:
+                cache_key = (*cache_prefix, original)
+                changed_text = operated_cache.get(cache_key)
+                if changed_text is None:
+                    changed_text = operator.operate(params=params, text=original)
+                    operated_cache[cache_key] = changed_text
+
+            # Overlapping entities are cut at the start of the one replaced before them
+            kept_text = text[min(entity.end, last_start) : last_start]
+            segments.append(kept_text)
+            segments.append(changed_text)
+            tail_length += len(kept_text) + len(changed_text)
+            last_start = entity.start
+            engine_result.add_item(
+                OperatorResult(0, tail_length, entity_type, changed_text, operator_name)
+            )
+
+        segments.append(text[:last_start])
+        engine_result.set_text("".join(reversed(segments)))
+        engine_result.normalize_item_indexes()
+        return engine_result
+
+    @staticmethod
+    def _operate_in_bulk(
+        text: str, entities: List[RecognizerResult], prepared: Dict[str, Tuple]
+    ) -> Dict[Tuple[str, str], str]:
+        """Run the operators supporting it once over the distinct values of their entities"""
+        values: Dict[str, Dict[str, None]] = {}
+        # In text order, so that new tokens are numbered as the values appear
+        for entity in reversed(entities):
+            operator = prepared[entity.entity_type][0]
+            if hasattr(operator, "operate_many"):
+                values.setdefault(entity.entity_type, {})[
+                    text[entity.start : entity.end]
+                ] = None
+
+        operated = {}
+        for entity_type, originals in values.items():
+            operator, params = prepared[entity_type][:2]
+            originals = list(originals)
+            for original, changed_text in zip(
+                originals, operator.operate_many(originals, params)
+            ):
+                operated[(entity_type, original)] = changed_text
+        return operated
+
+    def _prepare_operator(
+        self, entity_type: str, operator_config: OperatorConfig
+    ) -> Tuple:
+        """Create and validate the operator of an entity type once per call"""
+        operator_name = operator_config.operator_name
+        operator = self.operators_factory.create_operator_class(
+            operator_name, OperatorType.Anonymize
+        )
+        # A copy, so that concurrent calls sharing the operator config do not race
+        params = {**operator_config.params, "entity_type": entity_type}
+        operator.validate(params=params)
+
+        cache_prefix = None
+        if operator_name in CACHEABLE_OPERATORS:
+            try:
+                cache_prefix = (operator_name, *sorted(params.items()))
+                hash(cache_prefix)
+            except TypeError:
+                cache_prefix = None
+        return operator, params, operator_name, cache_prefix
@@ -0,0 +1,121 @@
+import re
+from dataclasses import dataclass
+from typing import List, Tuple
+from presidio_analyzer import EntityRecognizer, RecognizerResult
+
+DEFAULT_MAX_CHUNK_SIZE: int = 100_000
+DEFAULT_CHUNK_OVERLAP: int = 200
+
+SENTENCE_BOUNDARY = re.compile(r"[.!?][\"')\]]*\s+")
+WHITESPACE = re.compile(r"\s+")
+
+
+@dataclass(frozen=True)
+class TextChunk:
+    """A slice of a longer text and where it starts in that text"""
+
+    start: int
+    text: str
+
+    @property
+    def end(self) -> int:
+        return self.start + len(self.text)
+
+
+def _last_boundary(text: str, window_start: int, window_end: int) -> int:
+    """Return the offset right after the last sentence end, else the last whitespace, in the window"""
+    for pattern in (SENTENCE_BOUNDARY, WHITESPACE):
+        boundary = -1
+        for match in pattern.finditer(text, window_start, window_end):
+            boundary = match.end()
+        if boundary > window_start:
+            return boundary
+    return -1
+
+
+def split_text(
+    text: str,
+    max_chunk_size: int = DEFAULT_MAX_CHUNK_SIZE,
+    overlap: int = DEFAULT_CHUNK_OVERLAP,
+) -> List[TextChunk]:
+    """
+    Split text into chunks of at most max_chunk_size characters.
+
+    Chunks end on a sentence boundary when one exists in the second half of the chunk,
+    otherwise on whitespace, and only as a last resort in the middle of a word. Each
+    chunk after the first starts `overlap` characters before the previous chunk ended
+    (moved forward to the next word start), so an entity cut by one chunk boundary is
+    seen whole by the neighbouring chunk as long as it is shorter than the overlap.
+
+    Args:
+        text (str): The text to split.
+        max_chunk_size (int): Maximum length of a chunk.
+        overlap (int): Number of characters shared by consecutive chunks.
+
+    Returns:
+        list: TextChunk objects covering the whole text, in order.
+    """
+    if max_chunk_size <= 0:
+        raise ValueError("max_chunk_size must be positive")
+    if not 0 <= overlap < max_chunk_size // 2:
+        raise ValueError("overlap must be non negative and less than half a chunk")
+
+    chunks: List[TextChunk] = []
+    start = 0
+    while start < len(text):
+        end = min(start + max_chunk_size, len(text))
+        if end < len(text):
+            boundary = _last_boundary(text, start + max_chunk_size // 2, end)
+            if boundary > 0:
+                end = boundary
+
+        chunks.append(TextChunk(start=start, text=text[start:end]))
+        if end == len(text):
+            break
+
+        next_start = end - overlap
+        if overlap:
+            whitespace = WHITESPACE.search(text, next_start, end)
+            if whitespace:
+                next_start = whitespace.end()
+        start = next_start
+
+    return chunks
+
+
+def merge_chunk_results(
+    chunk_results: List[Tuple[TextChunk, List[RecognizerResult]]],
+) -> List[RecognizerResult]:
+    """
+    Map per-chunk results back to offsets in the full text and de-duplicate them.
+
+    A result touching a chunk edge may be truncated, so it is dropped when the
+    neighbouring chunk covers it with room to spare and therefore reports it whole.
+    Entities found twice in an overlap zone collapse into one.
+
+    Args:
+        chunk_results (list): (chunk, results with chunk-relative offsets) pairs, in order.
+
+    Returns:
+        list: Results with offsets relative to the full text.
+    """
+    merged: List[RecognizerResult] = []
+    for index, (chunk, results) in enumerate(chunk_results):
+        previous_chunk = chunk_results[index - 1][0] if index > 0 else None
+        next_chunk = (
+            chunk_results[index + 1][0] if index + 1 < len(chunk_results) else None
+        )
+
+        for result in results:
+            start = result.start + chunk.start
+            end = result.end + chunk.start
+            if next_chunk and end == chunk.end and next_chunk.start <= start:
+                continue
+            if previous_chunk and start == chunk.start and previous_chunk.end > end:
+                continue
+
+            result.start = start
+            result.end = end
+            merged.append(result)
+
+    return EntityRecognizer.remove_duplicates(merged)
@@ -1,12 +1,405 @@
-from typing import Dict, Optional
+from typing import Any, Dict, FrozenSet, List, Mapping, Optional, Tuple, Union
+from dataclasses import dataclass, field
+from functools import lru_cache
+import hashlib
 import json
 from pathlib import Path
-import importlib
-from presidio_analyzer import RecognizerRegistry
-from presidio_analyzer.predefined_recognizers import (
-    __all__ as DEFAULT_PREDEFINED_RECOGNIZERS,
-    SpacyRecognizer,
+from types import MappingProxyType
+from presidio_analyzer import (
+    EntityRecognizer,
+    RecognizerRegistry,
+    predefined_recognizers,
 )
+from deny_list_recognizer import DenyListRecognizer
+from nlp_engine import DEFAULT_MODEL_TIER, MODEL_TIERS
+
+DENY_LIST_RECOGNIZER_TYPE: str = "deny_list"
+PATTERN_RECOGNIZER_TYPE: str = "pattern"
+RECOGNIZER_TYPES: Tuple[str, ...] = (PATTERN_RECOGNIZER_TYPE, DENY_LIST_RECOGNIZER_TYPE)
+COMPILED_CONFIG_CACHE_SIZE: int = 64
+# How the cells of a column are analyzed by the structured mode, "auto" samples the column
+COLUMN_MODES: Tuple[str, ...] = ("auto", "nlp", "pattern", "skip")
+NLP_SETTINGS: Tuple[str, ...] = ("model", "disable")
+# Recognizers reading the entities of spaCy's "ner" component
+NER_RECOGNIZER_NAMES: Tuple[str, ...] = ("NameRecognizer", "SpacyRecognizer")
+ANALYSIS_SETTINGS: Tuple[str, ...] = ("score_threshold", "entities", "max_entities")
+PREDEFINED_RECOGNIZER_NAMES: FrozenSet[str] = frozenset(predefined_recognizers.__all__)
+
+
+def resolve_recognizer_class(recognizer_name: str) -> type:
+    """Return the predefined recognizer class with the given name"""
+    return getattr(predefined_recognizers, recognizer_name)
+
+
+def config_fingerprint(recognizers_config: Optional[Dict[str, Any]]) -> str:
+    """Return a stable hash of a recognizers configuration, independent of key order"""
+    canonical = json.dumps(
+        recognizers_config or {}, sort_keys=True, separators=(",", ":")
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def file_versions(paths: List[str]) -> Tuple[Tuple[str, Optional[int], int], ...]:
+    """Return the path, mtime and size of each file, (path, None, 0) for missing files"""
+    versions = []
+    for path in paths:
+        try:
+            stat = Path(path).stat()
+            versions.append((path, stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            versions.append((path, None, 0))
+    return tuple(versions)
+
+
+def validate_column_rules(columns: Any) -> None:
+    """Raise ValueError unless columns maps column names to rules of the structured mode"""
+    if not isinstance(columns, dict) or not all(
+        isinstance(rule, dict) for rule in columns.values()
+    ):
+        raise ValueError("'columns' must map column names to objects")
+
+    for column, rule in columns.items():
+        if rule.get("mode", "auto") not in COLUMN_MODES:
+            raise ValueError(
+                f"Invalid mode for column {column}: {rule['mode']}. Must be one of {list(COLUMN_MODES)}"
+            )
+        entities = rule.get("entities")
+        if entities is not None and (
+            not isinstance(entities, list)
+            or not all(isinstance(entity, str) for entity in entities)
+        ):
+            raise ValueError(f"'entities' of column {column} must be a list of strings")
+
+
+def validate_nlp_settings(
+    nlp: Any, recognizers: Optional[Dict[str, Any]] = None
+) -> None:
+    """
+    Raise ValueError unless nlp picks a model tier and lists spaCy components to
+    disable, keeping "ner" while an enabled recognizer reads its entities.
+    """
+    if not isinstance(nlp, dict):
+        raise ValueError("'nlp' must be an object")
+
+    unknown = set(nlp) - set(NLP_SETTINGS)
+    if unknown:
+        raise ValueError(
+            f"Unknown nlp settings: {sorted(unknown)}. Must be among {list(NLP_SETTINGS)}"
+        )
+    if nlp.get("model", DEFAULT_MODEL_TIER) not in MODEL_TIERS:
+        raise ValueError(
+            f"Invalid nlp model: {nlp['model']}. Must be one of {list(MODEL_TIERS)}"
+        )
+    disable = nlp.get("disable", [])
+    if not isinstance(disable, list) or not all(
+        isinstance(component, str) for component in disable
+    ):
+        raise ValueError("'disable' of nlp must be a list of spaCy component names")
+    ner_recognizers = [
+        name for name in NER_RECOGNIZER_NAMES if (recognizers or {}).get(name)
+    ]
+    if "ner" in disable and ner_recognizers:
+        raise ValueError(
+            f"nlp cannot disable 'ner', which {', '.join(ner_recognizers)} needs"
+        )
+
+
+@dataclass(frozen=True)
+class AnalysisOptions:
+    """
+    Limits applied to an analysis, from the config's analysis section or a request.
+
+    Attributes:
+        score_threshold (float): Results scoring below it are dropped, None keeps them all
+        entities (tuple): Entity types to look for, None for every type. Recognizers of
+            no requested type are not run.
+        max_entities (int): Analyses finding more entities than this fail, None for no limit
+    """
+
+    score_threshold: Optional[float] = None
+    entities: Optional[Tuple[str, ...]] = None
+    max_entities: Optional[int] = None
+
+    @classmethod
+    def from_dict(cls, settings: Optional[Mapping[str, Any]]) -> "AnalysisOptions":
+        """Validate and parse analysis settings, raising ValueError when they are invalid"""
+        if settings is None:
+            return cls()
+        if not isinstance(settings, Mapping):
+            raise ValueError("'analysis' must be an object")
+
+        unknown = set(settings) - set(ANALYSIS_SETTINGS)
+        if unknown:
+            raise ValueError(
+                f"Unknown analysis settings: {sorted(unknown)}. Must be among {list(ANALYSIS_SETTINGS)}"
+            )
+
+        score_threshold = settings.get("score_threshold")
+        if score_threshold is not None and (
+            not isinstance(score_threshold, (int, float))
+            or isinstance(score_threshold, bool)
+            or not 0 <= score_threshold <= 1
+        ):
+            raise ValueError(
+                f"Invalid score_threshold: {score_threshold}. Must be a number between 0 and 1"
+            )
+
+        entities = settings.get("entities")
+        if entities is not None:
+            if (
+                not isinstance(entities, (list, tuple))
+                or not entities
+                or not all(isinstance(entity, str) for entity in entities)
+            ):
+                raise ValueError("'entities' must be a non-empty list of entity types")
+            entities = tuple(dict.fromkeys(entities))
+
+        max_entities = settings.get("max_entities")
+        if max_entities is not None and (
+            not isinstance(max_entities, int)
+            or isinstance(max_entities, bool)
+            or max_entities < 0
+        ):
+            raise ValueError(
+                f"Invalid max_entities: {max_entities}. Must be a non-negative integer"
+            )
+
+        return cls(
+            score_threshold=float(score_threshold)
+            if score_threshold is not None
+            else None,
+            entities=entities,
+            max_entities=max_entities,
+        )
+
+    def merge(self, overrides: Optional["AnalysisOptions"]) -> "AnalysisOptions":
+        """Return these options with the settings that `overrides` sets replacing them"""
+        if overrides is None:
+            return self
+        return AnalysisOptions(
+            score_threshold=self.score_threshold
+            if overrides.score_threshold is None
+            else overrides.score_threshold,
+            entities=self.entities
+            if overrides.entities is None
+            else overrides.entities,
+            max_entities=self.max_entities
+            if overrides.max_entities is None
+            else overrides.max_entities,
+        )
+
+    @property
+    def cache_key(self) -> str:
+        """Suffix telling apart the cached results of different options, empty for the defaults"""
+        if self == AnalysisOptions():
+            return ""
+        entities = ",".join(sorted(self.entities)) if self.entities else ""
+        return f"|{self.score_threshold}|{entities}|{self.max_entities}"
+
+
+def _freeze(value: Any) -> Any:
+    """Return a read-only copy of a JSON value: dicts become mapping proxies, lists tuples"""
+    if isinstance(value, Mapping):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+def _thaw(value: Any) -> Any:
+    """Return a plain, mutable copy of a value frozen by _freeze"""
+    if isinstance(value, Mapping):
+        return {key: _thaw(item) for key, item in value.items()}
+    if isinstance(value, tuple):
+        return [_thaw(item) for item in value]
+    return value
+
+
+@dataclass(frozen=True)
+class CompiledConfig:
+    """
+    Parsed, validated and read-only recognizers configuration.
+
+    Equality and hashing only look at the fingerprint, so compiled configs can key
+    caches and be compared cheaply. Relative deny list files are resolved against the
+    config's directory at compile time and their versions are part of the fingerprint,
+    so editing a deny list file yields a new fingerprint.
+
+    Attributes:
+        fingerprint (str): Stable hash of the recognizers, operators, columns, nlp and
+            analysis sections
+        recognizers (Mapping): Read-only recognizers section, None for the defaults
+        operators (Mapping): Read-only per-entity anonymization operators, if any
+        columns (Mapping): Read-only per-column rules of the structured mode, if any
+        nlp (Mapping): Read-only spaCy model tier and disabled components, if any
+        analysis (Mapping): Read-only default score threshold, entities and entity limit, if any
+        base_path (Path): Directory of the config file, if any
+        deny_list_versions (tuple): Path, mtime and size of each deny list file
+    """
+
+    fingerprint: str
+    recognizers: Optional[Mapping[str, Any]] = field(default=None, compare=False)
+    operators: Optional[Mapping[str, Any]] = field(default=None, compare=False)
+    columns: Optional[Mapping[str, Any]] = field(default=None, compare=False)
+    nlp: Optional[Mapping[str, Any]] = field(default=None, compare=False)
+    analysis: Optional[Mapping[str, Any]] = field(default=None, compare=False)
+    base_path: Optional[Path] = field(default=None, compare=False)
+    deny_list_versions: Tuple[Tuple[str, Optional[int], int], ...] = field(
+        default=(), compare=False
+    )
+
+    @classmethod
+    def compile(
+        cls,
+        recognizers_config: Optional[Dict[str, Any]],
+        base_path: Optional[Path] = None,
+        operators_config: Optional[Dict[str, Any]] = None,
+        columns_config: Optional[Dict[str, Any]] = None,
+        nlp_config: Optional[Dict[str, Any]] = None,
+        analysis_config: Optional[Dict[str, Any]] = None,
+    ) -> "CompiledConfig":
+        recognizers_config = _thaw(recognizers_config) if recognizers_config else None
+        deny_list_files = []
+        for recognizer in (recognizers_config or {}).values():
+            deny_list_file = isinstance(recognizer, dict) and recognizer.get(
+                "deny_list_file"
+            )
+            if deny_list_file and base_path and not Path(deny_list_file).is_absolute():
+                recognizer["deny_list_file"] = str(Path(base_path) / deny_list_file)
+            if deny_list_file:
+                deny_list_files.append(recognizer["deny_list_file"])
+        deny_list_versions = file_versions(deny_list_files)
+
+        sections = {
+            name: section
+            for name, section in (
+                ("operators", operators_config),
+                ("columns", columns_config),
+                ("nlp", nlp_config),
+                ("analysis", analysis_config),
+            )
+            if section
+        }
+        if deny_list_versions:
+            sections["deny_list_files"] = [
+                list(version) for version in deny_list_versions
+            ]
+        if sections:
+            fingerprint = config_fingerprint(
+                {"recognizers": recognizers_config, **sections}
+            )
+        else:
+            fingerprint = config_fingerprint(recognizers_config)
+
+        return cls(
+            fingerprint=fingerprint,
+            recognizers=_freeze(recognizers_config) if recognizers_config else None,
+            operators=_freeze(operators_config) if operators_config else None,
+            columns=_freeze(columns_config) if columns_config else None,
+            nlp=_freeze(nlp_config) if nlp_config else None,
+            analysis=_freeze(analysis_config) if analysis_config else None,
+            base_path=base_path,
+            deny_list_versions=deny_list_versions,
+        )
+
+    def recognizers_config(self) -> Optional[Dict[str, Any]]:
+        """Return a mutable copy of the recognizers section"""
+        return _thaw(self.recognizers) if self.recognizers else None
+
+    def operators_config(self) -> Dict[str, Dict[str, Any]]:
+        """Return a mutable copy of the per-entity operators section"""
+        return _thaw(self.operators) if self.operators else {}
+
+    def columns_config(self) -> Dict[str, Dict[str, Any]]:
+        """Return a mutable copy of the per-column rules section"""
+        return _thaw(self.columns) if self.columns else {}
+
+    def nlp_config(self) -> Dict[str, Any]:
+        """Return a mutable copy of the nlp section"""
+        return _thaw(self.nlp) if self.nlp else {}
+
+    def analysis_options(self) -> AnalysisOptions:
+        """Return the parsed analysis section"""
+        return AnalysisOptions.from_dict(
+            _thaw(self.analysis) if self.analysis else None
+        )
+
+
+def load_config(config_path: Optional[Union[str, Path]] = None) -> CompiledConfig:
+    """
+    Return the compiled config of a file, parsed and validated once per file version.
+
+    Args:
+        config_path (str): Path to the configuration file, None for the default recognizers.
+
+    Returns:
+        CompiledConfig: The shared compiled config, recompiled when the file or one of
+            its deny list files changes.
+    """
+    if not config_path:
+        return _compile_config_file(None, None)
+
+    path = Path(config_path).resolve()
+    try:
+        stat = path.stat()
+        version = (stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        version = None
+    compiled = _compile_config_file(str(path), version)
+    # Deny list files are only known once the config is parsed, so their versions
+    # join the cache key when they no longer match the ones compiled in
+    deny_list_versions = file_versions(
+        [deny_list_file for deny_list_file, _, _ in compiled.deny_list_versions]
+    )
+    if deny_list_versions != compiled.deny_list_versions:
+        compiled = _compile_config_file(str(path), version, deny_list_versions)
+    return compiled
+
+
+@lru_cache(maxsize=COMPILED_CONFIG_CACHE_SIZE)
+def _compile_config_file(
+    config_path: Optional[str],
+    version: Optional[Tuple[int, int]],
+    deny_list_versions: Tuple[Tuple[str, Optional[int], int], ...] = (),
+) -> CompiledConfig:
+    config_loader = ConfigLoader(config_path)
+    base_path = Path(config_path).parent if config_path else None
+    return CompiledConfig.compile(
+        config_loader.get_recognizers_config(),
+        base_path,
+        config_loader.get_operators_config(),
+        config_loader.get_columns_config(),
+        config_loader.get_nlp_config(),
+        config_loader.get_analysis_config(),
+    )
+
+
+class FrozenRecognizerRegistry(RecognizerRegistry):
+    """
+    Read-only snapshot of a RecognizerRegistry that can be shared between threads.
+
+    The recognizer list is fixed at construction and the methods that would change it
+    raise TypeError.
+    """
+
+    def __init__(self, registry: RecognizerRegistry):
+        self._recognizers: Tuple[EntityRecognizer, ...] = tuple(registry.recognizers)
+        self.global_regex_flags = registry.global_regex_flags
+        self.supported_languages = list(registry.supported_languages)
+
+    @property
+    def recognizers(self) -> List[EntityRecognizer]:
+        return list(self._recognizers)
+
+    def _read_only(self, *args, **kwargs) -> None:
+        raise TypeError("Recognizer registry snapshots are read-only")
+
+    add_recognizer = _read_only
+    remove_recognizer = _read_only
+    add_pattern_recognizer_from_dict = _read_only
+    add_recognizers_from_yaml = _read_only
+    add_nlp_recognizer = _read_only
+    load_predefined_recognizers = _read_only
 
 
 class ConfigLoader:
@@ -38,32 +431,75 @@ class ConfigLoader:
 
         for recognizer_name in config["recognizers"]:
             if (
-                recognizer_name not in DEFAULT_PREDEFINED_RECOGNIZERS
+                recognizer_name not in PREDEFINED_RECOGNIZER_NAMES
                 and recognizer_name != "NameRecognizer"
                 and not config["recognizers"].get(recognizer_name)
             ):
                 raise ValueError(f"Unknown recognizer: {recognizer_name}")
+            recognizer_config = config["recognizers"][recognizer_name]
+            if (
+                isinstance(recognizer_config, dict)
+                and "type" in recognizer_config
+                and recognizer_config["type"] not in RECOGNIZER_TYPES
+            ):
+                raise ValueError(
+                    f"Unknown recognizer type: {recognizer_config['type']}. "
+                    f"Expected one of: {', '.join(RECOGNIZER_TYPES)}"
+                )
+
+        operators = config.get("operators", {})
+        if not isinstance(operators, dict) or not all(
+            isinstance(operator, dict) and "type" in operator
+            for operator in operators.values()
+        ):
+            raise ValueError(
+                "'operators' must map entity types to objects with an operator 'type'"
+            )
+
+        validate_column_rules(config.get("columns", {}))
+        validate_nlp_settings(config.get("nlp", {}), config["recognizers"])
+        AnalysisOptions.from_dict(config.get("analysis"))
 
     def get_recognizers_config(self) -> Dict[str, bool]:
         return self.config.get("recognizers")
 
+    def get_operators_config(self) -> Optional[Dict[str, Dict[str, Any]]]:
+        return self.config.get("operators")
+
+    def get_columns_config(self) -> Optional[Dict[str, Dict[str, Any]]]:
+        return self.config.get("columns")
+
+    def get_nlp_config(self) -> Optional[Dict[str, Any]]:
+        return self.config.get("nlp")
+
+    def get_analysis_config(self) -> Optional[Dict[str, Any]]:
+        return self.config.get("analysis")
+
 
 class PIIRegistry:
     """
     Loads recognizers based on the configuration provided.
 
     Args:
-        config (str): Path to the configuration file.
+        config (str): Path to the configuration file, or an already compiled config.
     """
 
-    def __init__(self, config: str):
-        registry_config: Dict[str, bool] = ConfigLoader(config).get_recognizers_config()
+    def __init__(self, config: Union[str, Path, CompiledConfig, None]):
+        self.config: CompiledConfig = (
+            config if isinstance(config, CompiledConfig) else load_config(config)
+        )
+        self.fingerprint: str = self.config.fingerprint
+        # Files referenced by the config (e.g. deny lists) are relative to it
+        self.base_path: Optional[Path] = self.config.base_path
+        registry_config = self.config.recognizers_config()
         if registry_config:
-            self.registry: RecognizerRegistry = self._create_custom_registry(
-                registry_config
-            )
+            registry = self._create_custom_registry(registry_config)
         else:
-            self.registry: RecognizerRegistry = self._load_default_predefined_registry()
+            registry = self._load_default_predefined_registry()
+        if not registry.recognizers:
+            # What AnalyzerEngine would otherwise do with an empty registry
+            registry.load_predefined_recognizers()
+        self.registry: RecognizerRegistry = FrozenRecognizerRegistry(registry)
 
     def get_registry(self) -> RecognizerRegistry:
         return self.registry
@@ -89,8 +525,19 @@ class PIIRegistry:
                         continue
 
                     elif isinstance(enabled, dict) and enabled["enabled"]:
-                        enabled.pop("enabled")
-                        registry.add_pattern_recognizer_from_dict(enabled)
+                        recognizer_dict = {
+                            key: value
+                            for key, value in enabled.items()
+                            if key not in ("enabled", "type")
+                        }
+                        if self._is_deny_list_recognizer(enabled):
+                            registry.add_recognizer(
+                                DenyListRecognizer.from_dict(
+                                    recognizer_dict, self.base_path
+                                )
+                            )
+                        else:
+                            registry.add_pattern_recognizer_from_dict(recognizer_dict)
                     else:
                         registry.add_recognizer(
                             self._import_recognizer(recognizer_name)
@@ -103,13 +550,29 @@ class PIIRegistry:
 
         return registry
 
-    def _import_recognizer(self, recognizer_name: str) -> object:
-        try:
-            module = importlib.import_module("presidio_analyzer.predefined_recognizers")
+    @staticmethod
+    def _is_deny_list_recognizer(recognizer_config: Dict) -> bool:
+        """
+        Deny-list only recognizers are compiled into an Aho-Corasick automaton rather
+        than one regex alternation, which gets slow with large lists.
 
-            recognizer_class = getattr(module, recognizer_name)
+        Raises:
+            ValueError: If the recognizer has an unknown "type".
+        """
+        if "type" in recognizer_config:
+            if recognizer_config["type"] not in RECOGNIZER_TYPES:
+                raise ValueError(
+                    f"Unknown recognizer type: {recognizer_config['type']}"
+                )
+            return recognizer_config["type"] == DENY_LIST_RECOGNIZER_TYPE
+        return not recognizer_config.get("patterns") and bool(
+            recognizer_config.get("deny_list")
+            or recognizer_config.get("deny_list_file")
+        )
 
-            return recognizer_class()
+    def _import_recognizer(self, recognizer_name: str) -> object:
+        try:
+            return resolve_recognizer_class(recognizer_name)()
 
         except (ImportError, AttributeError) as e:
             print(f"Warning: Could not import recognizer {recognizer_name}: {str(e)}")
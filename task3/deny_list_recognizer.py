@@ -0,0 +1,206 @@
+from collections import deque
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+from presidio_analyzer import AnalysisExplanation, LocalRecognizer, RecognizerResult
+from presidio_analyzer.nlp_engine import NlpArtifacts
+
+
+def _fold(char: str, case_sensitive: bool) -> str:
+    """Lower-case a single character without changing the text length"""
+    if case_sensitive:
+        return char
+    lowered = char.lower()
+    return lowered if len(lowered) == 1 else char
+
+
+def _is_word_char(char: str) -> bool:
+    return char.isalnum() or char == "_"
+
+
+class DenyListAutomaton:
+    """
+    Aho-Corasick automaton over a list of terms.
+
+    Matching walks the text once, so its cost is linear in the text length plus the
+    number of matches, whatever the number of terms.
+    """
+
+    def __init__(self, terms: Iterable[str], case_sensitive: bool = False):
+        self.case_sensitive = case_sensitive
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # Lengths of the terms ending at each state, including via failure links
+        self._output: List[Tuple[int, ...]] = [()]
+        self.size = 0
+
+        for term in terms:
+            self._add(term)
+        self._build_failure_links()
+
+    def _add(self, term: str) -> None:
+        if not term:
+            return
+
+        state = 0
+        for char in term:
+            char = _fold(char, self.case_sensitive)
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(())
+            state = next_state
+
+        if len(term) not in self._output[state]:
+            self._output[state] += (len(term),)
+            self.size += 1
+
+    def _build_failure_links(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(char, 0)
+                if self._fail[next_state] == next_state:
+                    self._fail[next_state] = 0
+                self._output[next_state] += self._output[self._fail[next_state]]
+
+    def find_all(self, text: str) -> List[Tuple[int, int]]:
+        """
+        Return (start, end) spans of terms found as whole words.
+
+        A match must not be preceded or followed by a word character, like the regex
+        Presidio builds for deny lists. Overlapping matches are resolved leftmost-longest.
+        """
+        goto, fail, output = self._goto, self._fail, self._output
+        case_sensitive = self.case_sensitive
+        candidates: List[Tuple[int, int]] = []
+
+        state = 0
+        for index, char in enumerate(text):
+            char = _fold(char, case_sensitive)
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+
+            end = index + 1
+            for length in output[state]:
+                start = end - length
+                if (start == 0 or not _is_word_char(text[start - 1])) and (
+                    end == len(text) or not _is_word_char(text[end])
+                ):
+                    candidates.append((start, end))
+
+        spans: List[Tuple[int, int]] = []
+        last_end = 0
+        for start, end in sorted(candidates, key=lambda span: (span[0], -span[1])):
+            if start >= last_end:
+                spans.append((start, end))
+                last_end = end
+        return spans
+
+
+def load_deny_list_file(path: Path) -> List[str]:
+    """Read one term per line, skipping blank lines and # comments"""
+    with open(path, "r", encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
+
+class DenyListRecognizer(LocalRecognizer):
+    """
+    Deny-list recognizer backed by an Aho-Corasick automaton instead of one large regex.
+
+    Args:
+        supported_entity (str): The entity reported for every match
+        deny_list (list): Terms to detect
+        name (str): Name of the recognizer
+        supported_language (str): Language of the recognizer
+        context (list): Context words used to enhance the score
+        deny_list_score (float): Score given to every match
+        case_sensitive (bool): Match terms with their exact case, false by default
+    """
+
+    def __init__(
+        self,
+        supported_entity: str,
+        deny_list: List[str],
+        name: Optional[str] = None,
+        supported_language: str = "en",
+        context: Optional[List[str]] = None,
+        deny_list_score: float = 1.0,
+        case_sensitive: bool = False,
+    ):
+        if not supported_entity:
+            raise ValueError("Deny list recognizer should be initialized with entity")
+        if not deny_list:
+            raise ValueError("Deny list recognizer should be initialized with terms")
+
+        self.deny_list_score = deny_list_score
+        self.automaton = DenyListAutomaton(deny_list, case_sensitive=case_sensitive)
+        super().__init__(
+            supported_entities=[supported_entity],
+            name=name,
+            supported_language=supported_language,
+            context=context,
+        )
+
+    @classmethod
+    def from_dict(
+        cls, recognizer_dict: Dict, base_path: Optional[Path] = None
+    ) -> "DenyListRecognizer":
+        """
+        Create the recognizer from its config entry.
+
+        Terms come from `deny_list`, `deny_list_file` (relative to base_path), or both.
+        """
+        deny_list = list(recognizer_dict.get("deny_list") or [])
+        deny_list_file = recognizer_dict.get("deny_list_file")
+        if deny_list_file:
+            path = Path(deny_list_file)
+            if base_path and not path.is_absolute():
+                path = Path(base_path) / path
+            deny_list.extend(load_deny_list_file(path))
+
+        return cls(
+            supported_entity=recognizer_dict.get("supported_entity"),
+            deny_list=deny_list,
+            name=recognizer_dict.get("name"),
+            supported_language=recognizer_dict.get("supported_language", "en"),
+            context=recognizer_dict.get("context"),
+            deny_list_score=recognizer_dict.get("deny_list_score", 1.0),
+            case_sensitive=recognizer_dict.get("case_sensitive", False),
+        )
+
+    def load(self) -> None:
+        pass
+
+    def analyze(
+        self,
+        text: str,
+        entities: List[str],
+        nlp_artifacts: Optional[NlpArtifacts] = None,
+    ) -> List[RecognizerResult]:
+        return [
+            RecognizerResult(
+                entity_type=self.supported_entities[0],
+                start=start,
+                end=end,
+                score=self.deny_list_score,
+                analysis_explanation=AnalysisExplanation(
+                    recognizer=self.name,
+                    original_score=self.deny_list_score,
+                    textual_explanation=f"Detected by `{self.name}` using deny list",
+                ),
+                recognition_metadata={
+                    RecognizerResult.RECOGNIZER_NAME_KEY: self.name,
+                    RecognizerResult.RECOGNIZER_IDENTIFIER_KEY: self.id,
+                },
+            )
+            for start, end in self.automaton.find_all(text)
+        ]
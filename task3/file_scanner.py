@@ -0,0 +1,348 @@
+import argparse
+import json
+import mmap
+import struct
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+from chunking import DEFAULT_MAX_CHUNK_SIZE
+
+# Entity index layout: MAGIC, then one fixed-width little-endian record per entity
+# (byte offset, byte length, entity type ID, score), then a JSON footer with the entity
+# type names, its length as an unsigned 32-bit integer and MAGIC again. The records can
+# be read without this module, e.g. as a numpy structured array of dtype
+# [("start", "<u8"), ("length", "<u4"), ("type", "<u2"), ("score", "<f4")].
+MAGIC: bytes = b"PPTIDX01"
+ENTITY_RECORD = struct.Struct("<QIHf")
+FOOTER_LENGTH = struct.Struct("<I")
+# Records longer than this are split at whitespace, a decoded record is never longer
+# than a chunk of the scanner
+DEFAULT_MAX_RECORD_BYTES: int = DEFAULT_MAX_CHUNK_SIZE
+# Bytes of records decoded and analyzed together
+DEFAULT_WINDOW_BYTES: int = 4 * 1024 * 1024
+REDACTION_METHODS: Tuple[str, ...] = ("mask", "replace")
+WHITESPACE_BYTES: Tuple[bytes, ...] = (b" ", b"\t", b"\r")
+
+PathLike = Union[str, Path]
+
+
+@dataclass(frozen=True, slots=True)
+class IndexedEntity:
+    """An entity of the index, located by byte offsets in the scanned file"""
+
+    start: int
+    end: int
+    type: str
+    score: float
+
+
+class EntityIndexWriter:
+    """
+    Streams entities to an index file, so that memory does not grow with their number.
+
+    Entities are expected in file order. Use as a context manager, the footer is only
+    written on a clean exit.
+    """
+
+    def __init__(self, path: PathLike, source_size: int):
+        self.path = path
+        self.source_size = source_size
+        self.count = 0
+        self.type_ids: Dict[str, int] = {}
+        self._file = open(path, "wb")
+        self._file.write(MAGIC)
+
+    def add(self, start: int, end: int, entity_type: str, score: float) -> None:
+        type_id = self.type_ids.get(entity_type)
+        if type_id is None:
+            type_id = self.type_ids[entity_type] = len(self.type_ids)
+        self._file.write(ENTITY_RECORD.pack(start, end - start, type_id, score))
+        self.count += 1
+
+    def close(self) -> None:
+        footer = json.dumps(
+            {
+                "entity_types": list(self.type_ids),
+                "entities": self.count,
+                "source_size": self.source_size,
+            }
+        ).encode("utf-8")
+        self._file.write(footer + FOOTER_LENGTH.pack(len(footer)) + MAGIC)
+        self._file.close()
+
+    def __enter__(self) -> "EntityIndexWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self._file.close()
+
+
+class EntityIndex:
+    """
+    Read-only view of an index file, memory-mapped so entities are decoded as iterated.
+
+    Attributes:
+        entity_types (list): Entity type names, by type ID
+        source_size (int): Size in bytes of the file the index was built for
+    """
+
+    def __init__(self, path: PathLike):
+        with open(path, "rb") as f:
+            self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        tail = len(MAGIC) + FOOTER_LENGTH.size
+        if (
+            len(self._data) < len(MAGIC) + tail
+            or self._data[: len(MAGIC)] != MAGIC
+            or self._data[-len(MAGIC) :] != MAGIC
+        ):
+            self._data.close()
+            raise ValueError(f"Not an entity index: {path}")
+
+        (footer_length,) = FOOTER_LENGTH.unpack_from(self._data, len(self._data) - tail)
+        self._records_end = len(self._data) - tail - footer_length
+        footer = json.loads(self._data[self._records_end : len(self._data) - tail])
+        self.entity_types: List[str] = footer["entity_types"]
+        self.source_size: int = footer["source_size"]
+
+    def __len__(self) -> int:
+        return (self._records_end - len(MAGIC)) // ENTITY_RECORD.size
+
+    def __iter__(self) -> Iterator[IndexedEntity]:
+        with memoryview(self._data)[len(MAGIC) : self._records_end] as records:
+            for start, length, type_id, score in ENTITY_RECORD.iter_unpack(records):
+                yield IndexedEntity(
+                    start, start + length, self.entity_types[type_id], score
+                )
+
+    def close(self) -> None:
+        self._data.close()
+
+    def __enter__(self) -> "EntityIndex":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+
+def iter_records(
+    data: mmap.mmap, max_record_bytes: int = DEFAULT_MAX_RECORD_BYTES
+) -> Iterator[Tuple[int, int]]:
+    """
+    Yield the (start, end) byte ranges of the lines of a memory-mapped file, without
+    their line break. Lines longer than max_record_bytes are split at the last
+    whitespace, else at the last UTF-8 character boundary, before the limit.
+    """
+    size = len(data)
+    position = 0
+    while position < size:
+        limit = position + max_record_bytes
+        newline = data.find(b"\n", position, min(size, limit + 1))
+        if newline >= 0:
+            yield position, newline
+            position = newline + 1
+            continue
+        if limit >= size:
+            yield position, size
+            return
+
+        end = max(data.rfind(space, position, limit) for space in WHITESPACE_BYTES)
+        if end <= position:
+            end = limit
+            # Never cut a multi-byte character: back off its continuation bytes
+            while end > position + 1 and data[end] & 0xC0 == 0x80:
+                end -= 1
+        yield position, end
+        position = end
+
+
+def iter_windows(
+    data: mmap.mmap,
+    window_bytes: int = DEFAULT_WINDOW_BYTES,
+    max_record_bytes: int = DEFAULT_MAX_RECORD_BYTES,
+) -> Iterator[Tuple[List[int], List[str]]]:
+    """
+    Yield the non-empty records of a memory-mapped file in windows of about
+    window_bytes, as their start offsets and decoded texts. Only one window is decoded
+    at a time. Invalid UTF-8 is decoded with surrogate escapes, so byte offsets can be
+    recovered exactly.
+    """
+    starts: List[int] = []
+    texts: List[str] = []
+    size = 0
+    for start, end in iter_records(data, max_record_bytes):
+        if end == start:
+            continue
+        starts.append(start)
+        texts.append(data[start:end].decode("utf-8", "surrogateescape"))
+        size += end - start
+        if size >= window_bytes:
+            yield starts, texts
+            starts, texts, size = [], [], 0
+    if starts:
+        yield starts, texts
+
+
+def byte_offsets(text: str, offsets: List[int]) -> List[int]:
+    """Map character offsets of a decoded record to byte offsets in the record"""
+    if text.isascii():
+        return offsets
+    return [len(text[:offset].encode("utf-8", "surrogateescape")) for offset in offsets]
+
+
+def _merged_spans(index: EntityIndex) -> Iterator[Tuple[int, int, str]]:
+    """Overlapping entities of the index as single spans, typed after the first of them"""
+    current = None
+    for entity in index:
+        if current and entity.start < current[1]:
+            current = (current[0], max(current[1], entity.end), current[2])
+            continue
+        if current:
+            yield current
+        current = (entity.start, entity.end, entity.type)
+    if current:
+        yield current
+
+
+def redact_file(
+    source_path: PathLike,
+    index_path: PathLike,
+    output_path: Optional[PathLike] = None,
+    method: str = "mask",
+    masking_char: str = "*",
+) -> int:
+    """
+    Redact the entities of an index from the file it was built for.
+
+    Without output_path the source file is masked in place, through a writable memory
+    map, which keeps its size and every byte offset. Otherwise the untouched regions
+    between entities are copied to output_path in bulk, straight from the memory map,
+    and each entity is masked or replaced with <ENTITY_TYPE>.
+
+    Args:
+        source_path (str): The scanned file.
+        index_path (str): Its entity index, from PrivacyScanner.scan_file.
+        output_path (str): Where to write the redacted copy, None to redact in place.
+        method (str): "mask" replaces every byte with masking_char, "replace" writes the entity type.
+        masking_char (str): A single ASCII character.
+
+    Returns:
+        int: The number of spans redacted, overlapping entities counting as one.
+    """
+    if method not in REDACTION_METHODS:
+        raise ValueError(
+            f"Invalid redaction method: {method}. Must be one of {list(REDACTION_METHODS)}"
+        )
+    if output_path is None and method != "mask":
+        raise ValueError("In-place redaction can only mask, replacing changes offsets")
+    if len(masking_char) != 1 or not masking_char.isascii():
+        raise ValueError("masking_char must be a single ASCII character")
+    mask = masking_char.encode("ascii")
+
+    spans = 0
+    with EntityIndex(index_path) as index, open(
+        source_path, "rb" if output_path else "r+b"
+    ) as source:
+        size = Path(source_path).stat().st_size
+        if size != index.source_size:
+            raise ValueError(
+                f"The index was built for a file of {index.source_size} bytes, "
+                f"{source_path} has {size}"
+            )
+        if size == 0:
+            if output_path:
+                Path(output_path).write_bytes(b"")
+            return 0
+
+        if output_path is None:
+            with mmap.mmap(source.fileno(), 0) as data:
+                for start, end, _ in _merged_spans(index):
+                    data[start:end] = mask * (end - start)
+                    spans += 1
+                data.flush()
+            return spans
+
+        with mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ) as data, open(
+            output_path, "wb"
+        ) as output, memoryview(data) as view:
+            position = 0
+            for start, end, entity_type in _merged_spans(index):
+                output.write(view[position:start])
+                if method == "mask":
+                    output.write(mask * (end - start))
+                else:
+                    output.write(f"<{entity_type}>".encode("utf-8"))
+                position = end
+                spans += 1
+            output.write(view[position:])
+    return spans
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Scan a large file into an entity index, and optionally redact it"
+    )
+    parser.add_argument("-input", type=str, required=True, help="File to scan")
+    parser.add_argument(
+        "-index",
+        type=str,
+        help="Entity index to write, defaults to the input path with .entities appended",
+    )
+    parser.add_argument("-config", type=str, help="Path to config file")
+    redaction = parser.add_mutually_exclusive_group()
+    redaction.add_argument(
+        "-output", type=str, help="Write a redacted copy of the input here"
+    )
+    redaction.add_argument(
+        "-in-place",
+        action="store_true",
+        help="Mask the entities in the input file itself",
+    )
+    parser.add_argument(
+        "-method",
+        type=str,
+        choices=REDACTION_METHODS,
+        default="mask",
+        help="How -output redacts entities, -in-place always masks",
+    )
+    parser.add_argument(
+        "-window-bytes",
+        type=int,
+        default=DEFAULT_WINDOW_BYTES,
+        help="Bytes of lines decoded and analyzed together",
+    )
+    args = parser.parse_args()
+
+    from scanner import PrivacyScanner
+
+    index_path = args.index or f"{args.input}.entities"
+    started = time.perf_counter()
+    stats = PrivacyScanner(args.config).scan_file(
+        args.input, index_path, window_bytes=args.window_bytes
+    )
+    elapsed = time.perf_counter() - started
+    print(
+        f"Scanned {stats['bytes']} bytes, {stats['records']} lines in {elapsed:.2f}s "
+        f"({stats['bytes'] / 1e6 / max(elapsed, 1e-9):.1f} MB/s), "
+        f"{stats['entities']} entities indexed in {index_path}",
+        file=sys.stderr,
+    )
+
+    if args.output or args.in_place:
+        spans = redact_file(
+            args.input,
+            index_path,
+            None if args.in_place else args.output,
+            method="mask" if args.in_place else args.method,
+        )
+        print(f"Redacted {spans} spans", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
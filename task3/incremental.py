@@ -0,0 +1,244 @@
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from chunking import SENTENCE_BOUNDARY, WHITESPACE
+
+# Characters of unchanged text re-analyzed on each side of an edit, so that entities
+# whose context words the edit touched are re-scored
+DEFAULT_CONTEXT_MARGIN: int = 100
+# How far to look for the sentence boundary a re-analyzed window is extended to
+MAX_SENTENCE_LENGTH: int = 1_000
+# Block size of the common prefix and suffix search, compared in a single slice each
+COMPARE_BLOCK_SIZE: int = 4_096
+
+LINE_BREAK = re.compile(r"\n+")
+
+
+@dataclass(frozen=True)
+class TextEdit:
+    """Replacement of previous_text[start:end] with text"""
+
+    start: int
+    end: int
+    text: str
+
+    @property
+    def delta(self) -> int:
+        """How much the offsets after the edit move"""
+        return len(self.text) - (self.end - self.start)
+
+    @property
+    def new_end(self) -> int:
+        """End of the inserted text in the edited text"""
+        return self.start + len(self.text)
+
+    @classmethod
+    def from_dict(cls, edit: Any) -> "TextEdit":
+        """Parse an {"start", "end", "text"} edit, raising ValueError when invalid"""
+        if not isinstance(edit, dict):
+            raise ValueError("'edit' must be an object with start, end and text")
+        start, end, text = edit.get("start"), edit.get("end"), edit.get("text", "")
+        if (
+            not all(
+                isinstance(offset, int) and not isinstance(offset, bool)
+                for offset in (start, end)
+            )
+            or not 0 <= start <= end
+            or not isinstance(text, str)
+        ):
+            raise ValueError(
+                "Invalid edit: start and end must be offsets with start <= end, text a string"
+            )
+        return cls(start=start, end=end, text=text)
+
+    def apply(self, previous_text: str) -> str:
+        if self.end > len(previous_text):
+            raise ValueError(
+                f"Invalid edit: end {self.end} is past the previous text length {len(previous_text)}"
+            )
+        return previous_text[: self.start] + self.text + previous_text[self.end :]
+
+
+def _common_prefix_length(first: str, second: str) -> int:
+    limit = min(len(first), len(second))
+    start = 0
+    # Whole blocks are compared at C speed, only the differing block character by character
+    while start < limit:
+        end = min(start + COMPARE_BLOCK_SIZE, limit)
+        if first[start:end] != second[start:end]:
+            while first[start] == second[start]:
+                start += 1
+            return start
+        start = end
+    return limit
+
+
+def _common_suffix_length(first: str, second: str, limit: int) -> int:
+    length = 0
+    while length < limit:
+        block = min(COMPARE_BLOCK_SIZE, limit - length)
+        first_block = first[len(first) - length - block : len(first) - length]
+        second_block = second[len(second) - length - block : len(second) - length]
+        if first_block != second_block:
+            while first[-length - 1] == second[-length - 1]:
+                length += 1
+            return length
+        length += block
+    return limit
+
+
+def find_edit(previous_text: str, text: str) -> Optional[TextEdit]:
+    """
+    Return the smallest single edit turning previous_text into text, None if they are equal.
+
+    Args:
+        previous_text (str): The text before the edit.
+        text (str): The text after the edit.
+
+    Returns:
+        TextEdit: Covers everything between the common prefix and the common suffix.
+    """
+    if previous_text == text:
+        return None
+    prefix = _common_prefix_length(previous_text, text)
+    suffix = _common_suffix_length(
+        previous_text, text, min(len(previous_text), len(text)) - prefix
+    )
+    return TextEdit(
+        start=prefix,
+        end=len(previous_text) - suffix,
+        text=text[prefix : len(text) - suffix],
+    )
+
+
+def _sentence_start(text: str, position: int) -> int:
+    """Offset right after the last sentence end, else line break or whitespace, before position"""
+    lower = max(0, position - MAX_SENTENCE_LENGTH)
+    for pattern in (SENTENCE_BOUNDARY, LINE_BREAK, WHITESPACE):
+        boundary = -1
+        for match in pattern.finditer(text, lower, position):
+            boundary = match.end()
+        if boundary >= 0:
+            return boundary
+    return lower
+
+
+def _sentence_end(text: str, position: int) -> int:
+    """Offset right after the first sentence end, else line break or whitespace, after position"""
+    upper = min(len(text), position + MAX_SENTENCE_LENGTH)
+    for pattern in (SENTENCE_BOUNDARY, LINE_BREAK, WHITESPACE):
+        match = pattern.search(text, position, upper)
+        if match:
+            return match.end()
+    return upper
+
+
+def validate_entities(text: str, entities: Any) -> List[Dict]:
+    """
+    Check that entities, in the scan results layout, match the text they were found in.
+
+    Raises:
+        ValueError: If an entity is malformed or its text is not at its position.
+    """
+    if not isinstance(entities, list):
+        raise ValueError("The previous entities must be a list")
+    for entity in entities:
+        try:
+            start, end = entity["position"]
+            matches = text[start:end] == entity["text"] and 0 <= start <= end
+        except (KeyError, TypeError, ValueError):
+            matches = False
+        if not matches or not isinstance(entity.get("type"), str):
+            raise ValueError("The previous entities do not match the previous text")
+    return entities
+
+
+def _touches(entity: Dict, edit: TextEdit) -> bool:
+    entity_start, entity_end = entity["position"]
+    return entity_end >= edit.start and entity_start <= edit.end
+
+
+def rescan_window(
+    text: str,
+    edit: TextEdit,
+    previous_entities: Sequence[Dict],
+    context_margin: int = DEFAULT_CONTEXT_MARGIN,
+) -> Tuple[int, int]:
+    """
+    Return the range of the edited text to analyze again after an edit.
+
+    The range covers the inserted text, the previous entities it touches and the
+    context margin on each side, extended to sentence boundaries. Previous entities
+    crossing its ends are included whole, so every previous entity is either inside
+    the range or untouched by the edit.
+
+    Args:
+        text (str): The edited text.
+        edit (TextEdit): The edit applied to the previous text.
+        previous_entities (list): Entities of the previous text, in the scan results layout.
+        context_margin (int): Unchanged characters re-analyzed on each side of the edit.
+
+    Returns:
+        tuple: Start and end of the range, in the edited text.
+    """
+    start, end = edit.start, edit.new_end
+    for entity in previous_entities:
+        entity_start, entity_end = entity["position"]
+        # Entities next to the edit may grow, e.g. when digits are typed after a number
+        if _touches(entity, edit):
+            start = min(start, entity_start)
+            if entity_end > edit.end:
+                end = max(end, entity_end + edit.delta)
+
+    start = _sentence_start(text, max(0, start - context_margin))
+    end = _sentence_end(text, min(len(text), end + context_margin))
+
+    for entity in previous_entities:
+        if _touches(entity, edit):
+            continue
+        entity_start, entity_end = entity["position"]
+        if entity_start >= edit.end:
+            entity_start, entity_end = (
+                entity_start + edit.delta,
+                entity_end + edit.delta,
+            )
+        if entity_start < start < entity_end:
+            start = entity_start
+        if entity_start < end < entity_end:
+            end = entity_end
+    return start, end
+
+
+def merge_rescanned_entities(
+    edit: TextEdit,
+    previous_entities: Sequence[Dict],
+    window: Tuple[int, int],
+    window_entities: List[Dict],
+) -> List[Dict]:
+    """
+    Combine the previous entities left untouched by an edit with those found again.
+
+    Args:
+        edit (TextEdit): The edit applied to the previous text.
+        previous_entities (list): Entities of the previous text.
+        window (tuple): The range analyzed again, in the edited text.
+        window_entities (list): Entities of that range, with offsets in the edited text.
+
+    Returns:
+        list: Entities of the edited text, in text order.
+    """
+    start, end = window
+    entities = list(window_entities)
+    for entity in previous_entities:
+        entity_start, entity_end = entity["position"]
+        if entity_end <= start:
+            entities.append(entity)
+        elif entity_start >= edit.end and entity_start + edit.delta >= end:
+            entities.append(
+                {
+                    **entity,
+                    "position": [entity_start + edit.delta, entity_end + edit.delta],
+                }
+            )
+    entities.sort(key=lambda entity: (entity["position"], entity["type"]))
+    return entities
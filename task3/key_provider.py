@@ -0,0 +1,204 @@
+import base64
+import binascii
+import json
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Mapping, Optional, Union
+
+from Crypto.Cipher import AES
+
+KEY_SIZES = (16, 24, 32)
+NONCE_SIZE: int = 12
+TAG_SIZE: int = 16
+# PRIVACY_KEY_<ID>=<key> defines a key, PRIVACY_CURRENT_KEY_ID picks the one to encrypt with
+KEY_ENV_PREFIX: str = "PRIVACY_KEY_"
+CURRENT_KEY_ENV: str = "PRIVACY_CURRENT_KEY_ID"
+# JSON file of the form {"current": "<id>", "keys": {"<id>": "<key>"}}
+KEYS_FILE_ENV: str = "PRIVACY_KEYS_FILE"
+KEY_ID = re.compile(r"^[A-Za-z0-9_.-]+$")
+ENCRYPTED_TOKEN = re.compile(r"<enc:([A-Za-z0-9_.-]+):([A-Za-z0-9+/]+={0,2})>")
+
+
+def format_encrypted_token(key_id: str, ciphertext: str) -> str:
+    return f"<enc:{key_id}:{ciphertext}>"
+
+
+class KeyProvider:
+    """
+    Encryption keys by ID, one of them current, used to encrypt and decrypt PII values.
+
+    Values are encrypted with AES-GCM and a random nonce, and wrapped in a
+    self-describing token, <enc:KEY_ID:BASE64(NONCE + CIPHERTEXT + TAG)>, so that
+    encrypted spans can be found and reversed in any text without their positions.
+    The key ID is authenticated along with the value: a token that was altered, or
+    moved to another key ID, fails to decrypt as a whole instead of decrypting to
+    something else. Rotating adds a key and makes it current, tokens of older keys
+    stay decryptable.
+
+    Attributes:
+        current_key_id (str): ID of the key new values are encrypted with
+    """
+
+    def __init__(
+        self,
+        keys: Mapping[str, Union[str, bytes]],
+        current_key_id: Optional[str] = None,
+    ):
+        if not keys:
+            raise ValueError("No encryption keys given")
+        if current_key_id is None:
+            if len(keys) > 1:
+                raise ValueError("The current key ID is required with several keys")
+            current_key_id = next(iter(keys))
+
+        self._keys: Dict[str, bytes] = {}
+        self._rotation_listeners: List[Callable[[], None]] = []
+        self._lock = threading.Lock()
+        for key_id, key in keys.items():
+            self._keys[key_id] = self._check_key(key_id, key)
+        if current_key_id not in self._keys:
+            raise ValueError(f"Unknown current key ID: {current_key_id}")
+        self.current_key_id = current_key_id
+
+    @staticmethod
+    def _check_key(key_id: str, key: Union[str, bytes]) -> bytes:
+        if not isinstance(key_id, str) or not KEY_ID.match(key_id):
+            raise ValueError(
+                f"Invalid key ID: {key_id!r}, use letters, digits, '_', '.' or '-'"
+            )
+        if isinstance(key, str):
+            key = key.encode("utf-8")
+        if not isinstance(key, bytes) or len(key) not in KEY_SIZES:
+            raise ValueError(
+                f"Invalid key {key_id}: must be 128, 192 or 256 bits (16, 24 or 32 bytes)"
+            )
+        return key
+
+    @classmethod
+    def from_env(cls, environ: Optional[Mapping[str, str]] = None) -> "KeyProvider":
+        """Load the PRIVACY_KEY_<ID> keys and the PRIVACY_CURRENT_KEY_ID of the environment"""
+        environ = os.environ if environ is None else environ
+        keys = {
+            name[len(KEY_ENV_PREFIX) :]: value
+            for name, value in environ.items()
+            if name.startswith(KEY_ENV_PREFIX)
+        }
+        return cls(keys, environ.get(CURRENT_KEY_ENV))
+
+    @classmethod
+    def from_file(cls, path: Union[str, Path]) -> "KeyProvider":
+        """Load a JSON keys file, {"current": "<id>", "keys": {"<id>": "<key>"}}"""
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if not isinstance(data, dict) or not isinstance(data.get("keys"), dict):
+            raise ValueError(f"Invalid keys file {path}: expected a 'keys' object")
+        return cls(data["keys"], data.get("current"))
+
+    @classmethod
+    def generate(cls, key_id: str = "generated") -> "KeyProvider":
+        """A provider with a random 256-bit key, for values that are never stored"""
+        return cls({key_id: os.urandom(32)})
+
+    @property
+    def key_ids(self) -> List[str]:
+        return list(self._keys)
+
+    def on_rotate(self, listener: Callable[[], None]) -> None:
+        """Call listener after every rotation, e.g. to drop outputs of the previous key"""
+        self._rotation_listeners.append(listener)
+
+    def rotate(self, key_id: str, key: Union[str, bytes]) -> None:
+        """Add a key and encrypt with it from now on, keeping the previous keys to decrypt"""
+        key = self._check_key(key_id, key)
+        with self._lock:
+            if key_id in self._keys:
+                raise ValueError(f"Key ID already in use: {key_id}")
+            self._keys[key_id] = key
+            self.current_key_id = key_id
+        for listener in self._rotation_listeners:
+            listener()
+
+    def encrypt(self, text: str) -> str:
+        """Encrypt a value with the current key, returning its encrypted token"""
+        key_id = self.current_key_id
+        nonce = os.urandom(NONCE_SIZE)
+        cipher = AES.new(
+            self._keys[key_id], AES.MODE_GCM, nonce=nonce, mac_len=TAG_SIZE
+        )
+        cipher.update(key_id.encode("ascii"))
+        encrypted, tag = cipher.encrypt_and_digest(text.encode("utf-8"))
+
+        ciphertext = base64.b64encode(nonce + encrypted + tag).decode("ascii")
+        return format_encrypted_token(key_id, ciphertext)
+
+    def _decrypt(self, key_id: str, ciphertext: str) -> str:
+        key = self._keys.get(key_id)
+        if key is None:
+            raise ValueError(f"Unknown encryption key: {key_id}")
+        try:
+            data = base64.b64decode(ciphertext, validate=True)
+        except binascii.Error:
+            data = b""
+        if len(data) < NONCE_SIZE + TAG_SIZE:
+            raise ValueError("Invalid encrypted token")
+
+        cipher = AES.new(key, AES.MODE_GCM, nonce=data[:NONCE_SIZE], mac_len=TAG_SIZE)
+        cipher.update(key_id.encode("ascii"))
+        try:
+            # The tag is checked before anything of the value is returned
+            plain = cipher.decrypt_and_verify(
+                data[NONCE_SIZE:-TAG_SIZE], data[-TAG_SIZE:]
+            )
+            return plain.decode("utf-8")
+        except (ValueError, UnicodeDecodeError):
+            raise ValueError("Invalid encrypted token")
+
+    def decrypt(self, token: str) -> str:
+        """Decrypt a single encrypted token"""
+        match = ENCRYPTED_TOKEN.fullmatch(token)
+        if match is None:
+            raise ValueError("Invalid encrypted token")
+        return self._decrypt(*match.groups())
+
+    def decrypt_text(self, text: str, cache: Optional[Dict[str, str]] = None) -> str:
+        """
+        Replace every encrypted token of a text with its decrypted value.
+
+        Args:
+            text (str): Text with encrypted tokens
+            cache (dict): Optional decrypted values by token, to share between the texts
+                of a batch so repeated tokens are decrypted once
+
+        Returns:
+            str: The text with its encrypted spans reversed
+        """
+        cache = {} if cache is None else cache
+
+        def replace(match: re.Match) -> str:
+            token = match.group(0)
+            value = cache.get(token)
+            if value is None:
+                value = cache[token] = self._decrypt(*match.groups())
+            return value
+
+        return ENCRYPTED_TOKEN.sub(replace, text)
+
+    def decrypt_texts(self, texts: Iterable[str]) -> List[str]:
+        """Decrypt the tokens of several texts, each distinct token once"""
+        cache: Dict[str, str] = {}
+        return [self.decrypt_text(text, cache) for text in texts]
+
+
+def load_key_provider(path: Optional[Union[str, Path]] = None) -> Optional[KeyProvider]:
+    """
+    Load the encryption keys from a JSON keys file, the PRIVACY_KEYS_FILE file or the
+    PRIVACY_KEY_<ID> environment variables, in that order. None when no key is configured.
+    """
+    path = path or os.environ.get(KEYS_FILE_ENV)
+    if path:
+        return KeyProvider.from_file(path)
+    if any(name.startswith(KEY_ENV_PREFIX) for name in os.environ):
+        return KeyProvider.from_env()
+    return None
@@ -0,0 +1,316 @@
+import hashlib
+import hmac
+import os
+import sqlite3
+import sys
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+DEFAULT_CACHE_ENTRIES: int = 100_000
+# Secret the digests of a SQLite store are keyed with
+SECRET_ENV: str = "PRIVACY_MAPPING_SECRET"
+# Stays below SQLite's limit on the number of parameters of a statement
+SQLITE_MAX_PARAMETERS: int = 500
+SQLITE_TIMEOUT_SECONDS: float = 30.0
+
+
+def format_token(entity_type: str, number: int) -> str:
+    return f"<{entity_type}_{number}>"
+
+
+class MappingStore(ABC):
+    """
+    Base class of the stores that map (entity type, value) pairs to surrogate tokens.
+
+    The first value seen for an entity type gets <ENTITY_TYPE_1>, the next one
+    <ENTITY_TYPE_2>, and so on. Once assigned, a token never changes, so every
+    occurrence of a value is pseudonymized the same way.
+    """
+
+    @abstractmethod
+    def get_tokens(self, entity_type: str, values: Iterable[str]) -> Dict[str, str]:
+        """Return the token of every value, assigning tokens to unseen values"""
+
+    @abstractmethod
+    def stats(self) -> Dict[str, int]:
+        """Return the counters reported by /stats"""
+
+    def close(self) -> None:
+        pass
+
+
+class InMemoryMappingStore(MappingStore):
+    """
+    Mapping store kept in the memory of the process, consistent for its lifetime.
+
+    Unbounded by default. With `max_entries`, the least recently used value is
+    forgotten when the store is full, and gets a new token when seen again, as numbers
+    are never reused. The first eviction is reported on stderr, since the same value
+    then has two tokens.
+
+    Attributes:
+        max_entries (int): Number of values remembered, None for no limit
+        assigned (int): Tokens assigned
+        evicted (int): Values forgotten to stay within max_entries
+    """
+
+    def __init__(self, max_entries: Optional[int] = None):
+        if max_entries is not None and max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+
+        self.max_entries = max_entries
+        self.assigned: int = 0
+        self.evicted: int = 0
+        self._tokens: "OrderedDict[Tuple[str, str], str]" = OrderedDict()
+        self._counters: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def get_tokens(self, entity_type: str, values: Iterable[str]) -> Dict[str, str]:
+        tokens = {}
+        with self._lock:
+            for value in values:
+                key = (entity_type, value)
+                token = self._tokens.get(key)
+                if token is None:
+                    number = self._counters.get(entity_type, 0) + 1
+                    self._counters[entity_type] = number
+                    token = self._tokens[key] = format_token(entity_type, number)
+                    self.assigned += 1
+                else:
+                    self._tokens.move_to_end(key)
+                tokens[value] = token
+
+            if self.max_entries is not None:
+                while len(self._tokens) > self.max_entries:
+                    self._tokens.popitem(last=False)
+                    if not self.evicted:
+                        print(
+                            f"Warning: the mapping store is full ({self.max_entries} "
+                            "values), forgotten values get new tokens. Use a SQLite "
+                            "mapping store to keep every token",
+                            file=sys.stderr,
+                        )
+                    self.evicted += 1
+        return tokens
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._tokens),
+            "assigned": self.assigned,
+            "evicted": self.evicted,
+        }
+
+
+class SQLiteMappingStore(MappingStore):
+    """
+    Mapping store in a SQLite file, shared by the processes of a job on the same machine.
+
+    Values are stored as HMAC-SHA256 digests keyed with `secret`, never in clear, so the
+    file cannot be reversed by hashing candidate values without the secret. The file
+    records a digest of the secret itself and refuses to open with another one. Lookups
+    go through an LRU cache of `cache_entries` tokens, then a single query per batch of
+    values. Unseen values of a batch are assigned in one write transaction, which
+    SQLite serializes between processes, so concurrent workers agree on every token.
+
+    Attributes:
+        path (Path): The SQLite database file
+        cache_entries (int): Number of tokens kept in memory
+        hits (int): Values served from the cache
+        misses (int): Values looked up in the database
+        assigned (int): Tokens assigned by this process
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        secret: Union[str, bytes],
+        cache_entries: int = DEFAULT_CACHE_ENTRIES,
+    ):
+        if cache_entries < 1:
+            raise ValueError("cache_entries must be at least 1")
+        if not secret:
+            raise ValueError("A SQLite mapping store needs a secret")
+
+        self.path = Path(path)
+        self._secret = secret.encode("utf-8") if isinstance(secret, str) else secret
+        self.cache_entries = cache_entries
+        self.hits: int = 0
+        self.misses: int = 0
+        self.assigned: int = 0
+        self._cache: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+
+        connection = self._connection()
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS mappings "
+            "(digest TEXT PRIMARY KEY, token TEXT NOT NULL) WITHOUT ROWID"
+        )
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS counters "
+            "(entity_type TEXT PRIMARY KEY, last INTEGER NOT NULL)"
+        )
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS settings "
+            "(name TEXT PRIMARY KEY, value TEXT NOT NULL)"
+        )
+        self._check_secret(connection)
+
+    def _check_secret(self, connection: sqlite3.Connection) -> None:
+        """Raise ValueError if the file was created with another secret"""
+        check = self._digest("", "")
+        connection.execute(
+            "INSERT OR IGNORE INTO settings (name, value) VALUES ('secret_check', ?)",
+            (check,),
+        )
+        (stored,) = connection.execute(
+            "SELECT value FROM settings WHERE name = 'secret_check'"
+        ).fetchone()
+        if not hmac.compare_digest(stored, check):
+            self.close()
+            raise ValueError(
+                f"Mapping store {self.path} was created with another secret"
+            )
+
+    def _connection(self) -> sqlite3.Connection:
+        """One connection per thread, in autocommit mode"""
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(
+                self.path,
+                timeout=SQLITE_TIMEOUT_SECONDS,
+                isolation_level=None,
+                check_same_thread=False,
+            )
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+            with self._lock:
+                self._connections.append(connection)
+        return connection
+
+    def _digest(self, entity_type: str, value: str) -> str:
+        data = f"{entity_type}\0{value}".encode("utf-8", "surrogatepass")
+        return hmac.new(self._secret, data, hashlib.sha256).hexdigest()
+
+    def _select(
+        self, connection: sqlite3.Connection, digests: List[str]
+    ) -> Dict[str, str]:
+        found = {}
+        for start in range(0, len(digests), SQLITE_MAX_PARAMETERS):
+            chunk = digests[start : start + SQLITE_MAX_PARAMETERS]
+            placeholders = ",".join("?" * len(chunk))
+            found.update(
+                connection.execute(
+                    f"SELECT digest, token FROM mappings WHERE digest IN ({placeholders})",
+                    chunk,
+                )
+            )
+        return found
+
+    def _assign(
+        self, connection: sqlite3.Connection, entity_type: str, digests: List[str]
+    ) -> Dict[str, str]:
+        """Assign tokens to the digests in one transaction, keeping those assigned meanwhile"""
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            found = self._select(connection, digests)
+            new_digests = [digest for digest in digests if digest not in found]
+            row = connection.execute(
+                "SELECT last FROM counters WHERE entity_type = ?", (entity_type,)
+            ).fetchone()
+            last = row[0] if row else 0
+            new_rows = [
+                (digest, format_token(entity_type, last + number))
+                for number, digest in enumerate(new_digests, 1)
+            ]
+            connection.executemany(
+                "INSERT INTO mappings (digest, token) VALUES (?, ?)", new_rows
+            )
+            connection.execute(
+                "INSERT OR REPLACE INTO counters (entity_type, last) VALUES (?, ?)",
+                (entity_type, last + len(new_rows)),
+            )
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+
+        with self._lock:
+            self.assigned += len(new_rows)
+        found.update(new_rows)
+        return found
+
+    def get_tokens(self, entity_type: str, values: Iterable[str]) -> Dict[str, str]:
+        digests = {value: self._digest(entity_type, value) for value in values}
+
+        tokens_by_digest = {}
+        with self._lock:
+            for digest in digests.values():
+                token = self._cache.get(digest)
+                if token is not None:
+                    self._cache.move_to_end(digest)
+                    tokens_by_digest[digest] = token
+            self.hits += len(tokens_by_digest)
+            self.misses += len(digests) - len(tokens_by_digest)
+
+        missing = [
+            digest for digest in digests.values() if digest not in tokens_by_digest
+        ]
+        if missing:
+            connection = self._connection()
+            found = self._select(connection, missing)
+            unassigned = [digest for digest in missing if digest not in found]
+            if unassigned:
+                found.update(self._assign(connection, entity_type, unassigned))
+            tokens_by_digest.update(found)
+
+            with self._lock:
+                self._cache.update(found)
+                while len(self._cache) > self.cache_entries:
+                    self._cache.popitem(last=False)
+
+        return {value: tokens_by_digest[digest] for value, digest in digests.items()}
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "cache_entries": len(self._cache),
+                "hits": self.hits,
+                "misses": self.misses,
+                "assigned": self.assigned,
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            for connection in self._connections:
+                connection.close()
+            self._connections.clear()
+        self._local = threading.local()
+
+
+def open_mapping_store(
+    path: Optional[Union[str, Path]] = None,
+    secret: Optional[str] = None,
+    max_entries: Optional[int] = None,
+) -> MappingStore:
+    """
+    Return a SQLite mapping store for a path, an in-memory one of at most max_entries
+    values otherwise, None for no limit.
+
+    The secret of a SQLite store defaults to the PRIVACY_MAPPING_SECRET environment
+    variable.
+
+    Raises:
+        ValueError: If a path is given without a secret.
+    """
+    if not path:
+        return InMemoryMappingStore(max_entries)
+    secret = secret or os.environ.get(SECRET_ENV)
+    if not secret:
+        raise ValueError(f"A SQLite mapping store needs a secret, set {SECRET_ENV}")
+    return SQLiteMappingStore(path, secret)
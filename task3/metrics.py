@@ -0,0 +1,305 @@
+import math
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+DEFAULT_LATENCY_BUCKETS: Tuple[float, ...] = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+SIZE_BUCKETS: Tuple[float, ...] = (100, 1_000, 10_000, 100_000, 1_000_000)
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class Metric:
+    """
+    Base class of labelled metrics rendered in the Prometheus text format.
+
+    Attributes:
+        name (str): Name of the metric
+        documentation (str): Help text of the metric
+        label_names (tuple): Names of the labels every sample must provide
+    """
+
+    type: str = "untyped"
+
+    def __init__(self, name: str, documentation: str, label_names: Tuple[str, ...]):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._values: Dict[Tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        if set(labels) != set(self.label_names):
+            raise ValueError(
+                f"{self.name} expects labels {self.label_names}, got {tuple(labels)}"
+            )
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def _labels(self, key: Tuple[str, ...], extra: Tuple = ()) -> str:
+        pairs = list(zip(self.label_names, key)) + list(extra)
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{n}="{_escape(v)}"' for n, v in pairs) + "}"
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            return [
+                f"{self.name}{self._labels(key)} {_format_value(value)}"
+                for key, value in sorted(self._values.items())
+            ]
+
+    def render(self) -> List[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type}",
+            *self._samples(),
+        ]
+
+
+class Counter(Metric):
+    """Monotonically increasing count, such as requests served"""
+
+    type = "counter"
+
+    def inc(self, value: float = 1, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + value
+
+
+class Gauge(Metric):
+    """Value that can go up and down, such as a cache size"""
+
+    type = "gauge"
+
+    def set(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(Metric):
+    """Distribution of observed values over fixed buckets, such as stage durations"""
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        label_names: Tuple[str, ...],
+        buckets: Tuple[float, ...] = DEFAULT_LATENCY_BUCKETS,
+    ):
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * len(self.buckets), 0.0))
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+                    break
+            self._values[key] = (counts, total + value)
+
+    def _samples(self) -> List[str]:
+        samples = []
+        with self._lock:
+            for key, (counts, total) in sorted(self._values.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, counts):
+                    cumulative += count
+                    labels = self._labels(key, (("le", _format_value(bound)),))
+                    samples.append(f"{self.name}_bucket{labels} {cumulative}")
+                samples.append(f"{self.name}_sum{self._labels(key)} {repr(total)}")
+                samples.append(f"{self.name}_count{self._labels(key)} {cumulative}")
+        return samples
+
+
+class MetricsRegistry:
+    """Collection of metrics exposed together by the /metrics endpoint"""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: Metric) -> Metric:
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(
+        self, name: str, documentation: str, label_names: Tuple[str, ...] = ()
+    ) -> Counter:
+        return self._register(Counter(name, documentation, label_names))
+
+    def gauge(
+        self, name: str, documentation: str, label_names: Tuple[str, ...] = ()
+    ) -> Gauge:
+        return self._register(Gauge(name, documentation, label_names))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        label_names: Tuple[str, ...] = (),
+        buckets: Tuple[float, ...] = DEFAULT_LATENCY_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, label_names, buckets))
+
+    def render(self) -> str:
+        """Return every metric in the Prometheus text exposition format"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = [line for metric in metrics for line in metric.render()]
+        return "\n".join(lines) + "\n"
+
+
+metrics_registry = MetricsRegistry()
+
+STAGE_SECONDS = metrics_registry.histogram(
+    "privacy_scanner_stage_seconds",
+    "Time spent in each scanner stage",
+    ("stage",),
+)
+RECOGNIZER_SECONDS = metrics_registry.histogram(
+    "privacy_scanner_recognizer_seconds",
+    "Time spent in each recognizer",
+    ("recognizer",),
+)
+ENTITIES_TOTAL = metrics_registry.counter(
+    "privacy_scanner_entities_total",
+    "Entities detected, by entity type",
+    ("entity_type",),
+)
+INPUT_CHARACTERS = metrics_registry.histogram(
+    "privacy_scanner_input_characters",
+    "Length of the texts handed to the scanner",
+    ("operation",),
+    buckets=SIZE_BUCKETS,
+)
+STARTUP_SECONDS = metrics_registry.gauge(
+    "privacy_startup_seconds",
+    "Cold start duration, by phase",
+    ("phase",),
+)
+
+
+class RequestTimings:
+    """Stage and recognizer durations collected while serving a single request"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+        self.recognizers: Dict[str, float] = {}
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Durations in milliseconds, with the time elapsed since the request started"""
+        return {
+            "total_ms": round((time.perf_counter() - self.started) * 1000, 3),
+            "stages": {
+                stage: round(seconds * 1000, 3)
+                for stage, seconds in self.stages.items()
+            },
+            "recognizers": {
+                name: round(seconds * 1000, 3)
+                for name, seconds in self.recognizers.items()
+            },
+        }
+
+
+_current_timings: ContextVar[Optional[RequestTimings]] = ContextVar(
+    "privacy_request_timings", default=None
+)
+
+
+@contextmanager
+def collect_timings() -> Iterator[RequestTimings]:
+    """Collect the timings recorded by the code run inside the block"""
+    timings = RequestTimings()
+    token = _current_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _current_timings.reset(token)
+
+
+def record_stage(stage: str, seconds: float) -> None:
+    STAGE_SECONDS.observe(seconds, stage=stage)
+    timings = _current_timings.get()
+    if timings is not None:
+        timings.stages[stage] = timings.stages.get(stage, 0.0) + seconds
+
+
+@contextmanager
+def timed(stage: str) -> Iterator[None]:
+    """Record the duration of the block as the given stage"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(stage, time.perf_counter() - started)
+
+
+def timed_iter(stage: str, iterable: Iterable) -> Iterator:
+    """Yield from a lazy iterable, recording the time spent producing items as the stage"""
+    iterator = iter(iterable)
+    while True:
+        started = time.perf_counter()
+        try:
+            item = next(iterator)
+        except StopIteration:
+            return
+        finally:
+            record_stage(stage, time.perf_counter() - started)
+        yield item
+
+
+def instrument_recognizer(recognizer: Any) -> None:
+    """Wrap the recognizer's analyze method so each call is timed under its name"""
+    analyze = recognizer.analyze
+    if getattr(analyze, "instrumented", False):
+        return
+    name = recognizer.name
+
+    @wraps(analyze)
+    def timed_analyze(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return analyze(*args, **kwargs)
+        finally:
+            seconds = time.perf_counter() - started
+            RECOGNIZER_SECONDS.observe(seconds, recognizer=name)
+            timings = _current_timings.get()
+            if timings is not None:
+                timings.recognizers[name] = timings.recognizers.get(name, 0.0) + seconds
+
+    timed_analyze.instrumented = True
+    recognizer.analyze = timed_analyze
@@ -0,0 +1,133 @@
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import spacy
+from presidio_analyzer.nlp_engine import (
+    NerModelConfiguration,
+    NlpArtifacts,
+    NlpEngine,
+    NlpEngineProvider,
+    SpacyNlpEngine,
+)
+
+DEFAULT_BATCH_SIZE: int = 32
+# spaCy English pipelines by size, "large" is the model Presidio loads by default
+MODEL_TIERS: Dict[str, str] = {
+    "small": "en_core_web_sm",
+    "medium": "en_core_web_md",
+    "large": "en_core_web_lg",
+}
+DEFAULT_MODEL_TIER: str = "large"
+LANGUAGE: str = "en"
+
+_nlp_engines: Dict[Tuple[str, Tuple[str, ...]], NlpEngine] = {}
+_nlp_engine_lock = threading.Lock()
+
+
+def model_components(model_name: str) -> Tuple[str, ...]:
+    """Return the pipeline components of an installed spaCy model, read from its meta.json"""
+    path = Path(model_name)
+    if not path.exists():
+        path = spacy.util.get_package_path(model_name)
+    meta = spacy.util.get_model_meta(path)
+    return tuple(meta.get("components") or meta.get("pipeline") or ())
+
+
+class BatchSpacyNlpEngine(SpacyNlpEngine):
+    """
+    SpacyNlpEngine whose process_batch exposes the batch size of spaCy's nlp.pipe, and
+    whose pipeline can leave out components the recognizers do not need.
+    """
+
+    def __init__(
+        self,
+        models: Optional[List[Dict[str, str]]] = None,
+        ner_model_configuration: Optional[NerModelConfiguration] = None,
+        excluded_components: Tuple[str, ...] = (),
+    ):
+        super().__init__(models, ner_model_configuration)
+        self.excluded_components = excluded_components
+
+    def load(self) -> None:
+        """
+        Load the spaCy models without the excluded components, which are never run.
+
+        Raises:
+            ValueError: If a model is not installed or has no component of an excluded name.
+        """
+        self.nlp = {}
+        for model in self.models:
+            self._validate_model_params(model)
+            model_name = model["model_name"]
+            # Models are installed ahead of time, never downloaded while serving
+            if not (spacy.util.is_package(model_name) or Path(model_name).exists()):
+                raise ValueError(
+                    f"spaCy model {model_name} is not installed, "
+                    f"run: python -m spacy download {model_name}"
+                )
+            unknown = set(self.excluded_components) - set(model_components(model_name))
+            if unknown:
+                raise ValueError(
+                    f"spaCy model {model_name} has no components named {sorted(unknown)}"
+                )
+            self.nlp[model["lang_code"]] = spacy.load(
+                model_name, exclude=list(self.excluded_components)
+            )
+
+    def process_batch(
+        self,
+        texts: Iterable[str],
+        language: str,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+    ) -> Iterator[Tuple[str, NlpArtifacts]]:
+        """Run the NLP pipeline over the texts in batches, yielding (text, artifacts) in order"""
+        if not self.nlp:
+            raise ValueError("NLP engine is not loaded. Consider calling .load()")
+
+        texts = (str(text) for text in texts)
+        for doc in self.nlp[language].pipe(texts, batch_size=batch_size):
+            yield doc.text, self._doc_to_nlp_artifact(doc, language)
+
+
+def _create_nlp_engine(
+    model_name: str, excluded_components: Tuple[str, ...]
+) -> NlpEngine:
+    # Presidio's default configuration, for its NER label mapping
+    configuration = NlpEngineProvider().nlp_configuration
+    engine = BatchSpacyNlpEngine(
+        models=[{"lang_code": LANGUAGE, "model_name": model_name}],
+        ner_model_configuration=NerModelConfiguration.from_dict(
+            configuration["ner_model_configuration"]
+        ),
+        excluded_components=excluded_components,
+    )
+    engine.load()
+    return engine
+
+
+def get_nlp_engine(
+    model: str = DEFAULT_MODEL_TIER, disable: Iterable[str] = ()
+) -> NlpEngine:
+    """
+    Return the process-wide NLP engine of a model tier, loading the spaCy model on first use.
+
+    Every AnalyzerEngine built by the scanner plugs into these engines, so each model is
+    loaded once per process, for each set of disabled components, no matter how many
+    recognizer configurations use it.
+
+    Args:
+        model (str): Model tier, one of MODEL_TIERS.
+        disable (list): spaCy components left out of the pipeline, e.g. "parser".
+
+    Returns:
+        NlpEngine: The shared, loaded NLP engine.
+    """
+    key = (MODEL_TIERS[model], tuple(sorted(set(disable))))
+    engine = _nlp_engines.get(key)
+    if engine is None:
+        with _nlp_engine_lock:
+            engine = _nlp_engines.get(key)
+            if engine is None:
+                engine = _nlp_engines[key] = _create_nlp_engine(*key)
+    return engine
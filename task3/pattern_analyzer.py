@@ -0,0 +1,109 @@
+from typing import List, Optional
+import regex
+from presidio_analyzer import (
+    EntityRecognizer,
+    PatternRecognizer,
+    RecognizerRegistry,
+    RecognizerResult,
+)
+from presidio_analyzer.predefined_recognizers import PhoneRecognizer
+from deny_list_recognizer import DenyListRecognizer
+from threshold_analyzer import prune_below_threshold
+
+# Recognizers that only look at the raw text and never at NLP artifacts
+NLP_FREE_RECOGNIZERS = (PatternRecognizer, PhoneRecognizer, DenyListRecognizer)
+
+
+def requires_nlp(registry: RecognizerRegistry) -> bool:
+    """Return True if any recognizer in the registry needs tokens, lemmas or NER output"""
+    return not registry.recognizers or any(
+        not isinstance(recognizer, NLP_FREE_RECOGNIZERS)
+        for recognizer in registry.recognizers
+    )
+
+
+def nlp_free_registry(registry: RecognizerRegistry) -> RecognizerRegistry:
+    """Return a registry with only the recognizers of `registry` that never need NLP artifacts"""
+    return RecognizerRegistry(
+        recognizers=[
+            recognizer
+            for recognizer in registry.recognizers
+            if isinstance(recognizer, NLP_FREE_RECOGNIZERS)
+        ],
+        global_regex_flags=registry.global_regex_flags,
+        supported_languages=list(registry.supported_languages),
+    )
+
+
+class PatternAnalyzer:
+    """
+    Regex-only analyzer for registries made exclusively of pattern, deny-list and
+    phone number recognizers.
+
+    Exposes the subset of the AnalyzerEngine interface used by the scanner, but never
+    loads or runs the spaCy pipeline. Regexes are compiled once at construction. Since
+    there are no lemmas, context words do not boost scores; scores are only used to
+    resolve overlapping entities, so the reported entities are the same unless a score
+    threshold is given, which applies to the pattern scores.
+
+    Attributes:
+        registry (RecognizerRegistry): The registry the recognizers come from
+        nlp_engine (None): No NLP engine is used, kept for interface compatibility
+    """
+
+    nlp_engine = None
+
+    def __init__(self, registry: RecognizerRegistry, language: str):
+        self.registry = registry
+        self.recognizers: List[EntityRecognizer] = registry.get_recognizers(
+            language=language, all_fields=True
+        )
+        for recognizer in self.recognizers:
+            recognizer.load()
+            if isinstance(recognizer, PatternRecognizer):
+                self._compile_patterns(recognizer)
+
+    @staticmethod
+    def _compile_patterns(recognizer: PatternRecognizer) -> None:
+        """Precompile patterns the way PatternRecognizer compiles them lazily"""
+        # PatternRecognizer matches with the `regex` module, so compile with it too
+        for pattern in recognizer.patterns:
+            if (
+                not pattern.compiled_regex
+                or pattern.compiled_with_flags != recognizer.global_regex_flags
+            ):
+                pattern.compiled_with_flags = recognizer.global_regex_flags
+                pattern.compiled_regex = regex.compile(
+                    pattern.regex, flags=recognizer.global_regex_flags
+                )
+
+    def analyze(
+        self,
+        text: str,
+        language: str,
+        entities: Optional[List[str]] = None,
+        nlp_artifacts: None = None,
+        score_threshold: Optional[float] = None,
+    ) -> List[RecognizerResult]:
+        results: List[RecognizerResult] = []
+        for recognizer in self.recognizers:
+            if entities and not set(recognizer.supported_entities) & set(entities):
+                continue
+
+            current_results = recognizer.analyze(
+                text=text, entities=recognizer.supported_entities, nlp_artifacts=None
+            )
+            for result in current_results or []:
+                if result.recognition_metadata is None:
+                    result.recognition_metadata = {}
+                result.recognition_metadata.setdefault(
+                    RecognizerResult.RECOGNIZER_IDENTIFIER_KEY, recognizer.id
+                )
+                result.recognition_metadata.setdefault(
+                    RecognizerResult.RECOGNIZER_NAME_KEY, recognizer.name
+                )
+                results.append(result)
+
+        return EntityRecognizer.remove_duplicates(
+            prune_below_threshold(results, score_threshold)
+        )
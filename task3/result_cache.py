@@ -0,0 +1,115 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+DEFAULT_MAX_BYTES: int = 64 * 1024 * 1024
+DEFAULT_TTL_SECONDS: float = 300.0
+
+_MISSING = object()
+
+
+class ResultCache:
+    """
+    Process-wide LRU cache of scan/anonymize results with a time to live.
+
+    Entries are keyed by (config hash, method, text digest) and stored as serialized
+    JSON, which makes cached results immutable and gives an exact size in bytes. The
+    least recently used entries are evicted once `max_bytes` is exceeded, and entries
+    older than `ttl_seconds` are treated as misses.
+
+    Attributes:
+        max_bytes (int): Upper bound on the total size of cached results
+        ttl_seconds (float): How long a result stays valid
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+    ):
+        if max_bytes < 1:
+            raise ValueError("max_bytes must be at least 1")
+        if ttl_seconds <= 0:
+            raise ValueError("ttl_seconds must be positive")
+
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.size_bytes: int = 0
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+        self.expirations: int = 0
+        self._entries: "OrderedDict[Tuple[str, str, str], Tuple[float, str]]" = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(config_key: str, method: str, text: str) -> Tuple[str, str, str]:
+        """Build a cache key, the text is reduced to its sha256 digest"""
+        digest = hashlib.sha256(text.encode("utf-8", "surrogatepass")).hexdigest()
+        return config_key, method, digest
+
+    def get(self, key: Tuple[str, str, str]) -> Any:
+        """Return the cached result for key, or None on a miss"""
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is _MISSING:
+                self.misses += 1
+                return None
+
+            expires_at, payload = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+
+        return json.loads(payload)
+
+    def set(self, key: Tuple[str, str, str], value: Any) -> None:
+        """Cache a JSON serializable result, skipping results larger than the cache"""
+        payload = json.dumps(value, separators=(",", ":"))
+        if len(payload) > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, payload)
+            self.size_bytes += len(payload)
+            while self.size_bytes > self.max_bytes:
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+                self.evictions += 1
+
+    def _remove(self, key: Tuple[str, str, str]) -> None:
+        _, payload = self._entries.pop(key)
+        self.size_bytes -= len(payload)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.size_bytes = 0
+
+    def stats(self) -> Dict[str, Optional[float]]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "size_bytes": self.size_bytes,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": self.hits / lookups if lookups else None,
+            }
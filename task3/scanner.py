@@ -1,10 +1,62 @@
-from typing import List, Dict, Tuple
-from dataclasses import dataclass
-from presidio_analyzer import AnalyzerEngine
-from presidio_anonymizer import AnonymizerEngine
-from presidio_anonymizer.entities import OperatorConfig
-from config_schema import PIIRegistry
+import mmap
+import os
+import secrets
+from functools import cached_property
+from typing import (
+    TYPE_CHECKING,
+    FrozenSet,
+    Iterable,
+    Iterator,
+    List,
+    Dict,
+    Optional,
+    Set,
+    Tuple,
+)
+from presidio_analyzer.nlp_engine import NlpArtifacts
+from chunking import (
+    DEFAULT_CHUNK_OVERLAP,
+    DEFAULT_MAX_CHUNK_SIZE,
+    TextChunk,
+    merge_chunk_results,
+    split_text,
+)
+from config_schema import AnalysisOptions, PIIRegistry
+from file_scanner import (
+    DEFAULT_WINDOW_BYTES,
+    EntityIndexWriter,
+    byte_offsets,
+    iter_windows,
+)
+from incremental import (
+    TextEdit,
+    find_edit,
+    merge_rescanned_entities,
+    rescan_window,
+    validate_entities,
+)
+from key_provider import KeyProvider
+from mapping_store import InMemoryMappingStore, MappingStore
+from metrics import (
+    ENTITIES_TOTAL,
+    INPUT_CHARACTERS,
+    instrument_recognizer,
+    timed,
+    timed_iter,
+)
+from nlp_engine import DEFAULT_BATCH_SIZE, get_nlp_engine
+from result_cache import ResultCache
+from pattern_analyzer import (
+    NLP_FREE_RECOGNIZERS,
+    PatternAnalyzer,
+    nlp_free_registry,
+    requires_nlp,
+)
+from threshold_analyzer import ThresholdAnalyzerEngine
 
+if TYPE_CHECKING:
+    from bulk_anonymizer import BulkAnonymizerEngine
+    from presidio_anonymizer.entities import EngineResult, OperatorConfig
 
 DEFAULT_OPERATOR_CONFIG: Dict = {
     "replace": {"new_value": ""},
@@ -12,8 +64,15 @@ DEFAULT_OPERATOR_CONFIG: Dict = {
     "hash": {"hash_type": "sha256"},
     "mask": {"chars_to_mask": 100, "masking_char": "*", "from_end": True},
     "keep": {},
+    # The scanner's mapping store is added as the "store" parameter
+    "pseudonymize": {},
+    # The scanner's key provider is added as the "key_provider" parameter
+    "encrypt": {},
 }
 LANGUAGE: str = "en"
+# Result cache method of the texts kept for incremental re-scans
+DOCUMENT_CACHE_METHOD: str = "document"
+WARM_UP_TEXT: str = "Contact John Smith at john.smith@example.com or 212-555-0123."
 
 
 class PrivacyScannerError(Exception):
@@ -22,45 +81,394 @@ class PrivacyScannerError(Exception):
     pass
 
 
-@dataclass
-class ScanResult:
-    """Structure for scan results"""
-
-    type: str
-    position: List[int]
-    text: str
-
-
 class PrivacyScanner:
     """
     Main scanner class for privacy detection
 
     Attributes:
-        analyzer (AnalyzerEngine): An instance of AnalyzerEngine to analyze text for privacy information
-        anonymizer_engine (AnonymizerEngine): An instance of AnonymizerEngine to anonymize text
+        analyzer (ThresholdAnalyzerEngine): An AnalyzerEngine to analyze text for privacy information,
+            backed by the process-wide NLP engine of the config's model tier, or a regex-only
+            PatternAnalyzer when no enabled recognizer needs NLP artifacts
+        anonymizer_engine (BulkAnonymizerEngine): An AnonymizerEngine replacing all entities in a
+            single pass, imported and created on first use so scan-only processes never load it
+        max_chunk_size (int): Texts longer than this are analyzed in overlapping chunks
+        chunk_overlap (int): Number of characters shared by consecutive chunks
+        result_cache (ResultCache): Optional cache of results for repeated texts
+        config (CompiledConfig): The compiled recognizers configuration
+        entity_operators (dict): Operator type and parameters per entity type from the config's
+            `operators` section, applied whatever the requested method
+        config_key (str): Fingerprint of the recognizers configuration
+        analysis_options (AnalysisOptions): Score threshold, entities and entity limit from the
+            config's `analysis` section, which the options of each call override
+        mapping_store (MappingStore): Surrogate tokens of the pseudonymize method, in memory
+            unless a shared store is given
+        key_provider (KeyProvider): Keys of the encrypt method, None when no key is configured
     """
 
-    def __init__(self, config: Dict = None):
+    def __init__(
+        self,
+        config: Dict = None,
+        max_chunk_size: int = DEFAULT_MAX_CHUNK_SIZE,
+        chunk_overlap: int = DEFAULT_CHUNK_OVERLAP,
+        result_cache: Optional[ResultCache] = None,
+        mapping_store: Optional[MappingStore] = None,
+        key_provider: Optional[KeyProvider] = None,
+    ):
+        self.max_chunk_size = max_chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.result_cache = result_cache
+        self.mapping_store = mapping_store or InMemoryMappingStore()
+        self.key_provider = key_provider
+        self._anonymizer_engine: Optional["BulkAnonymizerEngine"] = None
+        self._pattern_analyzer: Optional[PatternAnalyzer] = None
+        self._operators: Dict[str, Dict[str, "OperatorConfig"]] = {}
         try:
-            self.analyzer = AnalyzerEngine(registry=PIIRegistry(config).get_registry())
-            self.anonymizer_engine = AnonymizerEngine()
+            pii_registry = PIIRegistry(config)
+            self.config = pii_registry.config
+            self.config_key = pii_registry.fingerprint
+            self.entity_operators = self._compile_entity_operators(
+                self.config.operators_config()
+            )
+            registry = pii_registry.get_registry()
+            for recognizer in registry.recognizers:
+                instrument_recognizer(recognizer)
+            if requires_nlp(registry):
+                # Model tier and disabled components from the config's nlp section
+                self.analyzer = ThresholdAnalyzerEngine(
+                    registry=registry,
+                    nlp_engine=get_nlp_engine(**self.config.nlp_config()),
+                )
+            else:
+                # Pattern-only configs skip spaCy entirely
+                self.analyzer = PatternAnalyzer(registry, LANGUAGE)
+            self.analysis_options = self.resolve_options(
+                self.config.analysis_options(), AnalysisOptions()
+            )
         except Exception as e:
             raise PrivacyScannerError(f"Failed to initialize Privacy Scanner: {str(e)}")
 
-    def _analyze_text(self, text: str) -> List:
-        """Analyze text for privacy information"""
+    @property
+    def anonymizer_engine(self) -> "BulkAnonymizerEngine":
+        if self._anonymizer_engine is None:
+            from bulk_anonymizer import BulkAnonymizerEngine
+
+            self._anonymizer_engine = BulkAnonymizerEngine()
+        return self._anonymizer_engine
+
+    @property
+    def pattern_analyzer(self) -> PatternAnalyzer:
+        """Regex-only analyzer over the recognizers of the config that need no NLP artifacts"""
+        if isinstance(self.analyzer, PatternAnalyzer):
+            return self.analyzer
+        if self._pattern_analyzer is None:
+            registry = nlp_free_registry(self.analyzer.registry)
+            if not registry.recognizers:
+                raise PrivacyScannerError("The config has no regex-only recognizers")
+            self._pattern_analyzer = PatternAnalyzer(registry, LANGUAGE)
+        return self._pattern_analyzer
+
+    @cached_property
+    def pattern_entities(self) -> FrozenSet[str]:
+        """Entity types that can be detected without running the NLP pipeline"""
+        if isinstance(self.analyzer, PatternAnalyzer):
+            registry = self.analyzer.registry
+        else:
+            registry = nlp_free_registry(self.analyzer.registry)
+        return frozenset(
+            entity
+            for recognizer in registry.recognizers
+            for entity in recognizer.supported_entities
+        )
+
+    @cached_property
+    def nlp_entities(self) -> FrozenSet[str]:
+        """Entity types detected by at least one recognizer that needs the NLP pipeline"""
+        if isinstance(self.analyzer, PatternAnalyzer):
+            return frozenset()
+        return frozenset(
+            entity
+            for recognizer in self.analyzer.registry.recognizers
+            if not isinstance(recognizer, NLP_FREE_RECOGNIZERS)
+            for entity in recognizer.supported_entities
+        )
+
+    def resolve_options(
+        self,
+        options: Optional[AnalysisOptions],
+        defaults: Optional[AnalysisOptions] = None,
+    ) -> AnalysisOptions:
+        """
+        Return the options of a call, overriding the config's analysis options.
+
+        Raises:
+            PrivacyScannerError: If an entity type is not detected by any enabled recognizer.
+        """
+        defaults = self.analysis_options if defaults is None else defaults
+        options = defaults.merge(options)
+        if options.entities:
+            unknown = set(options.entities) - self.pattern_entities - self.nlp_entities
+            if unknown:
+                raise PrivacyScannerError(
+                    f"No enabled recognizer detects entity types: {sorted(unknown)}"
+                )
+        return options
+
+    def _select_analyzer(self, options: AnalysisOptions):
+        """
+        The analyzer to run for the options: the regex-only one when no requested entity
+        type needs the NLP pipeline, so spaCy is skipped for pattern entities. Only
+        without a score threshold, since the regex-only analyzer cannot boost scores
+        with context words and would drop results the full analyzer keeps.
+        """
+        if (
+            options.entities
+            and not options.score_threshold
+            and not set(options.entities) & self.nlp_entities
+        ):
+            return self.pattern_analyzer
+        return self.analyzer
+
+    @staticmethod
+    def _check_entity_limit(results: List, options: AnalysisOptions) -> None:
+        if options.max_entities is not None and len(results) > options.max_entities:
+            raise PrivacyScannerError(
+                f"Too many entities: {len(results)}. Maximum is {options.max_entities}"
+            )
+
+    def warm_up(self) -> None:
+        """
+        Run a short text through analysis and anonymization, so that lazily initialized
+        parts (pattern compilation, spaCy caches, the anonymizer) are ready before the
+        first real request.
+        """
         try:
-            results = self.analyzer.analyze(text=text, language=LANGUAGE, entities=None)
-            return results
+            self._anonymize_results(
+                WARM_UP_TEXT, self._analyze_text(WARM_UP_TEXT), "replace"
+            )
+        except PrivacyScannerError:
+            raise
+        except Exception as e:
+            raise PrivacyScannerError(f"Warm-up failed: {str(e)}")
+
+    def _analyze_text(
+        self, text: str, options: Optional[AnalysisOptions] = None
+    ) -> List:
+        """Analyze text for privacy information, with options already resolved"""
+        options = options or self.analysis_options
+        analyzer = self._select_analyzer(options)
+        try:
+            if len(text) > self.max_chunk_size:
+                results = self._analyze_chunked_text(text, analyzer, options)
+            else:
+                nlp_artifacts = None
+                if analyzer.nlp_engine is not None:
+                    with timed("nlp"):
+                        nlp_artifacts = analyzer.nlp_engine.process_text(text, LANGUAGE)
+
+                with timed("recognizers"):
+                    results = analyzer.analyze(
+                        text=text,
+                        language=LANGUAGE,
+                        entities=options.entities,
+                        nlp_artifacts=nlp_artifacts,
+                        score_threshold=options.score_threshold,
+                    )
         except Exception as e:
             raise PrivacyScannerError(f"Text analysis failed: {str(e)}")
 
-    def scan_text(self, text: str) -> List:
+        self._check_entity_limit(results, options)
+        return results
+
+    def _analyze_chunked_text(
+        self, text: str, analyzer, options: AnalysisOptions
+    ) -> List:
+        """
+        Analyze a long text in overlapping chunks, batched through the NLP pipeline,
+        keeping spaCy's memory bounded and its max_length out of reach. Result offsets
+        are relative to the full text.
+        """
+        chunks = split_text(text, self.max_chunk_size, self.chunk_overlap)
+        artifacts = self._process_batch(
+            (chunk.text for chunk in chunks), analyzer=analyzer
+        )
+
+        chunk_results = []
+        for chunk, (_, nlp_artifacts) in zip(chunks, artifacts):
+            with timed("recognizers"):
+                results = analyzer.analyze(
+                    text=chunk.text,
+                    language=LANGUAGE,
+                    entities=options.entities,
+                    nlp_artifacts=nlp_artifacts,
+                    score_threshold=options.score_threshold,
+                )
+            chunk_results.append((chunk, results))
+
+        return merge_chunk_results(chunk_results)
+
+    def _process_batch(
+        self,
+        texts: Iterable[str],
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        analyzer=None,
+    ) -> Iterator[Tuple[str, Optional[NlpArtifacts]]]:
+        """Run the NLP pipeline over texts, yielding no artifacts on the regex-only path"""
+        nlp_engine = (analyzer or self.analyzer).nlp_engine
+        if nlp_engine is None:
+            return ((text, None) for text in texts)
+
+        return timed_iter(
+            "nlp",
+            nlp_engine.process_batch(texts, language=LANGUAGE, batch_size=batch_size),
+        )
+
+    def _analyze_batch(
+        self,
+        texts: List[str],
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        options: Optional[AnalysisOptions] = None,
+        use_nlp: bool = True,
+    ) -> List[Tuple[Optional[List], Optional[str]]]:
+        """
+        Analyze texts in batches through the NLP pipeline, or with the regex-only
+        recognizers when use_nlp is False and no score threshold is set, with options
+        already resolved.
+
+        Returns one (results, error) pair per text, in input order. Invalid texts,
+        failing analyses and texts over the entity limit are reported per item instead
+        of failing the whole batch. Texts longer than max_chunk_size are analyzed in
+        overlapping chunks, like in _analyze_chunked_text, which share the NLP batches
+        of the other texts.
+        """
+        options = options or self.analysis_options
+        # The regex-only recognizers cannot boost scores with context words, so a
+        # threshold needs the full analyzer, like in _select_analyzer
+        if use_nlp or options.score_threshold:
+            analyzer = self._select_analyzer(options)
+        else:
+            analyzer = self.pattern_analyzer
+        outcomes: List[Tuple[Optional[List], Optional[str]]] = [
+            (None, None)
+            if text and isinstance(text, str)
+            else (None, "Invalid or empty text")
+            for text in texts
+        ]
+        valid_indices = [
+            index for index, (_, error) in enumerate(outcomes) if not error
+        ]
+        # (text index, chunk) pairs, the chunk is None for texts analyzed whole
+        pieces: List[Tuple[int, Optional[TextChunk]]] = []
+        for index in valid_indices:
+            text = texts[index]
+            INPUT_CHARACTERS.observe(len(text), operation="batch")
+            if len(text) > self.max_chunk_size:
+                pieces.extend(
+                    (index, chunk)
+                    for chunk in split_text(
+                        text, self.max_chunk_size, self.chunk_overlap
+                    )
+                )
+            else:
+                pieces.append((index, None))
+
+        chunk_results: Dict[int, List[Tuple[TextChunk, List]]] = {}
+        try:
+            piece_texts = (
+                texts[index] if chunk is None else chunk.text for index, chunk in pieces
+            )
+            artifacts = self._process_batch(piece_texts, batch_size, analyzer)
+            for (index, chunk), (piece_text, nlp_artifacts) in zip(pieces, artifacts):
+                if outcomes[index][1]:
+                    continue
+                try:
+                    with timed("recognizers"):
+                        results = analyzer.analyze(
+                            text=piece_text,
+                            language=LANGUAGE,
+                            entities=options.entities,
+                            nlp_artifacts=nlp_artifacts,
+                            score_threshold=options.score_threshold,
+                        )
+                    if chunk is not None:
+                        chunk_results.setdefault(index, []).append((chunk, results))
+                        if chunk.end < len(texts[index]):
+                            continue
+                        results = merge_chunk_results(chunk_results.pop(index))
+                    self._check_entity_limit(results, options)
+                    outcomes[index] = (results, None)
+                except PrivacyScannerError as e:
+                    chunk_results.pop(index, None)
+                    outcomes[index] = (None, str(e))
+                except Exception as e:
+                    chunk_results.pop(index, None)
+                    outcomes[index] = (None, f"Text analysis failed: {str(e)}")
+        except Exception as e:
+            raise PrivacyScannerError(f"Batch analysis failed: {str(e)}")
+
+        return outcomes
+
+    def _to_scan_results(self, text: str, results: List) -> List[Dict]:
+        """Build the JSON-ready entities, with their type, position and text, in a single pass"""
+        entities = []
+        for result in results:
+            ENTITIES_TOTAL.inc(entity_type=result.entity_type)
+            entities.append(
+                {
+                    "type": result.entity_type,
+                    "position": [result.start, result.end],
+                    "text": text[result.start : result.end],
+                }
+            )
+        return entities
+
+    def _encrypts(self, method: str) -> bool:
+        """Whether anonymizing with method encrypts any entity type"""
+        return method == "encrypt" or any(
+            operator_type == "encrypt"
+            for operator_type, _ in self.entity_operators.values()
+        )
+
+    def _get_cached(
+        self,
+        cache_method: str,
+        text: str,
+        use_cache: bool,
+        options: Optional[AnalysisOptions] = None,
+        method: Optional[str] = None,
+    ) -> Tuple:
+        """
+        Return (cache key, cached result), with a None key when caching is off.
+
+        Outputs of an anonymization method that encrypts are never cached: they get a
+        fresh nonce every time, so a cached output would reveal repeated texts, and it
+        would outlive a key rotation.
+        """
+        if (
+            self.result_cache is None
+            or not use_cache
+            or (method is not None and self._encrypts(method))
+        ):
+            return None, None
+
+        if options is not None:
+            cache_method += options.cache_key
+        key = self.result_cache.make_key(self.config_key, cache_method, text)
+        return key, self.result_cache.get(key)
+
+    def scan_text(
+        self,
+        text: str,
+        use_cache: bool = True,
+        options: Optional[AnalysisOptions] = None,
+    ) -> List:
         """
         Scan the provided text for privacy-related information.
 
         Args:
             text (str): The text to be scanned for privacy entities.
+            use_cache (bool): Whether the result cache may be used, if one is configured.
+            options (AnalysisOptions): Score threshold, entities and entity limit of this call,
+                overriding the config's analysis options.
 
         Returns:
             list: A list of dictionaries, each containing:
@@ -69,71 +477,530 @@ class PrivacyScanner:
                 - "text" (str): The substring of the text that corresponds to the detected entity.
         """
         try:
-            results = self._analyze_text(text)
-            return [
-                ScanResult(
-                    type=result.entity_type,
-                    position=[result.start, result.end],
-                    text=text[result.start : result.end],
-                ).__dict__
-                for result in results
-            ]
+            INPUT_CHARACTERS.observe(len(text), operation="scan")
+            options = self.resolve_options(options)
+            cache_key, cached = self._get_cached("scan", text, use_cache, options)
+            if cached is not None:
+                return cached
+
+            results = self._to_scan_results(text, self._analyze_text(text, options))
+            if cache_key:
+                self.result_cache.set(cache_key, results)
+            return results
         except PrivacyScannerError:
             raise
         except Exception as e:
             raise PrivacyScannerError(f"Scan operation failed: {str(e)}")
 
-    def _get_operator_config(self, method: str) -> OperatorConfig:
+    def scan_file(
+        self,
+        path: str,
+        index_path: str,
+        options: Optional[AnalysisOptions] = None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        window_bytes: int = DEFAULT_WINDOW_BYTES,
+    ) -> Dict:
+        """
+        Scan a large file line by line into an entity index, with constant memory.
+
+        The file is memory-mapped and its lines are decoded and analyzed one window at a
+        time. Entities are streamed to the index as they are found, located by byte
+        offsets in the file. Read them with file_scanner.EntityIndex, or redact the file
+        with file_scanner.redact_file. Entities spanning several lines are not detected.
+
+        Args:
+            path (str): The file to scan, UTF-8 text.
+            index_path (str): Where to write the entity index.
+            options (AnalysisOptions): Score threshold, entities and per-line entity limit,
+                overriding the config's analysis options.
+            batch_size (int): Number of lines handed to spaCy at a time.
+            window_bytes (int): Bytes of lines decoded and analyzed together.
+
+        Returns:
+            dict: The number of "bytes", "records" (non-empty lines) and "entities" indexed.
+
+        Raises:
+            PrivacyScannerError: If a line cannot be analyzed. The index is left without
+                its footer, so it cannot be read or used for redaction.
+        """
         try:
-            return OperatorConfig(method, DEFAULT_OPERATOR_CONFIG[method])
+            options = self.resolve_options(options)
+            size = os.path.getsize(path)
+            records = 0
+            with open(path, "rb") as source, EntityIndexWriter(
+                index_path, size
+            ) as index:
+                if size:
+                    with mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                        for starts, texts in iter_windows(data, window_bytes):
+                            outcomes = self._analyze_batch(texts, batch_size, options)
+                            for start, text, (results, error) in zip(
+                                starts, texts, outcomes
+                            ):
+                                if error:
+                                    raise PrivacyScannerError(
+                                        f"Line at byte {start} failed: {error}"
+                                    )
+                                results = sorted(
+                                    results,
+                                    key=lambda result: (result.start, result.end),
+                                )
+                                offsets = byte_offsets(
+                                    text,
+                                    [
+                                        offset
+                                        for result in results
+                                        for offset in (result.start, result.end)
+                                    ],
+                                )
+                                for position, result in enumerate(results):
+                                    index.add(
+                                        start + offsets[2 * position],
+                                        start + offsets[2 * position + 1],
+                                        result.entity_type,
+                                        result.score,
+                                    )
+                            records += len(texts)
+            return {"bytes": size, "records": records, "entities": index.count}
+        except PrivacyScannerError:
+            raise
+        except Exception as e:
+            raise PrivacyScannerError(f"File scan failed: {str(e)}")
+
+    def rescan_text(
+        self,
+        previous_text: str,
+        previous_entities: List[Dict],
+        text: Optional[str] = None,
+        edit: Optional[TextEdit] = None,
+        options: Optional[AnalysisOptions] = None,
+    ) -> Tuple[str, List[Dict]]:
+        """
+        Scan an edited text, analyzing again only the sentences around the edit and
+        shifting the entities of the untouched parts, so the cost follows the size of
+        the edit instead of the size of the text.
+
+        Entities are the same as those of scan_text, unless a new entity spans the
+        sentence boundary the re-analyzed range was extended to.
+
+        Args:
+            previous_text (str): The text before the edit.
+            previous_entities (list): Its entities, as returned by scan_text with the same options.
+            text (str): The edited text, the edit is found by comparing it with previous_text.
+            edit (TextEdit): Or the edit applied to previous_text.
+            options (AnalysisOptions): Score threshold, entities and entity limit of this call,
+                overriding the config's analysis options.
+
+        Returns:
+            tuple: The edited text and its entities, same shape as scan_text, in text order.
+        """
+        if (text is None) == (edit is None):
+            raise PrivacyScannerError("Expected either the edited text or an edit")
+        try:
+            options = self.resolve_options(options)
+            validate_entities(previous_text, previous_entities)
+            if edit is None:
+                edit = find_edit(previous_text, text)
+            else:
+                text = edit.apply(previous_text)
+            if edit is None:
+                return text, previous_entities
+
+            start, end = rescan_window(text, edit, previous_entities)
+            INPUT_CHARACTERS.observe(end - start, operation="rescan")
+            window_entities = []
+            if start < end:
+                window_text = text[start:end]
+                for entity in self._to_scan_results(
+                    window_text, self._analyze_text(window_text, options)
+                ):
+                    entity_start, entity_end = entity["position"]
+                    entity["position"] = [entity_start + start, entity_end + start]
+                    window_entities.append(entity)
+
+            entities = merge_rescanned_entities(
+                edit, previous_entities, (start, end), window_entities
+            )
+            self._check_entity_limit(entities, options)
+            return text, entities
+        except PrivacyScannerError:
+            raise
+        except ValueError as e:
+            raise PrivacyScannerError(str(e))
+        except Exception as e:
+            raise PrivacyScannerError(f"Incremental scan failed: {str(e)}")
+
+    def remember_scan(
+        self,
+        text: str,
+        entities: List[Dict],
+        options: Optional[AnalysisOptions] = None,
+    ) -> Optional[str]:
+        """
+        Keep a scanned text and its entities in the result cache for a later rescan_text.
+
+        The handle is random rather than derived from the text, so that it cannot be
+        guessed from a document, whose text and entities it gives access to.
+
+        Returns:
+            str: Handle to recall them with, None when no result cache is configured.
+        """
+        if self.result_cache is None:
+            return None
+        options = self.resolve_options(options)
+        handle = secrets.token_urlsafe()
+        self.result_cache.set(
+            (self.config_key, DOCUMENT_CACHE_METHOD + options.cache_key, handle),
+            {"text": text, "entities": entities},
+        )
+        return handle
+
+    def recall_scan(
+        self, handle: str, options: Optional[AnalysisOptions] = None
+    ) -> Tuple[str, List[Dict]]:
+        """Return the text and entities kept by remember_scan with the same config and options"""
+        document = None
+        if self.result_cache is not None and isinstance(handle, str):
+            options = self.resolve_options(options)
+            document = self.result_cache.get(
+                (self.config_key, DOCUMENT_CACHE_METHOD + options.cache_key, handle)
+            )
+        if document is None:
+            raise PrivacyScannerError(
+                "Unknown or expired handle, send the previous text and entities instead"
+            )
+        return document["text"], document["entities"]
+
+    @staticmethod
+    def _compile_entity_operators(
+        operators_config: Dict[str, Dict],
+    ) -> Dict[str, Tuple[str, Dict]]:
+        """Resolve each configured operator to its type and full parameters"""
+        entity_operators = {}
+        for entity_type, operator in operators_config.items():
+            params = dict(operator)
+            operator_type = str(params.pop("type")).lower()
+            if operator_type not in DEFAULT_OPERATOR_CONFIG:
+                raise PrivacyScannerError(
+                    f"Invalid anonymization method for {entity_type}: {operator_type}"
+                )
+            entity_operators[entity_type] = (
+                operator_type,
+                {**DEFAULT_OPERATOR_CONFIG[operator_type], **params},
+            )
+        return entity_operators
+
+    def _require_key_provider(self) -> KeyProvider:
+        if self.key_provider is None:
+            raise PrivacyScannerError(
+                "The encrypt method needs encryption keys, none are configured"
+            )
+        return self.key_provider
+
+    def _get_operator_config(
+        self, method: str, params: Optional[Dict] = None
+    ) -> "OperatorConfig":
+        from presidio_anonymizer.entities import OperatorConfig
+
+        try:
+            if params is None:
+                params = DEFAULT_OPERATOR_CONFIG[method]
+            if method == "pseudonymize":
+                params = {**params, "store": self.mapping_store}
+            elif method == "encrypt":
+                params = {**params, "key_provider": self._require_key_provider()}
+            return OperatorConfig(method, params)
         except KeyError:
             raise PrivacyScannerError(f"Invalid anonymization method: {method}")
         except Exception as e:
             raise PrivacyScannerError(f"Failed to create operator config: {str(e)}")
 
-    def anonymize_text(self, text: str, method: str) -> Tuple:
+    def _get_operators(self, method: str) -> Dict[str, "OperatorConfig"]:
+        """
+        Return the anonymizer operator table for a method, built once per method: the
+        configured per-entity operators, and the method for every other entity type.
+        """
+        operators = self._operators.get(method)
+        if operators is None:
+            # DEFAULT applies to every entity type, the anonymizer leaves it untouched
+            operators = {"DEFAULT": self._get_operator_config(method)}
+            for entity_type, (operator_type, params) in self.entity_operators.items():
+                operators[entity_type] = self._get_operator_config(
+                    operator_type, params
+                )
+            self._operators[method] = operators
+        return operators
+
+    def anonymize_text(
+        self,
+        text: str,
+        method: str,
+        use_cache: bool = True,
+        options: Optional[AnalysisOptions] = None,
+    ) -> Tuple:
         """
         Anonymize the given text using the given method.
 
         Args:
             text (str): The text to anonymize
-            method (str): The method to use for anonymization, one of ["replace", "redact", "hash", "mask", "keep"]
+            method (str): The method to use for anonymization, one of ["replace", "redact", "hash", "mask", "keep", "pseudonymize", "encrypt"]
+            use_cache (bool): Whether the result cache may be used, if one is configured.
+            options (AnalysisOptions): Score threshold, entities and entity limit of this call,
+                overriding the config's analysis options.
 
         Returns:
             tuple: A tuple containing the anonymized text and the anonymized entities.
         """
         try:
-            analyzer_results = self._analyze_text(text)
-            entities = [
-                ScanResult(
-                    type=result.entity_type,
-                    position=[result.start, result.end],
-                    text=text[result.start : result.end],
-                ).__dict__
-                for result in analyzer_results
-            ]
-
-            if not analyzer_results:
-                return text, entities
-
-            operator_config = self._get_operator_config(method)
-            anonymizer_operator_config = {
-                entity_type: operator_config
-                for entity_type in set(
-                    result.entity_type for result in analyzer_results
-                )
-            }
-            # print(anonymizer_operator_config)
+            INPUT_CHARACTERS.observe(len(text), operation="anonymize")
+            options = self.resolve_options(options)
+            cache_key, cached = self._get_cached(
+                method, text, use_cache, options, method
+            )
+            if cached is not None:
+                return tuple(cached)
 
-            return (
-                self.anonymizer_engine.anonymize(
-                    text=text,
-                    analyzer_results=analyzer_results,
-                    operators=anonymizer_operator_config,
-                ).text,
-                entities,
+            result = self._anonymize_results(
+                text, self._analyze_text(text, options), method
             )
+            if cache_key:
+                self.result_cache.set(cache_key, result)
+            return result
         except PrivacyScannerError:
             raise
         except Exception as e:
             raise PrivacyScannerError(f"Anonymization failed: {str(e)}")
+
+    def _anonymize(
+        self,
+        text: str,
+        analyzer_results: List,
+        method: str,
+        operated_cache: Optional[Dict] = None,
+    ) -> Optional["EngineResult"]:
+        """Run the anonymizer, None when there is nothing to anonymize"""
+        if not analyzer_results:
+            return None
+
+        operators = self._get_operators(method)
+        with timed("anonymize"):
+            return self.anonymizer_engine.anonymize(
+                text=text,
+                analyzer_results=analyzer_results,
+                operators=operators,
+                operated_cache=operated_cache,
+            )
+
+    def _anonymize_results(
+        self,
+        text: str,
+        analyzer_results: List,
+        method: str,
+        operated_cache: Optional[Dict] = None,
+    ) -> Tuple[str, List[Dict]]:
+        entities = self._to_scan_results(text, analyzer_results)
+        engine_result = self._anonymize(text, analyzer_results, method, operated_cache)
+        return engine_result.text if engine_result else text, entities
+
+    def process_text(
+        self,
+        text: str,
+        method: str,
+        include_operator_results: bool = False,
+        use_cache: bool = True,
+        options: Optional[AnalysisOptions] = None,
+    ) -> Dict:
+        """
+        Scan and anonymize the given text with a single analysis.
+
+        Args:
+            text (str): The text to process
+            method (str): The method to use for anonymization, one of ["replace", "redact", "hash", "mask", "keep", "pseudonymize", "encrypt"]
+            include_operator_results (bool): Whether to also return what the anonymizer did to each entity.
+            use_cache (bool): Whether the result cache may be used, if one is configured.
+            options (AnalysisOptions): Score threshold, entities and entity limit of this call,
+                overriding the config's analysis options.
+
+        Returns:
+            dict: A dictionary containing:
+                - "entities" (list): The detected entities, same shape as scan_text.
+                - "anonymized_output" (str): The anonymized text.
+                - "operator_results" (list): Only if requested, one dictionary per entity with its
+                  "type", "position" in the anonymized text, replacement "text" and "operator".
+        """
+        try:
+            INPUT_CHARACTERS.observe(len(text), operation="process")
+            options = self.resolve_options(options)
+            cache_method = f"process:{method}:{int(include_operator_results)}"
+            cache_key, cached = self._get_cached(
+                cache_method, text, use_cache, options, method
+            )
+            if cached is not None:
+                return cached
+
+            analyzer_results = self._analyze_text(text, options)
+            engine_result = self._anonymize(text, analyzer_results, method)
+            result = {
+                "entities": self._to_scan_results(text, analyzer_results),
+                "anonymized_output": engine_result.text if engine_result else text,
+            }
+            if include_operator_results:
+                result["operator_results"] = [
+                    {
+                        "type": item.entity_type,
+                        "position": [item.start, item.end],
+                        "text": item.text,
+                        "operator": item.operator,
+                    }
+                    for item in (engine_result.items if engine_result else [])
+                ]
+
+            if cache_key:
+                self.result_cache.set(cache_key, result)
+            return result
+        except PrivacyScannerError:
+            raise
+        except Exception as e:
+            raise PrivacyScannerError(f"Processing failed: {str(e)}")
+
+    def sample_entity_types(
+        self, texts: List[str], batch_size: int = DEFAULT_BATCH_SIZE
+    ) -> Set[str]:
+        """Return the entity types found in a sample of texts, with every recognizer"""
+        entity_types = set()
+        for results, error in self._analyze_batch(texts, batch_size, AnalysisOptions()):
+            if error:
+                raise PrivacyScannerError(error)
+            entity_types.update(result.entity_type for result in results)
+        return entity_types
+
+    def anonymize_values(
+        self,
+        values: List[str],
+        method: str,
+        entities: Optional[List[str]] = None,
+        use_nlp: bool = True,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        operated_cache: Optional[Dict] = None,
+        options: Optional[AnalysisOptions] = None,
+    ) -> List[str]:
+        """
+        Anonymize short values such as table cells, analyzing each distinct value once.
+
+        Args:
+            values (list): The values to anonymize, empty values are returned as is.
+            method (str): The anonymization method.
+            entities (list): Entity types to look for, all by default, narrowed to the
+                entities of the options if they have some.
+            use_nlp (bool): Whether to run the NLP pipeline, or only the regex-only recognizers.
+            batch_size (int): Number of values handed to spaCy at a time.
+            operated_cache (dict): Hashed or masked values to reuse, shared between calls.
+            options (AnalysisOptions): Score threshold, entities and per-value entity limit,
+                overriding the config's analysis options.
+
+        Returns:
+            list: The anonymized values, in input order.
+        """
+        options = self.resolve_options(options)
+        if entities:
+            entities = tuple(
+                entity
+                for entity in entities
+                if not options.entities or entity in options.entities
+            )
+            if not entities:
+                return list(values)
+            options = options.merge(AnalysisOptions(entities=entities))
+
+        distinct = [value for value in dict.fromkeys(values) if value]
+        anonymized = {}
+        for value, (results, error) in zip(
+            distinct, self._analyze_batch(distinct, batch_size, options, use_nlp)
+        ):
+            if error:
+                raise PrivacyScannerError(error)
+            anonymized[value], _ = self._anonymize_results(
+                value, results, method, operated_cache
+            )
+        return [anonymized.get(value, value) for value in values]
+
+    def scan_batch(
+        self,
+        texts: List[str],
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        options: Optional[AnalysisOptions] = None,
+    ) -> List[Dict]:
+        """
+        Scan a list of texts in one pass of the NLP pipeline.
+
+        Args:
+            texts (list): The texts to be scanned.
+            batch_size (int): Number of texts handed to spaCy at a time.
+            options (AnalysisOptions): Score threshold, entities and entity limit of this call,
+                overriding the config's analysis options.
+
+        Returns:
+            list: One dictionary per text, in input order, containing either
+                "entities" (same shape as scan_text) or "error" for items that failed.
+        """
+        options = self.resolve_options(options)
+        return [
+            {"index": index, "error": error}
+            if error
+            else {"index": index, "entities": self._to_scan_results(text, results)}
+            for index, (text, (results, error)) in enumerate(
+                zip(texts, self._analyze_batch(texts, batch_size, options))
+            )
+        ]
+
+    def anonymize_batch(
+        self,
+        texts: List[str],
+        methods: List[str],
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        options: Optional[AnalysisOptions] = None,
+    ) -> List[Dict]:
+        """
+        Anonymize a list of texts in one pass of the NLP pipeline.
+
+        Args:
+            texts (list): The texts to be anonymized.
+            methods (list): The anonymization method for each text.
+            batch_size (int): Number of texts handed to spaCy at a time.
+            options (AnalysisOptions): Score threshold, entities and entity limit of this call,
+                overriding the config's analysis options.
+
+        Returns:
+            list: One dictionary per text, in input order, containing either
+                "entities" and "anonymized_output" or "error" for items that failed.
+        """
+        if len(methods) != len(texts):
+            raise PrivacyScannerError("Expected one anonymization method per text")
+
+        options = self.resolve_options(options)
+        items = []
+        # Hashed or masked values repeated across the batch are computed once
+        operated_cache: Dict = {}
+        for index, (text, method, (results, error)) in enumerate(
+            zip(texts, methods, self._analyze_batch(texts, batch_size, options))
+        ):
+            if not error:
+                try:
+                    anonymized_text, entities = self._anonymize_results(
+                        text, results, method, operated_cache
+                    )
+                    items.append(
+                        {
+                            "index": index,
+                            "entities": entities,
+                            "anonymized_output": anonymized_text,
+                        }
+                    )
+                    continue
+                except PrivacyScannerError as e:
+                    error = str(e)
+                except Exception as e:
+                    error = f"Anonymization failed: {str(e)}"
+            items.append({"index": index, "error": error})
+
+        return items
@@ -0,0 +1,135 @@
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Union
+
+from config_schema import CompiledConfig, load_config
+from key_provider import KeyProvider
+from mapping_store import MappingStore
+from metrics import timed
+from result_cache import ResultCache
+from scanner import PrivacyScanner
+
+DEFAULT_MAX_ENTRIES: int = 8
+
+
+class ScannerPool:
+    """
+    Process-wide cache of warmed PrivacyScanner instances keyed by recognizer configuration.
+
+    Scanners are keyed by the fingerprint of the compiled config, so requests that point
+    at different files with the same content share one scanner. The
+    least recently used scanner is evicted once `max_entries` scanners are cached.
+
+    Attributes:
+        max_entries (int): Maximum number of scanners kept warm at the same time
+        result_cache (ResultCache): Optional result cache shared by every pooled scanner
+        mapping_store (MappingStore): Optional pseudonymization mapping store shared by every
+            pooled scanner, so tokens stay consistent across configs
+        key_provider (KeyProvider): Optional encryption keys shared by every pooled scanner
+        hits (int): Number of lookups served from the cache
+        misses (int): Number of lookups that had to construct a new scanner
+        evictions (int): Number of scanners dropped to respect `max_entries`
+    """
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        result_cache: Optional[ResultCache] = None,
+        mapping_store: Optional[MappingStore] = None,
+        key_provider: Optional[KeyProvider] = None,
+    ):
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+
+        self.max_entries = max_entries
+        self.result_cache = result_cache
+        self.mapping_store = mapping_store
+        self.key_provider = key_provider
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+        self._scanners: "OrderedDict[str, PrivacyScanner]" = OrderedDict()
+        self._build_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def get_scanner(
+        self, config: Union[str, Path, CompiledConfig, None] = None
+    ) -> PrivacyScanner:
+        """
+        Return a warmed scanner for the given config, constructing it on first use.
+
+        Args:
+            config (str): Path to the configuration file, or an already compiled config.
+                None for the default recognizers.
+
+        Returns:
+            PrivacyScanner: A scanner shared by every request using the same configuration.
+        """
+        if not isinstance(config, CompiledConfig):
+            config = load_config(config)
+        key = config.fingerprint
+
+        with self._lock:
+            scanner = self._lookup(key)
+            if scanner is not None:
+                return scanner
+            build_lock = self._build_locks.setdefault(key, threading.Lock())
+
+        # Only one thread builds a given configuration, others wait for it instead
+        # of constructing duplicate analyzers.
+        with build_lock:
+            with self._lock:
+                scanner = self._lookup(key)
+                if scanner is not None:
+                    return scanner
+                self.misses += 1
+
+            try:
+                with timed("scanner_build"):
+                    scanner = PrivacyScanner(
+                        config,
+                        result_cache=self.result_cache,
+                        mapping_store=self.mapping_store,
+                        key_provider=self.key_provider,
+                    )
+            except Exception:
+                with self._lock:
+                    self._build_locks.pop(key, None)
+                raise
+
+            with self._lock:
+                self._scanners[key] = scanner
+                self._build_locks.pop(key, None)
+                while len(self._scanners) > self.max_entries:
+                    self._scanners.popitem(last=False)
+                    self.evictions += 1
+
+        return scanner
+
+    def warm_up(self, configs: Iterable[Optional[str]]) -> None:
+        """Build and warm up the scanners of the given configs ahead of traffic"""
+        for config in configs:
+            self.get_scanner(config).warm_up()
+
+    def _lookup(self, key: str) -> Optional[PrivacyScanner]:
+        scanner = self._scanners.get(key)
+        if scanner is not None:
+            self._scanners.move_to_end(key)
+            self.hits += 1
+        return scanner
+
+    def clear(self) -> None:
+        """Drop every cached scanner"""
+        with self._lock:
+            self._scanners.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "size": len(self._scanners),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
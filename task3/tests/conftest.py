@@ -0,0 +1,6 @@
+import sys
+from pathlib import Path
+
+# The task3 modules import each other as top-level modules (e.g. `from scanner import ...`)
+# since the app is run from inside the task3 directory.
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
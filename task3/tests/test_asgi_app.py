@@ -0,0 +1,118 @@
+import asyncio
+import json
+import threading
+import pytest
+from task3 import asgi_app as asgi_app_module
+from task3.asgi_app import PrivacyToolASGI
+
+
+class EchoResource:
+    release = threading.Event()
+
+    def handle(self, json_data, endpoint, include_timings=False, authorization=None):
+        EchoResource.release.wait(timeout=5)
+        return {"status_code": 200, "data": json_data}, 200
+
+
+@pytest.fixture(autouse=True)
+def echo_route(monkeypatch):
+    EchoResource.release = threading.Event()
+    monkeypatch.setitem(asgi_app_module.POST_ROUTES, "/scan", EchoResource)
+
+
+async def call(app, path, body=b"", method="POST", headers=()):
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    await app({"type": "http", "method": method, "path": path, "headers": list(headers)}, receive, send)
+    headers = dict(sent[0]["headers"])
+    return sent[0]["status"], headers, json.loads(sent[1]["body"])
+
+
+def test_asgi_app_runs_resource_on_executor():
+    app = PrivacyToolASGI(workers=1, max_queued=0)
+    EchoResource.release.set()
+
+    status, _, body = asyncio.run(call(app, "/scan", b'{"text": "hello"}'))
+
+    assert status == 200
+    assert body["data"] == {"text": "hello"}
+    assert app.executor.in_flight == 0
+
+
+def test_asgi_app_rejects_requests_beyond_capacity():
+    app = PrivacyToolASGI(workers=1, max_queued=1)
+
+    async def burst():
+        requests = [asyncio.ensure_future(call(app, "/scan", b"{}")) for _ in range(3)]
+        await asyncio.sleep(0.1)
+        EchoResource.release.set()
+        return await asyncio.gather(*requests)
+
+    statuses = sorted(status for status, _, _ in asyncio.run(burst()))
+
+    assert statuses == [200, 200, 429]
+    assert app.executor.rejected == 1
+
+
+def test_asgi_app_times_out_slow_requests_but_keeps_the_slot():
+    app = PrivacyToolASGI(workers=1, max_queued=0, request_timeout=0.05)
+
+    async def slow_request():
+        status, _, _ = await call(app, "/scan", b"{}")
+        in_flight = app.executor.in_flight
+        EchoResource.release.set()
+        await asyncio.sleep(0.1)
+        return status, in_flight
+
+    status, in_flight = asyncio.run(slow_request())
+
+    assert status == 504
+    assert in_flight == 1
+    assert app.executor.in_flight == 0
+
+
+def test_asgi_app_answers_bad_requests_without_using_the_executor():
+    app = PrivacyToolASGI(workers=1, max_queued=0)
+
+    assert asyncio.run(call(app, "/scan", b"{not json"))[0] == 400
+    assert asyncio.run(call(app, "/missing"))[0] == 404
+    assert asyncio.run(call(app, "/scan", method="GET"))[0] == 405
+    assert app.executor.in_flight == 0
+
+def test_deanonymize_requires_the_token_and_fails_as_a_whole(monkeypatch):
+    # The ASGI app serves the resources of the app module, imported as a top-level module
+    import app as app_module
+    from key_provider import KeyProvider
+
+    provider = KeyProvider({"k1": "0123456789abcdef"})
+    monkeypatch.setattr(app_module, "key_provider", provider)
+    monkeypatch.setattr(app_module, "DEANONYMIZE_TOKEN", "secret")
+    app = PrivacyToolASGI(workers=1, max_queued=0)
+    token = provider.encrypt("Ann")
+    body = json.dumps({"deanonymize": [f"Hi {token}", "Hi <enc:k1:AAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAA=>"]}).encode()
+    authorized = [(b"authorization", b"Bearer secret")]
+
+    assert asyncio.run(call(app, "/deanonymize", body))[0] == 401
+    assert asyncio.run(call(app, "/deanonymize", body, headers=[(b"authorization", b"Bearer wrong")]))[0] == 401
+    status, _, response = asyncio.run(call(app, "/deanonymize", body, headers=authorized))
+    assert (status, response) == (400, {"message": "Invalid encrypted token"})
+    body = json.dumps({"deanonymize": [f"Hi {token}"]}).encode()
+    status, _, response = asyncio.run(call(app, "/deanonymize", body, headers=authorized))
+    assert response["results"] == [{"index": 0, "deanonymized_output": "Hi Ann"}]
+
+def test_endpoints_must_implement_process():
+    import app as app_module
+
+    class Incomplete(app_module.PrivacyToolEndpoint):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
+    assert isinstance(app_module.PrivacyToolScanner(), app_module.PrivacyToolEndpoint)
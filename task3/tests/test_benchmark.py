@@ -0,0 +1,37 @@
+from task3.benchmark import compare_results, make_corpora, measure, percentile
+
+
+def test_percentile_uses_nearest_rank():
+    values = [float(value) for value in range(1, 101)]
+
+    assert percentile(values, 0.50) == 50.0
+    assert percentile(values, 0.99) == 99.0
+    assert percentile([3.0], 0.99) == 3.0
+
+def test_make_corpora_is_reproducible_per_seed():
+    corpora = make_corpora(seed=7, size=3)
+
+    assert corpora == make_corpora(seed=7, size=3)
+    assert set(corpora) == {"chat_dense", "chat_sparse", "document_dense", "document_sparse"}
+    assert all(len(text) >= 20_000 for text in corpora["document_sparse"])
+
+def test_measure_reports_latency_and_throughput():
+    calls = []
+
+    result = measure(calls.append, ["a", "bb"], iterations=4)
+
+    assert calls == ["a", "a", "bb", "a", "bb"]
+    assert result["iterations"] == 4
+    assert result["p50_ms"] <= result["p99_ms"]
+    assert result["texts_per_second"] > 0
+
+def test_compare_results_reports_relative_change():
+    baseline = [{"name": "case", "p50_ms": 10.0, "p99_ms": 20.0, "texts_per_second": 100.0}]
+    current = [
+        {"name": "case", "p50_ms": 5.0, "p99_ms": 30.0, "texts_per_second": 200.0},
+        {"name": "new", "p50_ms": 1.0, "p99_ms": 1.0, "texts_per_second": 1.0},
+    ]
+
+    assert compare_results(baseline, current) == [
+        {"name": "case", "p50_ms_change": -0.5, "p99_ms_change": 0.5, "texts_per_second_change": 1.0}
+    ]
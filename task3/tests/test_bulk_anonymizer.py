@@ -0,0 +1,62 @@
+import pytest
+from presidio_anonymizer import AnonymizerEngine
+from presidio_anonymizer.entities import OperatorConfig, RecognizerResult
+from task3.bulk_anonymizer import BulkAnonymizerEngine
+from task3.scanner import DEFAULT_OPERATOR_CONFIG
+
+TEXT = "Dr. John Smith mailed john@example.com and jane@example.com, call 212-555-0100"
+
+
+def make_results():
+    return [
+        RecognizerResult("TITLE", 0, 3, 0.6),
+        RecognizerResult("PERSON", 4, 8, 0.85),
+        RecognizerResult("PERSON", 9, 14, 0.85),
+        RecognizerResult("EMAIL_ADDRESS", 22, 38, 1.0),
+        RecognizerResult("URL", 27, 38, 0.5),
+        RecognizerResult("EMAIL_ADDRESS", 43, 59, 1.0),
+        RecognizerResult("PHONE_NUMBER", 66, 78, 0.4),
+        RecognizerResult("PHONE_NUMBER", 70, 78, 0.75),
+        RecognizerResult("ZIP", 0, 8, 0.01),
+    ]
+
+
+@pytest.mark.parametrize("method", [method for method in DEFAULT_OPERATOR_CONFIG if method not in ("pseudonymize", "encrypt")])
+def test_bulk_anonymizer_matches_presidio(method):
+    operators = {
+        "DEFAULT": OperatorConfig(method, dict(DEFAULT_OPERATOR_CONFIG[method])),
+        "PHONE_NUMBER": OperatorConfig("mask", {"masking_char": "*", "chars_to_mask": 4, "from_end": True}),
+    }
+
+    expected = AnonymizerEngine().anonymize(TEXT, make_results(), operators)
+    result = BulkAnonymizerEngine().anonymize(TEXT, make_results(), operators)
+
+    assert result.text == expected.text
+    assert [item.to_dict() for item in result.items] == [item.to_dict() for item in expected.items]
+
+def test_bulk_anonymizer_leaves_results_untouched():
+    results = make_results()
+
+    BulkAnonymizerEngine().anonymize(TEXT, results, {"DEFAULT": OperatorConfig("redact")})
+
+    assert [(result.start, result.end) for result in results] == [
+        (result.start, result.end) for result in make_results()
+    ]
+
+def test_bulk_anonymizer_reuses_hashes_of_repeated_values():
+    operators = {"DEFAULT": OperatorConfig("hash", {"hash_type": "sha256"})}
+    operated_cache = {}
+    engine = BulkAnonymizerEngine()
+
+    first = engine.anonymize(
+        "a@b.io, a@b.io",
+        [RecognizerResult("EMAIL_ADDRESS", 0, 6, 1.0), RecognizerResult("EMAIL_ADDRESS", 8, 14, 1.0)],
+        operators,
+        operated_cache=operated_cache,
+    )
+    second = engine.anonymize(
+        "a@b.io", [RecognizerResult("EMAIL_ADDRESS", 0, 6, 1.0)], operators, operated_cache=operated_cache
+    )
+
+    assert len(operated_cache) == 1
+    assert first.text == f"{second.text}, {second.text}"
@@ -0,0 +1,41 @@
+from presidio_analyzer import RecognizerResult
+from task3.chunking import TextChunk, merge_chunk_results, split_text
+
+def test_split_text_covers_text_on_boundaries():
+    text = " ".join(f"Sentence number {i} ends here." for i in range(200))
+
+    chunks = split_text(text, max_chunk_size=500, overlap=50)
+
+    assert chunks[0].start == 0 and chunks[-1].end == len(text)
+    for chunk, next_chunk in zip(chunks, chunks[1:]):
+        assert len(chunk.text) <= 500
+        assert chunk.text.endswith(". ")
+        assert next_chunk.start < chunk.end
+        assert text[next_chunk.start - 1] == " "
+
+def test_split_text_short_text_is_single_chunk():
+    assert split_text("short text", max_chunk_size=100, overlap=10) == [TextChunk(0, "short text")]
+
+def test_merge_chunk_results_remaps_and_deduplicates():
+    first, second = TextChunk(0, "mail bob@example.com now"), TextChunk(5, "bob@example.com now call")
+
+    merged = merge_chunk_results(
+        [
+            (first, [RecognizerResult("EMAIL_ADDRESS", 5, 20, 1.0)]),
+            (second, [RecognizerResult("EMAIL_ADDRESS", 0, 15, 1.0)]),
+        ]
+    )
+
+    assert [(r.entity_type, r.start, r.end) for r in merged] == [("EMAIL_ADDRESS", 5, 20)]
+
+def test_merge_chunk_results_drops_truncated_entities():
+    first, second = TextChunk(0, "call 212-555"), TextChunk(5, "212-555-1234 later")
+
+    merged = merge_chunk_results(
+        [
+            (first, [RecognizerResult("PHONE_NUMBER", 5, 12, 0.4)]),
+            (second, [RecognizerResult("PHONE_NUMBER", 0, 12, 0.4)]),
+        ]
+    )
+
+    assert [(r.start, r.end) for r in merged] == [(5, 17)]
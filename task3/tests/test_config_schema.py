@@ -3,7 +3,7 @@ from pathlib import Path
 import json
 from presidio_analyzer import RecognizerRegistry
 from presidio_analyzer.predefined_recognizers import EmailRecognizer, PhoneRecognizer, CreditCardRecognizer
-from task3.config_schema import ConfigLoader, PIIRegistry
+from task3.config_schema import AnalysisOptions, CompiledConfig, ConfigLoader, PIIRegistry, load_config
 
 def test_config_loader_default():
     config_loader = ConfigLoader()
@@ -49,3 +49,117 @@ def test_pii_registry_custom_config(tmp_path):
     assert not any(isinstance(recognizer, PhoneRecognizer) for recognizer in registry.recognizers)
     assert any(isinstance(recognizer, CreditCardRecognizer) for recognizer in registry.recognizers)
 
+
+def test_compiled_config_does_not_mutate_its_source():
+    recognizers = {
+        "TitlesRecognizer": {"enabled": True, "supported_entity": "TITLE", "deny_list": ["Dr."]}
+    }
+
+    registry = PIIRegistry(CompiledConfig.compile(recognizers)).get_registry()
+
+    assert recognizers["TitlesRecognizer"]["enabled"] is True
+    assert len(registry.recognizers) == 1
+
+def test_compiled_configs_compare_by_content(tmp_path):
+    first = tmp_path / "first.json"
+    second = tmp_path / "second.json"
+    first.write_text(json.dumps({"recognizers": {"EmailRecognizer": True, "PhoneRecognizer": False}}))
+    second.write_text(json.dumps({"recognizers": {"PhoneRecognizer": False, "EmailRecognizer": True}}))
+
+    assert load_config(first) == load_config(second)
+    assert len({load_config(first), load_config(second)}) == 1
+    with pytest.raises(TypeError):
+        load_config(first).recognizers["EmailRecognizer"] = False
+
+def test_load_config_is_cached_per_file_version(tmp_path):
+    config_file = tmp_path / "config.json"
+    config_file.write_text(json.dumps({"recognizers": {"EmailRecognizer": True}}))
+    compiled = load_config(config_file)
+
+    assert load_config(str(config_file)) is compiled
+
+    config_file.write_text(json.dumps({"recognizers": {"EmailRecognizer": True, "PhoneRecognizer": True}}))
+
+    assert load_config(config_file) != compiled
+
+def test_registry_snapshot_is_read_only():
+    registry = PIIRegistry(CompiledConfig.compile({"EmailRecognizer": True})).get_registry()
+
+    with pytest.raises(TypeError):
+        registry.add_recognizer(EmailRecognizer())
+    registry.recognizers.clear()
+    assert len(registry.recognizers) == 1
+
+def test_operators_are_part_of_the_fingerprint():
+    recognizers = {"EmailRecognizer": True}
+
+    plain = CompiledConfig.compile(recognizers)
+    masked = CompiledConfig.compile(recognizers, operators_config={"EMAIL_ADDRESS": {"type": "mask"}})
+
+    assert plain != masked
+    assert masked.operators_config() == {"EMAIL_ADDRESS": {"type": "mask"}}
+
+def test_invalid_column_rules_are_rejected(tmp_path):
+    config_file = tmp_path / "config.json"
+    config_file.write_text(json.dumps({
+        "recognizers": {"EmailRecognizer": True},
+        "columns": {"id": {"mode": "ignore"}},
+    }))
+
+    with pytest.raises(ValueError):
+        ConfigLoader(config_file)
+
+def test_nlp_settings_are_validated_and_fingerprinted(tmp_path):
+    recognizers = {"NameRecognizer": True}
+    trimmed = CompiledConfig.compile(recognizers, nlp_config={"model": "large", "disable": ["parser"]})
+
+    assert trimmed != CompiledConfig.compile(recognizers)
+    assert trimmed.nlp_config() == {"model": "large", "disable": ["parser"]}
+
+    config_file = tmp_path / "config.json"
+    config_file.write_text(json.dumps({"recognizers": recognizers, "nlp": {"model": "huge"}}))
+    with pytest.raises(ValueError):
+        ConfigLoader(config_file)
+
+def test_analysis_settings_are_validated_and_fingerprinted():
+    recognizers = {"EmailRecognizer": True}
+    config = CompiledConfig.compile(recognizers, analysis_config={"score_threshold": 0.5, "entities": ["EMAIL_ADDRESS"]})
+
+    assert config != CompiledConfig.compile(recognizers)
+    assert config.analysis_options() == AnalysisOptions(score_threshold=0.5, entities=("EMAIL_ADDRESS",))
+    assert config.analysis_options().merge(AnalysisOptions(score_threshold=0.1)).score_threshold == 0.1
+    for invalid in ({"score_threshold": 2}, {"entities": []}, {"max_entities": -1}, {"threshold": 0.5}):
+        with pytest.raises(ValueError):
+            AnalysisOptions.from_dict(invalid)
+
+def test_editing_a_deny_list_file_recompiles_the_config(tmp_path):
+    (tmp_path / "titles.txt").write_text("Dr\n")
+    config_file = tmp_path / "config.json"
+    config_file.write_text(json.dumps({"recognizers": {
+        "TitlesRecognizer": {"enabled": True, "supported_entity": "TITLE", "deny_list_file": "titles.txt"},
+    }}))
+    compiled = load_config(config_file)
+
+    assert load_config(config_file) is compiled
+
+    (tmp_path / "titles.txt").write_text("Dr\nProf\n")
+    recompiled = load_config(config_file)
+
+    assert recompiled != compiled
+    assert load_config(config_file) is recompiled
+    registry = PIIRegistry(recompiled).get_registry()
+    assert [result.entity_type for result in registry.recognizers[0].analyze("Prof Smith", ["TITLE"])] == ["TITLE"]
+
+def test_unknown_recognizer_types_are_rejected(tmp_path):
+    config_file = tmp_path / "config.json"
+    config_file.write_text(json.dumps({"recognizers": {
+        "TitlesRecognizer": {"enabled": True, "type": "regex", "supported_entity": "TITLE", "deny_list": ["Dr"]},
+    }}))
+
+    with pytest.raises(ValueError):
+        ConfigLoader(config_file)
+    with pytest.raises(ValueError):
+        PIIRegistry(CompiledConfig.compile({"TitlesRecognizer": {"enabled": True, "type": "regex", "deny_list": ["Dr"]}})).get_registry()
+
+    pattern = {"enabled": True, "type": "pattern", "supported_entity": "TITLE", "deny_list": ["Dr"]}
+    assert len(PIIRegistry(CompiledConfig.compile({"TitlesRecognizer": pattern})).get_registry().recognizers) == 1
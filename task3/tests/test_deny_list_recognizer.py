@@ -0,0 +1,44 @@
+import json
+from presidio_analyzer import PatternRecognizer
+from task3.config_schema import PIIRegistry
+from task3.deny_list_recognizer import DenyListRecognizer
+
+TITLES = ["Mr.", "Mrs.", "Ms.", "Miss", "Dr.", "Prof."]
+
+def spans(results):
+    return sorted((result.start, result.end) for result in results)
+
+def test_deny_list_recognizer_matches_pattern_recognizer():
+    text = "Mrs. Smith met Mr.Jones and dr. Who; MISS Marple, Prof.X and Dr."
+
+    expected = PatternRecognizer("TITLE", deny_list=TITLES).analyze(text, None)
+    results = DenyListRecognizer("TITLE", TITLES).analyze(text, None)
+
+    assert spans(results) == spans(expected)
+    assert all(result.entity_type == "TITLE" for result in results)
+
+def test_deny_list_recognizer_prefers_longest_match():
+    recognizer = DenyListRecognizer("CITY", ["New York", "New York City", "York"])
+
+    results = recognizer.analyze("Flying to new york city and York", None)
+
+    assert spans(results) == [(10, 23), (28, 32)]
+
+def test_deny_list_loaded_from_file(tmp_path):
+    (tmp_path / "titles.txt").write_text("# titles\nDr.\n\nProf.\n")
+    config_file = tmp_path / "config.json"
+    config_file.write_text(json.dumps({
+        "recognizers": {
+            "TitlesRecognizer": {
+                "enabled": True,
+                "supported_entity": "TITLE",
+                "deny_list_file": "titles.txt",
+            }
+        }
+    }))
+
+    registry = PIIRegistry(config_file).get_registry()
+    recognizer = registry.recognizers[0]
+
+    assert type(recognizer).__name__ == "DenyListRecognizer"
+    assert spans(recognizer.analyze("Dr. Who and Prof. X", None)) == [(0, 3), (12, 17)]
@@ -0,0 +1,52 @@
+import json
+import pytest
+from task3.file_scanner import EntityIndex, EntityIndexWriter, iter_records, redact_file
+from task3.scanner import PrivacyScanner
+
+@pytest.fixture
+def scanned_file(tmp_path):
+    config = tmp_path / "config.json"
+    config.write_text(json.dumps({"recognizers": {"EmailRecognizer": True}}))
+    source = tmp_path / "app.log"
+    source.write_bytes("héllo jöhn@example.com\n\n".encode("utf-8") + b"bad \xff bytes, mail bob@example.com\n")
+    index = tmp_path / "app.log.entities"
+
+    stats = PrivacyScanner(config).scan_file(source, index, window_bytes=8)
+
+    return source, index, stats
+
+def test_scan_file_indexes_byte_offsets(scanned_file):
+    source, index_path, stats = scanned_file
+    data = source.read_bytes()
+
+    with EntityIndex(index_path) as index:
+        entities = list(index)
+
+    assert stats == {"bytes": len(data), "records": 2, "entities": 2}
+    assert [data[entity.start : entity.end] for entity in entities] == ["jöhn@example.com".encode("utf-8"), b"bob@example.com"]
+    assert {entity.type for entity in entities} == {"EMAIL_ADDRESS"}
+
+def test_redact_file_in_place_and_to_a_copy(scanned_file, tmp_path):
+    source, index, _ = scanned_file
+    original = source.read_bytes()
+
+    assert redact_file(source, index, tmp_path / "copy.log", method="replace") == 2
+    assert (tmp_path / "copy.log").read_bytes() == "héllo <EMAIL_ADDRESS>\n\n".encode("utf-8") + b"bad \xff bytes, mail <EMAIL_ADDRESS>\n"
+
+    redact_file(source, index)
+    assert len(source.read_bytes()) == len(original) and b"example.com" not in source.read_bytes()
+    with pytest.raises(ValueError):
+        redact_file(source, index, method="replace")
+
+def test_index_without_footer_is_rejected(tmp_path):
+    with pytest.raises(RuntimeError):
+        with EntityIndexWriter(tmp_path / "broken", 10) as writer:
+            writer.add(0, 4, "EMAIL_ADDRESS", 1.0)
+            raise RuntimeError("scan failed")
+
+    with pytest.raises(ValueError):
+        EntityIndex(tmp_path / "broken")
+
+def test_iter_records_splits_long_lines_on_whitespace_and_characters():
+    assert list(iter_records(b"aaaa bbbb cccc\nd", 6)) == [(0, 4), (4, 9), (9, 14), (15, 16)]
+    assert list(iter_records("ééé".encode("utf-8"), 3)) == [(0, 2), (2, 4), (4, 6)]
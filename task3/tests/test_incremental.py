@@ -0,0 +1,28 @@
+import pytest
+from task3.incremental import TextEdit, find_edit, merge_rescanned_entities, rescan_window, validate_entities
+
+def test_find_edit_returns_the_changed_range():
+    long_prefix = "x" * 10_000
+
+    assert find_edit("call 555-0100 now", "call 555-0199 now") == TextEdit(11, 13, "99")
+    assert find_edit("aaa", "aaaa") == TextEdit(3, 3, "a")
+    assert find_edit(long_prefix + "old", long_prefix + "new") == TextEdit(10_000, 10_003, "new")
+    assert find_edit("same", "same") is None
+
+def test_rescan_window_covers_touched_entities_and_keeps_the_rest():
+    previous = "Mail bob@example.com now. " * 20
+    entities = [{"type": "EMAIL_ADDRESS", "position": [i * 26 + 5, i * 26 + 20], "text": "bob@example.com"} for i in range(20)]
+    # Replaces "bob" of the 10th address
+    edit = TextEdit(265, 268, "alice")
+    text = edit.apply(previous)
+
+    start, end = rescan_window(text, edit, entities, context_margin=0)
+    merged = merge_rescanned_entities(edit, entities, (start, end), [])
+
+    assert start <= 265 and end >= 284 and text[start - 2 : start] == ". "
+    assert len(merged) == 19
+    assert all(text[e["position"][0] : e["position"][1]] == "bob@example.com" for e in merged)
+
+def test_validate_entities_rejects_mismatched_entities():
+    with pytest.raises(ValueError):
+        validate_entities("Mail bob@example.com", [{"type": "EMAIL_ADDRESS", "position": [0, 4], "text": "bob@example.com"}])
@@ -0,0 +1,56 @@
+import base64
+import json
+import pytest
+from task3.key_provider import ENCRYPTED_TOKEN, KeyProvider, format_encrypted_token
+
+KEY = "0123456789abcdef"
+
+
+def test_tokens_are_authenticated():
+    provider = KeyProvider({"k1": KEY, "k2": "x" * 32}, "k1")
+
+    token = provider.encrypt("john.smith@example.com, été")
+    key_id, ciphertext = ENCRYPTED_TOKEN.fullmatch(token).groups()
+    data = bytearray(base64.b64decode(ciphertext))
+    data[-20] ^= 1
+
+    assert key_id == "k1"
+    assert provider.decrypt(token) == "john.smith@example.com, été"
+    assert provider.encrypt("Ann") != provider.encrypt("Ann")
+    for tampered in (format_encrypted_token("k1", base64.b64encode(bytes(data)).decode()), format_encrypted_token("k2", ciphertext)):
+        with pytest.raises(ValueError, match="Invalid encrypted token"):
+            provider.decrypt(tampered)
+
+def test_rotated_keys_still_decrypt_older_tokens():
+    provider = KeyProvider({"k1": KEY})
+    old_token = provider.encrypt("Ann")
+
+    rotations = []
+    provider.on_rotate(lambda: rotations.append(provider.current_key_id))
+    provider.rotate("k2", "x" * 32)
+    new_token = provider.encrypt("Bob")
+
+    assert new_token.startswith("<enc:k2:")
+    assert rotations == ["k2"]
+    assert provider.decrypt_texts([f"{old_token} and {new_token}", old_token]) == ["Ann and Bob", "Ann"]
+    with pytest.raises(ValueError):
+        provider.rotate("k1", KEY)
+
+def test_keys_load_from_file_and_env(tmp_path):
+    path = tmp_path / "keys.json"
+    path.write_text(json.dumps({"current": "b", "keys": {"a": KEY, "b": "y" * 24}}))
+
+    assert KeyProvider.from_file(path).current_key_id == "b"
+    assert KeyProvider.from_env({"PRIVACY_KEY_a": KEY, "OTHER": "x"}).key_ids == ["a"]
+    with pytest.raises(ValueError):
+        KeyProvider.from_env({"PRIVACY_KEY_a": KEY, "PRIVACY_KEY_b": KEY})
+
+def test_invalid_keys_and_tokens_are_rejected():
+    with pytest.raises(ValueError):
+        KeyProvider({"k1": "short"})
+
+    provider = KeyProvider({"k1": KEY})
+    with pytest.raises(ValueError, match="Unknown encryption key"):
+        provider.decrypt_text("<enc:k9:AAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAA=>")
+    with pytest.raises(ValueError, match="Invalid encrypted token"):
+        provider.decrypt("<enc:k1:AAAA>")
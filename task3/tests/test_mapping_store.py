@@ -0,0 +1,90 @@
+import hashlib
+import threading
+import pytest
+from task3.mapping_store import InMemoryMappingStore, MappingStore, SQLiteMappingStore, open_mapping_store
+
+
+def test_in_memory_store_numbers_values_per_entity_type():
+    store = InMemoryMappingStore()
+
+    assert store.get_tokens("PERSON", ["Ann", "Bob", "Ann"]) == {"Ann": "<PERSON_1>", "Bob": "<PERSON_2>"}
+    assert store.get_tokens("EMAIL_ADDRESS", ["Ann"]) == {"Ann": "<EMAIL_ADDRESS_1>"}
+    assert store.get_tokens("PERSON", ["Bob"]) == {"Bob": "<PERSON_2>"}
+    assert store.stats()["assigned"] == 3
+
+def test_sqlite_store_is_shared_between_instances(tmp_path):
+    path = tmp_path / "mappings.db"
+    first = SQLiteMappingStore(path, "secret", cache_entries=1)
+    second = SQLiteMappingStore(path, "secret")
+
+    tokens = first.get_tokens("PERSON", ["Ann", "Bob"])
+
+    assert second.get_tokens("PERSON", ["Bob", "Cid"]) == {"Bob": tokens["Bob"], "Cid": "<PERSON_3>"}
+    assert first.get_tokens("PERSON", ["Cid", "Ann"]) == {"Cid": "<PERSON_3>", "Ann": tokens["Ann"]}
+    assert first.stats()["cache_entries"] == 1
+    # Values are only stored as digests
+    assert b"Ann" not in path.read_bytes()
+    first.close()
+    second.close()
+
+def test_sqlite_store_assigns_each_value_once_across_threads(tmp_path):
+    store = SQLiteMappingStore(tmp_path / "mappings.db", "secret")
+    values = [f"user{index}" for index in range(200)]
+    results = []
+
+    def worker():
+        results.append(store.get_tokens("PERSON", values))
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert all(result == results[0] for result in results)
+    assert len(set(results[0].values())) == len(values)
+    store.close()
+
+def test_default_in_memory_store_keeps_every_token():
+    store = open_mapping_store()
+    values = [f"user{index}" for index in range(150_000)]
+
+    first = store.get_tokens("PERSON", values)
+
+    assert store.get_tokens("PERSON", values[:10]) == {value: first[value] for value in values[:10]}
+    assert store.stats() == {"entries": 150_000, "assigned": 150_000, "evicted": 0}
+
+def test_bounded_in_memory_store_warns_when_it_forgets_values(capsys):
+    store = InMemoryMappingStore(max_entries=2)
+
+    store.get_tokens("PERSON", ["Ann", "Bob"])
+    store.get_tokens("PERSON", ["Ann", "Cid"])
+
+    assert store.get_tokens("PERSON", ["Ann", "Cid", "Bob"]) == {"Ann": "<PERSON_1>", "Cid": "<PERSON_3>", "Bob": "<PERSON_4>"}
+    assert store.stats() == {"entries": 2, "assigned": 4, "evicted": 2}
+    assert capsys.readouterr().err.count("Warning: the mapping store is full") == 1
+
+def test_sqlite_store_digests_are_keyed_with_the_secret(tmp_path, monkeypatch):
+    path = tmp_path / "mappings.db"
+    store = SQLiteMappingStore(path, "secret")
+    store.get_tokens("PERSON", ["Ann"])
+    store.close()
+
+    assert hashlib.sha256(b"PERSON\0Ann").hexdigest().encode() not in path.read_bytes()
+    with pytest.raises(ValueError):
+        SQLiteMappingStore(path, "other")
+    monkeypatch.delenv("PRIVACY_MAPPING_SECRET", raising=False)
+    with pytest.raises(ValueError):
+        open_mapping_store(path)
+    monkeypatch.setenv("PRIVACY_MAPPING_SECRET", "secret")
+    reopened = open_mapping_store(path)
+    assert reopened.get_tokens("PERSON", ["Ann"]) == {"Ann": "<PERSON_1>"}
+    reopened.close()
+
+def test_stores_must_implement_every_method():
+    class Incomplete(MappingStore):
+        def get_tokens(self, entity_type, values):
+            return {}
+
+    with pytest.raises(TypeError):
+        Incomplete()
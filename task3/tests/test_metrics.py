@@ -0,0 +1,61 @@
+import pytest
+from task3.metrics import (
+    MetricsRegistry,
+    collect_timings,
+    instrument_recognizer,
+    timed,
+    timed_iter,
+)
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = MetricsRegistry()
+    histogram = registry.histogram("latency_seconds", "Latency", ("stage",), buckets=(0.1, 1.0))
+
+    for value in (0.05, 0.5, 5.0):
+        histogram.observe(value, stage="nlp")
+
+    lines = registry.render().splitlines()
+    assert "# TYPE latency_seconds histogram" in lines
+    assert 'latency_seconds_bucket{stage="nlp",le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{stage="nlp",le="1"} 2' in lines
+    assert 'latency_seconds_bucket{stage="nlp",le="+Inf"} 3' in lines
+    assert 'latency_seconds_count{stage="nlp"} 3' in lines
+
+def test_counter_requires_its_labels():
+    registry = MetricsRegistry()
+    counter = registry.counter("requests_total", "Requests", ("endpoint",))
+
+    counter.inc(endpoint="/scan")
+    counter.inc(2, endpoint="/scan")
+
+    assert 'requests_total{endpoint="/scan"} 3' in registry.render().splitlines()
+    with pytest.raises(ValueError):
+        counter.inc(status="200")
+
+def test_timings_are_collected_only_inside_the_block():
+    with timed("outside"):
+        pass
+
+    with collect_timings() as timings:
+        with timed("nlp"):
+            pass
+        assert list(timed_iter("nlp", [1, 2])) == [1, 2]
+
+    assert set(timings.stages) == {"nlp"}
+    assert set(timings.to_dict()) == {"total_ms", "stages", "recognizers"}
+
+def test_instrumented_recognizer_reports_its_name():
+    class Recognizer:
+        name = "Titles Recognizer"
+
+        def analyze(self, text, entities, nlp_artifacts=None):
+            return [text]
+
+    recognizer = Recognizer()
+    instrument_recognizer(recognizer)
+
+    with collect_timings() as timings:
+        assert recognizer.analyze(text="Dr.", entities=[]) == ["Dr."]
+
+    assert list(timings.recognizers) == ["Titles Recognizer"]
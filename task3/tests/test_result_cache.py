@@ -0,0 +1,52 @@
+import json
+import time
+from task3.result_cache import ResultCache
+from task3.scanner import PrivacyScanner
+
+def test_result_cache_hit_and_miss():
+    cache = ResultCache()
+    key = cache.make_key("config", "scan", "some text")
+
+    assert cache.get(key) is None
+    cache.set(key, [{"type": "EMAIL_ADDRESS", "position": [0, 5], "text": "a@b.c"}])
+
+    assert cache.get(key) == [{"type": "EMAIL_ADDRESS", "position": [0, 5], "text": "a@b.c"}]
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+    assert cache.make_key("config", "mask", "some text") != key
+
+def test_result_cache_evicts_to_byte_limit():
+    cache = ResultCache(max_bytes=40)
+    first, second = cache.make_key("c", "scan", "first"), cache.make_key("c", "scan", "second")
+
+    cache.set(first, "x" * 20)
+    cache.set(second, "y" * 20)
+
+    assert cache.get(first) is None
+    assert cache.get(second) == "y" * 20
+    assert cache.stats()["size_bytes"] <= 40
+    assert cache.stats()["evictions"] == 1
+
+def test_result_cache_expires_entries():
+    cache = ResultCache(ttl_seconds=0.01)
+    key = cache.make_key("c", "scan", "text")
+    cache.set(key, [])
+
+    time.sleep(0.02)
+
+    assert cache.get(key) is None
+    assert cache.stats()["expirations"] == 1
+
+def test_scanner_uses_result_cache(tmp_path):
+    config_file = tmp_path / "config.json"
+    config_file.write_text(json.dumps({"recognizers": {"EmailRecognizer": True}}))
+    cache = ResultCache()
+    scanner = PrivacyScanner(config_file, result_cache=cache)
+
+    first = scanner.anonymize_text("Mail john@example.com", "mask")
+    second = scanner.anonymize_text("Mail john@example.com", "mask")
+    scanner.anonymize_text("Mail john@example.com", "mask", use_cache=False)
+
+    assert first == second
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
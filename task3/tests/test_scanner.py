@@ -0,0 +1,230 @@
+import json
+import pytest
+from task3.config_schema import AnalysisOptions
+from task3.incremental import TextEdit
+from task3.result_cache import ResultCache
+from task3.scanner import PrivacyScanner, PrivacyScannerError
+
+
+@pytest.fixture
+def config_file(tmp_path):
+    def write(recognizers):
+        path = tmp_path / f"config_{len(list(tmp_path.iterdir()))}.json"
+        path.write_text(json.dumps({"recognizers": recognizers}))
+        return path
+
+    return write
+
+def test_scanners_share_nlp_engine(config_file):
+    email_scanner = PrivacyScanner(config_file({"EmailRecognizer": True, "NameRecognizer": True}))
+    phone_scanner = PrivacyScanner(config_file({"PhoneRecognizer": True, "NameRecognizer": True}))
+
+    assert email_scanner.analyzer.nlp_engine is phone_scanner.analyzer.nlp_engine
+
+def test_nlp_settings_select_the_engine(tmp_path, monkeypatch):
+    # The scanner imports its modules as top-level modules
+    import nlp_engine
+
+    components = ("tok2vec", "tagger", "parser", "senter", "attribute_ruler", "lemmatizer", "ner")
+    monkeypatch.setattr(nlp_engine, "model_components", lambda model_name: components)
+
+    def scanner(name, nlp):
+        path = tmp_path / f"{name}.json"
+        path.write_text(json.dumps({"recognizers": {"NameRecognizer": True}, "nlp": nlp}))
+        return PrivacyScanner(path)
+
+    trimmed = scanner("trimmed", {"disable": ["parser", "lemmatizer"]})
+
+    assert trimmed.analyzer.nlp_engine is scanner("same", {"model": "large", "disable": ["lemmatizer", "parser"]}).analyzer.nlp_engine
+    assert trimmed.analyzer.nlp_engine is not scanner("full", {}).analyzer.nlp_engine
+    assert trimmed.analyzer.nlp_engine.excluded_components == ("lemmatizer", "parser")
+    with pytest.raises(PrivacyScannerError, match="no components named"):
+        scanner("typo", {"disable": ["parsr"]})
+    with pytest.raises(PrivacyScannerError, match="'ner'"):
+        scanner("no_ner", {"disable": ["ner"]})
+
+def test_analysis_options_limit_the_analysis(tmp_path):
+    path = tmp_path / "config.json"
+    zip_code = {"enabled": True, "supported_entity": "ZIP", "patterns": [{"name": "zip", "regex": "\\b\\d{5}\\b", "score": 0.01}]}
+    path.write_text(json.dumps({"recognizers": {"EmailRecognizer": True, "ZipRecognizer": zip_code}, "analysis": {"score_threshold": 0.3}}))
+    scanner = PrivacyScanner(path)
+    text = "Mail john@example.com from 10001"
+
+    assert [entity["type"] for entity in scanner.scan_text(text)] == ["EMAIL_ADDRESS"]
+    assert len(scanner.scan_text(text, options=AnalysisOptions(score_threshold=0.0))) == 2
+    assert scanner.scan_text(text, options=AnalysisOptions(score_threshold=0.0, entities=("ZIP",))) == [{"type": "ZIP", "position": [27, 32], "text": "10001"}]
+    with pytest.raises(PrivacyScannerError, match="Too many entities"):
+        scanner.anonymize_text(text, "redact", options=AnalysisOptions(max_entities=0))
+    with pytest.raises(PrivacyScannerError, match="PERSON"):
+        scanner.scan_text(text, options=AnalysisOptions(entities=("PERSON",)))
+
+def test_allow_list_never_drops_results_of_the_full_analysis(config_file):
+    scanner = PrivacyScanner(config_file({"EmailRecognizer": True, "PhoneRecognizer": True, "NameRecognizer": True}))
+    text = "Call my phone 212-555-0100 or mail john@example.com, phone number 415 555 0133."
+
+    for threshold in (None, 0.3, 0.5, 0.7):
+        everything = scanner.scan_text(text, options=AnalysisOptions(score_threshold=threshold))
+        for entity_type in ("PHONE_NUMBER", "EMAIL_ADDRESS"):
+            allowed = scanner.scan_text(text, options=AnalysisOptions(score_threshold=threshold, entities=(entity_type,)))
+            assert sorted(map(str, allowed)) == sorted(str(entity) for entity in everything if entity["type"] == entity_type)
+    assert scanner._select_analyzer(AnalysisOptions(entities=("PHONE_NUMBER",))) is scanner.pattern_analyzer
+    assert scanner._select_analyzer(AnalysisOptions(score_threshold=0.5, entities=("PHONE_NUMBER",))) is scanner.analyzer
+
+def test_batch_results_match_single_calls(config_file):
+    scanner = PrivacyScanner(config_file({"EmailRecognizer": True, "PhoneRecognizer": True}))
+    texts = ["Mail john@example.com", "Call 212-555-1234", "Nothing to see here"]
+
+    items = scanner.scan_batch(texts, batch_size=2)
+
+    assert [item["entities"] for item in items] == [scanner.scan_text(text) for text in texts]
+
+def test_batch_reports_failures_per_item(config_file):
+    scanner = PrivacyScanner(config_file({"EmailRecognizer": True}))
+
+    items = scanner.anonymize_batch(["Mail john@example.com", "", "Mail jane@example.com"], ["mask", "mask", "unknown"])
+
+    assert items[0]["anonymized_output"] == "Mail ****************"
+    assert items[1] == {"index": 1, "error": "Invalid or empty text"}
+    assert "unknown" in items[2]["error"]
+
+def test_chunked_scan_matches_single_pass(config_file):
+    config = config_file({"EmailRecognizer": True, "PhoneRecognizer": True})
+    text = " ".join(f"Contact {i}: user{i}@example.com or 212-555-{i:04d}." for i in range(300))
+
+    single_pass = PrivacyScanner(config).scan_text(text)
+    chunked = PrivacyScanner(config, max_chunk_size=400, chunk_overlap=80).scan_text(text)
+
+    assert sorted(map(str, chunked)) == sorted(map(str, single_pass))
+
+def test_batch_scan_chunks_long_items(config_file):
+    config = config_file({"EmailRecognizer": True, "PhoneRecognizer": True})
+    long_text = " ".join(f"Contact {i}: user{i}@example.com or 212-555-{i:04d}." for i in range(300))
+    texts = ["Mail john@example.com", long_text, "", long_text[:350]]
+
+    scanner = PrivacyScanner(config, max_chunk_size=400, chunk_overlap=80)
+    analyze = scanner.analyzer.analyze
+    lengths = []
+    scanner.analyzer.analyze = lambda text, **kwargs: lengths.append(len(text)) or analyze(text=text, **kwargs)
+    items = scanner.scan_batch(texts)
+
+    assert max(lengths) <= 400
+
+    assert items[2] == {"index": 2, "error": "Invalid or empty text"}
+    for index in (0, 1, 3):
+        assert sorted(map(str, items[index]["entities"])) == sorted(map(str, PrivacyScanner(config).scan_text(texts[index])))
+
+def test_pattern_only_config_skips_nlp(config_file):
+    scanner = PrivacyScanner(config_file({"EmailRecognizer": True, "PhoneRecognizer": True, "NameRecognizer": False}))
+
+    assert scanner.analyzer.nlp_engine is None
+    assert scanner.scan_text("Mail john@example.com") == [
+        {"type": "EMAIL_ADDRESS", "position": [5, 21], "text": "john@example.com"}
+    ]
+
+def test_name_recognizer_requires_nlp(config_file):
+    scanner = PrivacyScanner(config_file({"EmailRecognizer": True, "NameRecognizer": True}))
+
+    assert scanner.analyzer.nlp_engine is not None
+
+def test_anonymizer_is_created_on_first_use(config_file):
+    scanner = PrivacyScanner(config_file({"EmailRecognizer": True}))
+
+    scanner.scan_text("Mail john@example.com")
+    assert scanner._anonymizer_engine is None
+
+    scanner.warm_up()
+    assert scanner._anonymizer_engine is not None
+
+def test_process_matches_scan_and_anonymize(config_file):
+    scanner = PrivacyScanner(config_file({"EmailRecognizer": True, "PhoneRecognizer": True}))
+    text = "Mail john@example.com or call 212-555-1234"
+
+    result = scanner.process_text(text, "mask", include_operator_results=True)
+
+    anonymized_text, entities = scanner.anonymize_text(text, "mask")
+    assert result["entities"] == entities == scanner.scan_text(text)
+    assert result["anonymized_output"] == anonymized_text
+    assert sorted(item["type"] for item in result["operator_results"]) == ["EMAIL_ADDRESS", "PHONE_NUMBER"]
+    assert all(item["operator"] == "mask" for item in result["operator_results"])
+
+def test_configured_operators_apply_per_entity(tmp_path):
+    config = tmp_path / "operators.json"
+    config.write_text(json.dumps({
+        "recognizers": {"EmailRecognizer": True, "PhoneRecognizer": True},
+        "operators": {"EMAIL_ADDRESS": {"type": "mask", "masking_char": "#", "chars_to_mask": 4}},
+    }))
+    scanner = PrivacyScanner(config)
+
+    anonymized_text, _ = scanner.anonymize_text("Mail john@example.com or call 212-555-1234", "replace")
+
+    assert anonymized_text == "Mail john@example#### or call <PHONE_NUMBER>"
+
+def test_invalid_configured_operator_fails_at_construction(tmp_path):
+    config = tmp_path / "operators.json"
+    config.write_text(json.dumps({
+        "recognizers": {"EmailRecognizer": True},
+        "operators": {"EMAIL_ADDRESS": {"type": "shred"}},
+    }))
+
+    with pytest.raises(PrivacyScannerError):
+        PrivacyScanner(config)
+
+def test_pseudonymize_keeps_tokens_consistent(config_file):
+    scanner = PrivacyScanner(config_file({"EmailRecognizer": True}))
+
+    first, _ = scanner.anonymize_text("Mail a@example.com, b@example.com or a@example.com", "pseudonymize")
+    second, _ = scanner.anonymize_text("Reply to b@example.com", "pseudonymize")
+
+    assert first == "Mail <EMAIL_ADDRESS_1>, <EMAIL_ADDRESS_2> or <EMAIL_ADDRESS_1>"
+    assert second == "Reply to <EMAIL_ADDRESS_2>"
+
+def test_encrypt_is_reversible_with_the_key_provider(config_file):
+    from task3.key_provider import KeyProvider
+
+    provider = KeyProvider({"k1": "0123456789abcdef"})
+    scanner = PrivacyScanner(config_file({"EmailRecognizer": True}), key_provider=provider)
+
+    encrypted, _ = scanner.anonymize_text("Mail a@example.com or b@example.com", "encrypt")
+
+    assert "a@example.com" not in encrypted
+    assert provider.decrypt_text(encrypted) == "Mail a@example.com or b@example.com"
+    with pytest.raises(PrivacyScannerError):
+        PrivacyScanner(config_file({"EmailRecognizer": True})).anonymize_text("Mail a@example.com", "encrypt")
+
+def test_outputs_of_configured_encrypt_operators_are_not_cached(tmp_path):
+    from task3.key_provider import KeyProvider
+
+    config = tmp_path / "operators.json"
+    config.write_text(json.dumps({
+        "recognizers": {"EmailRecognizer": True},
+        "operators": {"EMAIL_ADDRESS": {"type": "encrypt"}},
+    }))
+    scanner = PrivacyScanner(config, result_cache=ResultCache(), key_provider=KeyProvider({"k1": "0123456789abcdef"}))
+
+    first, _ = scanner.anonymize_text("Mail a@example.com", "replace")
+    second, _ = scanner.anonymize_text("Mail a@example.com", "replace")
+    processed = scanner.process_text("Mail a@example.com", "replace")
+
+    assert len({first, second, processed["anonymized_output"]}) == 3
+    assert scanner.result_cache.stats()["entries"] == 0
+
+def test_rescan_matches_a_full_scan(config_file):
+    scanner = PrivacyScanner(config_file({"EmailRecognizer": True, "PhoneRecognizer": True}), result_cache=ResultCache())
+    previous = " ".join(f"Mail user{i}@example.com or call 212-555-01{i:02d}." for i in range(30))
+    handle = scanner.remember_scan(previous, scanner.scan_text(previous))
+
+    text, entities = scanner.rescan_text(*scanner.recall_scan(handle), edit=TextEdit(400, 400, "jane@example.org "))
+
+    assert entities == sorted(scanner.scan_text(text), key=lambda entity: (entity["position"], entity["type"]))
+    with pytest.raises(PrivacyScannerError):
+        scanner.recall_scan("unknown")
+
+def test_scan_handles_cannot_be_derived_from_the_text(config_file):
+    scanner = PrivacyScanner(config_file({"EmailRecognizer": True}), result_cache=ResultCache())
+    text = "Mail a@example.com"
+    handle = scanner.remember_scan(text, scanner.scan_text(text))
+
+    assert handle != scanner.remember_scan(text, scanner.scan_text(text))
+    assert scanner.recall_scan(handle)[0] == text
+    with pytest.raises(PrivacyScannerError):
+        scanner.recall_scan(ResultCache.make_key(scanner.config_key, "", text)[2])
@@ -0,0 +1,52 @@
+import json
+import pytest
+from task3 import scanner_pool as scanner_pool_module
+from task3.scanner_pool import ScannerPool
+
+
+class FakeScanner:
+    def __init__(self, config=None, result_cache=None, mapping_store=None, key_provider=None):
+        self.config = config
+        self.result_cache = result_cache
+        self.mapping_store = mapping_store
+        self.key_provider = key_provider
+
+
+@pytest.fixture(autouse=True)
+def fake_scanner(monkeypatch):
+    monkeypatch.setattr(scanner_pool_module, "PrivacyScanner", FakeScanner)
+
+
+def write_config(tmp_path, name, recognizers):
+    config_file = tmp_path / name
+    config_file.write_text(json.dumps({"recognizers": recognizers}))
+    return config_file
+
+def test_scanner_pool_reuses_scanner_for_same_config(tmp_path):
+    first = write_config(tmp_path, "first.json", {"EmailRecognizer": True, "PhoneRecognizer": False})
+    second = write_config(tmp_path, "second.json", {"PhoneRecognizer": False, "EmailRecognizer": True})
+
+    pool = ScannerPool()
+    scanner = pool.get_scanner(first)
+
+    assert pool.get_scanner(first) is scanner
+    assert pool.get_scanner(second) is scanner
+    assert pool.stats()["hits"] == 2
+    assert pool.stats()["misses"] == 1
+
+def test_scanner_pool_evicts_least_recently_used(tmp_path):
+    email = write_config(tmp_path, "email.json", {"EmailRecognizer": True})
+    phone = write_config(tmp_path, "phone.json", {"PhoneRecognizer": True})
+    card = write_config(tmp_path, "card.json", {"CreditCardRecognizer": True})
+
+    pool = ScannerPool(max_entries=2)
+    email_scanner = pool.get_scanner(email)
+    pool.get_scanner(phone)
+    pool.get_scanner(email)
+    pool.get_scanner(card)
+
+    assert pool.get_scanner(email) is email_scanner
+    assert pool.stats()["evictions"] == 1
+    assert pool.stats()["size"] == 2
+    pool.get_scanner(phone)
+    assert pool.stats()["misses"] == 4
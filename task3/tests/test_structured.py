@@ -0,0 +1,89 @@
+import io
+import json
+import pytest
+from task3 import structured
+from task3.scanner import PrivacyScanner
+from task3.structured import StructuredAnonymizer, anonymize_csv_text, read_records, write_records
+
+
+@pytest.fixture
+def scanner(tmp_path):
+    config = tmp_path / "config.json"
+    config.write_text(json.dumps({
+        "recognizers": {"EmailRecognizer": True, "PhoneRecognizer": True},
+        "columns": {"notes": {"entities": ["PHONE_NUMBER"]}},
+    }))
+    return PrivacyScanner(config)
+
+
+RECORDS = [
+    {"id": "1001", "email": "john@example.com", "notes": "call 212-555-0100 or john@example.com"},
+    {"id": "1002", "email": "jane@example.com", "notes": ""},
+    {"id": "1003", "email": "john@example.com", "notes": None},
+]
+
+
+def test_columns_are_planned_from_rules_and_samples(scanner):
+    anonymizer = StructuredAnonymizer(scanner, "replace")
+
+    records = anonymizer.anonymize_batch(RECORDS)
+
+    assert {column: plan.mode for column, plan in anonymizer.plans.items()} == {
+        "id": "skip",
+        "email": "pattern",
+        "notes": "pattern",
+    }
+    assert [record["id"] for record in records] == ["1001", "1002", "1003"]
+    assert [record["email"] for record in records] == ["<EMAIL_ADDRESS>"] * 3
+    # Only the entity types of the column's rule are looked for
+    assert records[0]["notes"] == "call <PHONE_NUMBER> or john@example.com"
+    assert records[2]["notes"] is None
+    assert anonymizer.cells_analyzed == 4
+
+def test_request_rules_override_the_config(scanner):
+    anonymizer = StructuredAnonymizer(scanner, "redact", columns={"email": {"mode": "skip"}})
+
+    records = list(anonymizer.anonymize_records(RECORDS))
+
+    assert records[0]["email"] == "john@example.com"
+    assert anonymizer.rows_processed == 3
+
+def test_invalid_column_rules_raise(scanner):
+    # structured imports the scanner module the way the app does, as a top-level module
+    with pytest.raises(structured.PrivacyScannerError):
+        StructuredAnonymizer(scanner, "replace", columns={"email": {"mode": "shred"}})
+
+def test_csv_round_trip_keeps_quoting(scanner):
+    text = 'id,email\r\n7,"john@example.com"\r\n8,"two\r\nlines"\r\n'
+
+    output, rows = anonymize_csv_text(StructuredAnonymizer(scanner, "replace"), text)
+
+    assert rows == 2
+    assert list(read_records(io.StringIO(output), "csv")) == [
+        {"id": "7", "email": "<EMAIL_ADDRESS>"},
+        {"id": "8", "email": "two\r\nlines"},
+    ]
+
+def test_json_records_are_written_as_an_array():
+    output = io.StringIO()
+
+    assert write_records(iter(RECORDS[:2]), output, "json") == 2
+    assert json.loads(output.getvalue()) == RECORDS[:2]
+
+def test_csv_limits_and_extra_fields_are_rejected_before_anonymizing(scanner):
+    anonymizer = StructuredAnonymizer(scanner, "replace")
+
+    with pytest.raises(structured.PrivacyScannerError, match="Too many records"):
+        anonymize_csv_text(anonymizer, "id,email\n1,a@example.com\n2,b@example.com\n3,c@example.com\n", max_rows=2)
+    with pytest.raises(structured.PrivacyScannerError, match="Record 2 has more fields than the header"):
+        anonymize_csv_text(anonymizer, "id,email\n1,a@example.com\n2,b@example.com,extra\n")
+    assert anonymizer.rows_processed == 0
+
+def test_analysis_options_narrow_column_entities(scanner):
+    anonymizer = StructuredAnonymizer(scanner, "replace", options=structured.AnalysisOptions(entities=("EMAIL_ADDRESS",)))
+
+    records = anonymizer.anonymize_batch(RECORDS[:1])
+
+    assert records[0]["email"] == "<EMAIL_ADDRESS>"
+    # The notes rule only looks for phone numbers, which the options do not allow
+    assert records[0]["notes"] == RECORDS[0]["notes"]
@@ -0,0 +1,119 @@
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+from presidio_analyzer import (
+    AnalyzerEngine,
+    EntityRecognizer,
+    RecognizerResult,
+)
+from presidio_analyzer.context_aware_enhancers import LemmaContextAwareEnhancer
+from presidio_analyzer.nlp_engine import NlpArtifacts
+
+# Score threshold of the analyze call in progress, read when enhancing its results
+_score_threshold: ContextVar[Optional[float]] = ContextVar(
+    "score_threshold", default=None
+)
+
+
+def prune_below_threshold(
+    results: List[RecognizerResult], score_threshold: Optional[float]
+) -> List[RecognizerResult]:
+    """
+    Drop the results scoring below the threshold before removing duplicates.
+
+    A dropped result could only remove a duplicate scoring lower still, which the
+    threshold drops as well, so the outcome is the same as filtering afterwards.
+    """
+    if not score_threshold:
+        return results
+    return [result for result in results if result.score >= score_threshold]
+
+
+class ThresholdAnalyzerEngine(AnalyzerEngine):
+    """
+    AnalyzerEngine dropping the results that cannot reach the score threshold of the
+    call before enhancing scores with context words.
+
+    Presidio deep-copies and enhances every raw result, then compares them pairwise to
+    remove duplicates, and only then applies the threshold: weak patterns matching all
+    over a text are paid for several times before being dropped. The lemma enhancer
+    raises a score by a fixed factor up to a floor, so a result whose best possible
+    score is below the threshold is dropped up front. The returned results are the same.
+    """
+
+    def analyze(
+        self,
+        text: str,
+        language: str,
+        entities: Optional[List[str]] = None,
+        correlation_id: Optional[str] = None,
+        score_threshold: Optional[float] = None,
+        **kwargs,
+    ) -> List[RecognizerResult]:
+        token = _score_threshold.set(
+            self.default_score_threshold if score_threshold is None else score_threshold
+        )
+        try:
+            return super().analyze(
+                text,
+                language,
+                entities=entities,
+                correlation_id=correlation_id,
+                score_threshold=score_threshold,
+                **kwargs,
+            )
+        finally:
+            _score_threshold.reset(token)
+
+    def _enhance_using_context(
+        self,
+        text: str,
+        raw_results: List[RecognizerResult],
+        nlp_artifacts: NlpArtifacts,
+        recognizers: List[EntityRecognizer],
+        context: Optional[List[str]] = None,
+    ) -> List[RecognizerResult]:
+        score_threshold = _score_threshold.get()
+        if score_threshold and raw_results and self._can_prune(recognizers):
+            recognizers_by_id = {
+                recognizer.id: recognizer for recognizer in recognizers
+            }
+            raw_results = [
+                result
+                for result in raw_results
+                if self._best_score(result, recognizers_by_id) >= score_threshold
+            ]
+        return super()._enhance_using_context(
+            text, raw_results, nlp_artifacts, recognizers, context
+        )
+
+    def _can_prune(self, recognizers: List[EntityRecognizer]) -> bool:
+        """Scores can only be bounded with the lemma enhancer and no recognizer-level one"""
+        return type(self.context_aware_enhancer) is LemmaContextAwareEnhancer and all(
+            type(recognizer).enhance_using_context
+            is EntityRecognizer.enhance_using_context
+            for recognizer in recognizers
+        )
+
+    def _best_score(
+        self,
+        result: RecognizerResult,
+        recognizers_by_id: Dict[str, EntityRecognizer],
+    ) -> float:
+        """The highest score context enhancement can give a result"""
+        recognizer = recognizers_by_id.get(
+            (result.recognition_metadata or {}).get(
+                RecognizerResult.RECOGNIZER_IDENTIFIER_KEY
+            )
+        )
+        # The enhancer leaves results of recognizers without context words as they are
+        if recognizer is None or not recognizer.context:
+            return result.score
+
+        enhancer = self.context_aware_enhancer
+        return min(
+            max(
+                result.score + enhancer.context_similarity_factor,
+                enhancer.min_score_with_context_similarity,
+            ),
+            enhancer.MAX_SCORE,
+        )